@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_alter_profile_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interest',
+            index=models.Index(fields=['activity', 'user', 'level'], name='accounts_in_activit_93d360_idx'),
+        ),
+    ]
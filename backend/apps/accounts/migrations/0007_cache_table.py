@@ -0,0 +1,20 @@
+# Таблица кэша Django (DatabaseCache), чтобы без Redis хватало одного migrate
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Создаёт таблицы всех DatabaseCache из CACHES; уже созданные пропускает
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_interest_activity_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
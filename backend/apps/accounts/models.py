@@ -55,6 +55,10 @@ class Interest(models.Model):
         verbose_name = 'Интерес'
         verbose_name_plural = 'Интересы'
         unique_together = ['user', 'activity']
+        indexes = [
+            # Инвертированный индекс «активность → пользователи» для подбора по интересам
+            models.Index(fields=['activity', 'user', 'level']),
+        ]
     
     def __str__(self):
         return f'{self.user.username} - {self.activity.name} ({self.level})'
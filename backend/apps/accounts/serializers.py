@@ -2,10 +2,11 @@
 Serializers для accounts приложения
 """
 from rest_framework import serializers
+from config.serializers import SparseFieldsetMixin
 from .models import User, Profile, Interest
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 
@@ -14,6 +15,13 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined']
 
 
+class UserBriefSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Пользователь в карточках списков: только то, что нужно для подписи"""
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     rating = serializers.DecimalField(max_digits=3, decimal_places=2, coerce_to_string=False, default=0.00)
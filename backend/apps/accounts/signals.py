@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import User, Profile
+from config.cache import invalidate_tags, user_tag
 
 
 @receiver(post_save, sender=User)
@@ -9,3 +10,14 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         from decimal import Decimal
         Profile.objects.create(user=instance, rating=Decimal('0.00'))
+
+
+@receiver(post_save, sender=User)
+def user_changed_cache(sender, instance, **kwargs):
+    """Сбрасывает общий кэш, помеченный пользователем"""
+    invalidate_tags(user_tag(instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+def profile_changed_cache(sender, instance, **kwargs):
+    invalidate_tags(user_tag(instance.user_id))
@@ -27,9 +27,11 @@ def verify_auth_code(code: str) -> int:
     """
     cache_key = f'telegram_auth_{code}'
     telegram_id = cache.get(cache_key)
-    if telegram_id:
-        cache.delete(cache_key)  # Удаляем код после использования
-    return telegram_id
+    # Код одноразовый: при одновременной проверке в двух воркерах
+    # выигрывает тот, чей delete действительно удалил ключ
+    if telegram_id and cache.delete(cache_key):
+        return telegram_id
+    return None
 
 
 def get_or_create_telegram_user(telegram_id: int, username: str = None, 
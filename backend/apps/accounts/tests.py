@@ -0,0 +1,47 @@
+"""
+Тесты accounts приложения
+"""
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import Profile, User
+
+
+class ProfileBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        # bulk_create не шлёт post_save: пользователи остаются без профилей
+        self.users = User.objects.bulk_create([User(username=f'user{i}') for i in range(3)])
+
+    def batch(self):
+        ids = ','.join(str(user.pk) for user in self.users)
+        response = self.client.get('/api/profile/batch/', {'ids': f'{ids},999999'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_missing_profiles_are_created(self):
+        data = self.batch()
+        self.assertEqual([item['user']['id'] for item in data['results']], [user.pk for user in self.users])
+        self.assertTrue(all(item['profile']['id'] for item in data['results']))
+        self.assertEqual(data['not_found'], [999999])
+        self.assertEqual(Profile.objects.filter(user__in=self.users).count(), 3)
+
+    def test_profile_created_concurrently_is_reused(self):
+        """Профиль, созданный параллельным запросом между SELECT и INSERT, — не 500"""
+        in_bulk = User.objects.in_bulk
+
+        def create_concurrently(*args, **kwargs):
+            Profile.objects.create(user=self.users[1], rating=Decimal('0.00'))
+            return in_bulk(*args, **kwargs)
+
+        with mock.patch.object(User.objects, 'in_bulk', side_effect=create_concurrently):
+            data = self.batch()
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(
+            data['results'][1]['profile']['id'],
+            Profile.objects.get(user=self.users[1]).pk
+        )
+        self.assertEqual(Profile.objects.filter(user__in=self.users).count(), 3)
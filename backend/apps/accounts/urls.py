@@ -11,6 +11,7 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('', views.profile_detail, name='profile_detail'),
     path('<int:user_id>/', views.profile_detail, name='profile_detail_by_id'),
+    path('batch/', views.profile_batch, name='profile_batch'),
     path('edit/', views.profile_edit, name='profile_edit'),
     path('connect-telegram/', views.connect_telegram, name='connect_telegram'),
     path('interests/', views.interests_list, name='interests_list'),
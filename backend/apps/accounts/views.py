@@ -13,6 +13,8 @@ from .models import User, Profile, Interest
 from .telegram_auth import verify_auth_code, get_or_create_telegram_user
 from .serializers import UserSerializer, ProfileSerializer, InterestSerializer
 from apps.activities.models import Activity
+from config.conditional import conditional
+from config.batch import parse_ids
 
 logger = logging.getLogger(__name__)
 
@@ -277,8 +279,24 @@ def register(request):
     }, status=status.HTTP_201_CREATED)
 
 
+def profile_detail_validators(request, user_id=None):
+    """Валидаторы profile_detail: Profile.updated_at и данные аккаунта без загрузки профиля"""
+    if not user_id:
+        if not request.user.is_authenticated:
+            return None
+        user_id = request.user.pk
+    fields = ['updated_at', *[f'user__{name}' for name in UserSerializer.Meta.fields]]
+    row = Profile.objects.filter(user_id=user_id).values_list(*fields).first()
+    if row is None:
+        # Профиля ещё нет — его создаст сама view
+        return None
+    # Абсолютный URL фото зависит от хоста запроса
+    return (row, request.get_host()), row[0]
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])  # Разрешаем неавторизованным запросам
+@conditional(profile_detail_validators)
 def profile_detail(request, user_id=None):
     """Получение профиля текущего пользователя или другого пользователя по user_id"""
     # Если передан user_id, возвращаем профиль другого пользователя
@@ -346,6 +364,53 @@ def profile_detail(request, user_id=None):
     })
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def profile_batch(request):
+    """
+    Профили нескольких пользователей за один запрос (как profile_detail/<user_id>)
+    GET /api/profile/batch/?ids=1,2,3
+    Несуществующие пользователи — в not_found
+    """
+    try:
+        ids = parse_ids(request.query_params.get('ids'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    profiles = {
+        profile.user_id: profile
+        for profile in Profile.objects.select_related('user').filter(user_id__in=ids)
+    }
+    # Профиль без пользователя не бывает, а пользователь без профиля — редкость:
+    # создаём недостающие одним запросом, как profile_detail создаёт по одному
+    missing_ids = [pk for pk in ids if pk not in profiles]
+    if missing_ids:
+        from decimal import Decimal
+        users = User.objects.in_bulk(missing_ids)
+        if users:
+            # Параллельный запрос мог создать те же профили: конфликты пропускаем
+            # и перечитываем профили, какой бы запрос их ни создал
+            Profile.objects.bulk_create([
+                Profile(user=user, rating=Decimal('0.00')) for user in users.values()
+            ], ignore_conflicts=True)
+            profiles.update(
+                (profile.user_id, profile)
+                for profile in Profile.objects.select_related('user').filter(user_id__in=list(users))
+            )
+    
+    found = [profiles[pk] for pk in ids if pk in profiles]
+    users_data = UserSerializer([profile.user for profile in found], many=True).data
+    profiles_data = ProfileSerializer(found, many=True, context={'request': request}).data
+    return Response({
+        'authenticated': request.user.is_authenticated,
+        'results': [
+            {'user': user, 'profile': profile}
+            for user, profile in zip(users_data, profiles_data)
+        ],
+        'not_found': [pk for pk in ids if pk not in profiles],
+    })
+
+
 @api_view(['PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def profile_edit(request):
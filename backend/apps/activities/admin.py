@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Activity, Request, Participation, Favorite, Review
+from .models import Category, Activity, Request, Participation, Favorite, Review, InterestMatchJob
 
 
 @admin.register(Category)
@@ -42,3 +42,11 @@ class ReviewAdmin(admin.ModelAdmin):
     list_display = ['reviewer', 'reviewed_user', 'rating', 'request', 'created_at']
     list_filter = ['rating', 'created_at']
     search_fields = ['reviewer__username', 'reviewed_user__username']
+
+
+@admin.register(InterestMatchJob)
+class InterestMatchJobAdmin(admin.ModelAdmin):
+    list_display = ['request', 'status', 'notified', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['last_user_id', 'notified', 'attempts', 'claimed_until', 'last_error',
+                       'created_at', 'finished_at']
@@ -0,0 +1,129 @@
+"""
+Кэш справочника (категории и активности)
+
+Справочник меняется только модераторами, поэтому ответы category_list и
+activity_list хранятся в памяти процесса уже отрендеренными в байты
+(JSON, а для клиентов с Accept: application/msgpack — MessagePack,
+он рендерится при первом обращении).
+Актуальность проверяется по версии справочника в общем кэше Django:
+сигналы меняют версию после коммита любой записи в Category/Activity,
+и при следующем запросе каждый процесс перерисовывает ответы.
+
+ETag — хэш тела ответа (сильный валидатор, одинаковый во всех процессах
+и разный для JSON и MessagePack), по If-None-Match отдаётся 304 без тела.
+"""
+import hashlib
+import threading
+import uuid
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from config import renderers
+from .models import Category, Activity
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+_rendered = {}
+_lock = threading.Lock()
+
+
+def get_version():
+    """Текущая версия справочника (новая, если ключ вытеснен из кэша)"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+# Формат ответа -> (функция рендеринга, Content-Type)
+FORMATS = {
+    'json': (renderers.dumps, 'application/json'),
+    'msgpack': (renderers.packb, 'application/msgpack'),
+}
+
+
+def _render(data, fmt):
+    dump, _ = FORMATS[fmt]
+    body = dump(data)
+    return body, quote_etag(hashlib.sha1(body).hexdigest())
+
+
+def _build():
+    """Данные всех ответов справочника: категории, все активности и активности по категориям"""
+    from .serializers import CategorySerializer, ActivitySerializer
+
+    payloads = {'categories': CategorySerializer(Category.objects.all(), many=True).data}
+    activities = ActivitySerializer(
+        Activity.objects.filter(is_active=True).select_related('category'), many=True
+    ).data
+    payloads['activities'] = activities
+    by_category = {}
+    for item in activities:
+        by_category.setdefault(item['category']['id'], []).append(item)
+    for category_id, items in by_category.items():
+        payloads[f'activities:{category_id}'] = items
+    payloads['empty'] = []
+    # JSON нужен почти всем клиентам, поэтому рендерится сразу
+    return payloads, {(key, 'json'): _render(data, 'json') for key, data in payloads.items()}
+
+
+def _current():
+    """(версия, данные, отрендеренные ответы) актуальной версии; вызывать под _lock"""
+    version = get_version()
+    cached = _rendered.get('bodies')
+    if cached is None or cached[0] != version:
+        cached = (version, *_build())
+        _rendered['bodies'] = cached
+    return cached
+
+
+def get_payload(key):
+    """Данные ответа справочника (для составных ответов вроде /api/home/)"""
+    with _lock:
+        _, payloads, _ = _current()
+    return payloads.get(key, payloads['empty'])
+
+
+def get_rendered(key, fmt='json'):
+    """(body, etag) ответа справочника; неизвестный ключ — пустой список"""
+    with _lock:
+        _, payloads, bodies = _current()
+        if key not in payloads:
+            key = 'empty'
+        if (key, fmt) not in bodies:
+            bodies[(key, fmt)] = _render(payloads[key], fmt)
+        return bodies[(key, fmt)]
+
+
+def response_format(request):
+    """Формат, выбранный DRF по Accept; всё, кроме MessagePack, отдаётся в JSON"""
+    renderer = getattr(request, 'accepted_renderer', None)
+    fmt = getattr(renderer, 'format', 'json')
+    return fmt if fmt in FORMATS else 'json'
+
+
+def catalog_response(request, key):
+    """Ответ с ETag; 304, если у клиента та же версия"""
+    fmt = response_format(request)
+    body, etag = get_rendered(key, fmt)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        client_etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        if '*' in client_etags or etag in client_etags:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            patch_vary_headers(response, ('Accept',))
+            return response
+
+    response = HttpResponse(body, content_type=FORMATS[fmt][1])
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept',))
+    # Клиент может хранить ответ, но обязан перепроверять его по ETag
+    response['Cache-Control'] = 'no-cache'
+    return response
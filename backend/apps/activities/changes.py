@@ -0,0 +1,149 @@
+"""
+Дельта-синхронизация ленты заявок
+
+Каждое изменение заявки добавляет строку в журнал RequestChange в той же
+транзакции, что и сама запись: сигналы Request/Participation, а массовые
+UPDATE (счётчик участников, статусы filled/completed) вызывают
+record_changes явно. Строки только добавляются, поэтому параллельные
+транзакции с одной заявкой не конфликтуют.
+
+Курсор клиента — seq, а не id: id выдаётся до коммита, и транзакция,
+взявшая id раньше, может закоммититься позже, чем клиент прочитал больший id.
+seq проставляет читатель (stamp_pending) одним UPDATE под блокировкой
+только закоммиченным строкам, поэтому новые строки всегда получают seq больше
+уже выданных. «Что изменилось после токена» — range scan по индексу seq,
+стоимость пропорциональна числу изменений, а не размеру ленты.
+
+purge_request_changes удаляет строки, вытесненные более поздними
+изменениями той же заявки, и tombstone (deleted=True) старше
+CHANGES_RETENTION_DAYS.
+
+Токен — base64 от {'s': последний seq, 't': время выдачи}.
+"""
+import base64
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import RequestChange
+
+# Изменений за один запрос
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Ключ advisory-блокировки PostgreSQL для stamp_pending
+STAMP_LOCK_ID = 0x5E0C
+
+
+class InvalidToken(ValueError):
+    """Токен повреждён или составлен не сервером"""
+
+
+class ExpiredToken(ValueError):
+    """Токен старше срока хранения tombstone — нужна полная перезагрузка ленты"""
+
+
+def record_changes(request_ids, deleted=False):
+    """Отмечает заявки изменёнными (или удалёнными) в текущей транзакции"""
+    request_ids = set(request_ids)
+    if not request_ids:
+        return
+    now = timezone.now()
+    RequestChange.objects.bulk_create([
+        RequestChange(request_id=pk, deleted=deleted, changed_at=now)
+        for pk in sorted(request_ids)
+    ])
+
+
+def encode_token(seq, issued_at=None):
+    payload = {'s': seq, 't': (issued_at or timezone.now()).isoformat()}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token):
+    """(seq, issued_at); ExpiredToken, если изменения за этот период уже вычищены"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        seq = int(payload['s'])
+        issued_at = parse_datetime(payload['t'])
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError) as e:
+        raise InvalidToken(token) from e
+    if issued_at is None or seq < 0:
+        raise InvalidToken(token)
+    if issued_at < timezone.now() - timedelta(days=settings.CHANGES_RETENTION_DAYS):
+        raise ExpiredToken(token)
+    return seq, issued_at
+
+
+def stamp_pending():
+    """
+    Проставляет seq закоммиченным строкам без него, по порядку id.
+    Один UPDATE: на SQLite запись сериализована, на PostgreSQL параллельные
+    вызовы ждут друг друга на advisory-блокировке, и MAX(seq) читается уже
+    после коммита предыдущего.
+    """
+    table = RequestChange._meta.db_table
+    if not RequestChange.objects.filter(seq__isnull=True).exists():
+        return
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [STAMP_LOCK_ID])
+            cursor.execute(
+                f'UPDATE {table} SET seq = '
+                f'(SELECT COALESCE(MAX(seq), 0) FROM {table}) + 1 + id - '
+                f'(SELECT MIN(id) FROM {table} WHERE seq IS NULL) '
+                f'WHERE seq IS NULL'
+            )
+
+
+def head_token():
+    """Токен текущего конца журнала: его берут перед загрузкой полной ленты"""
+    stamp_pending()
+    seq = RequestChange.objects.aggregate(seq=Max('seq'))['seq']
+    return encode_token(seq or 0)
+
+
+def changes_since(token, limit):
+    """
+    Изменения после токена: (id изменённых заявок, id удалённых, следующий токен, есть ли ещё).
+    Если изменений нет, возвращается тот же seq с новым временем выдачи.
+    """
+    seq, _ = decode_token(token)
+    stamp_pending()
+    rows = list(
+        RequestChange.objects.filter(seq__gt=seq)
+        .order_by('seq')
+        .values_list('seq', 'request_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # Заявка могла измениться несколько раз: отдаём её один раз, удаление окончательно
+    latest = {}
+    for _, request_id, deleted in rows:
+        latest[request_id] = latest.pop(request_id, False) or deleted
+    changed = [request_id for request_id, deleted in latest.items() if not deleted]
+    deleted = [request_id for request_id, deleted in latest.items() if deleted]
+    next_seq = rows[-1][0] if rows else seq
+    return changed, deleted, encode_token(next_seq), has_more
+
+
+def purge_changes(now=None):
+    """
+    Удаляет изменения, вытесненные более поздними строками той же заявки
+    (клиент увидит заявку по последней), и tombstone старше срока хранения.
+    Возвращает (вытесненных, tombstone).
+    """
+    now = now or timezone.now()
+    newer = RequestChange.objects.filter(request_id=OuterRef('request_id')).filter(
+        Q(id__gt=OuterRef('id')) | Q(deleted=True)
+    )
+    superseded, _ = RequestChange.objects.filter(deleted=False).filter(Exists(newer)).delete()
+    cutoff = now - timedelta(days=settings.CHANGES_RETENTION_DAYS)
+    tombstones, _ = RequestChange.objects.filter(deleted=True, changed_at__lt=cutoff).delete()
+    return superseded, tombstones
@@ -0,0 +1,161 @@
+"""
+Геопоиск заявок без GDAL/PostGIS
+
+Каждая заявка хранит geohash своих координат (поле Request.geohash,
+обновляется при сохранении). Поиск в радиусе выполняется в три шага:
+1. покрытие bounding box радиуса ячейками geohash — диапазонные условия
+   по индексу geohash;
+2. отсечение по bounding box на latitude/longitude;
+3. точное расстояние по формуле гаверсинусов (в SQL), фильтр и сортировка.
+"""
+import math
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Точность хранимого geohash (~5 м); запросы используют префиксы меньшей длины
+GEOHASH_PRECISION = 9
+# Максимум ячеек в покрытии bounding box (каждая — одно диапазонное условие)
+MAX_COVER_CELLS = 24
+
+DEFAULT_RADIUS_KM = 5.0
+MAX_RADIUS_KM = 100.0
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Символ, следующий за последним символом алфавита: prefix <= geohash < prefix + '{'
+_UPPER_SENTINEL = '{'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Кодирует координаты в geohash заданной длины"""
+    lat, lon = float(latitude), float(longitude)
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Размер ячейки geohash в градусах: (высота по широте, ширина по долготе)"""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, min_lon, max_lat, max_lon) круга радиуса radius_km"""
+    lat, lon = float(latitude), float(longitude)
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return (
+        max(-90.0, lat - dlat),
+        max(-180.0, lon - dlon),
+        min(90.0, lat + dlat),
+        min(180.0, lon + dlon),
+    )
+
+
+def cover_bbox(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS):
+    """
+    Набор префиксов geohash, покрывающих bounding box.
+    Выбирается самая мелкая точность, при которой ячеек не больше max_cells.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor((max_lat + 90.0) / height) - math.floor((min_lat + 90.0) / height) + 1
+        cols = math.floor((max_lon + 180.0) / width) - math.floor((min_lon + 180.0) / width) + 1
+        if rows * cols > max_cells:
+            continue
+        cells = set()
+        lat0 = (math.floor((min_lat + 90.0) / height) + 0.5) * height - 90.0
+        lon0 = (math.floor((min_lon + 180.0) / width) + 0.5) * width - 180.0
+        for row in range(rows):
+            for col in range(cols):
+                lat = min(lat0 + row * height, 90.0 - height / 2)
+                lon = min(lon0 + col * width, 180.0 - width / 2)
+                cells.add(encode_geohash(lat, lon, precision))
+        return sorted(cells)
+    return []
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Расстояние между точками по поверхности Земли в километрах"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_expression(latitude, longitude):
+    """Выражение ORM для расстояния (км) от точки до Request.latitude/longitude"""
+    lat = math.radians(float(latitude))
+    lon = math.radians(float(longitude))
+    row_lat = Radians(Cast(F('latitude'), FloatField()))
+    row_lon = Radians(Cast(F('longitude'), FloatField()))
+    a = (
+        Power(Sin((row_lat - lat) / 2), 2) +
+        math.cos(lat) * Cos(row_lat) * Power(Sin((row_lon - lon) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a), output_field=FloatField())
+
+
+def geohash_prefilter(latitude, longitude, radius_km):
+    """Условие Q: покрытие geohash + bounding box по координатам"""
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    cells_q = Q()
+    for prefix in cover_bbox(min_lat, min_lon, max_lat, max_lon):
+        cells_q |= Q(geohash__gte=prefix, geohash__lt=prefix + _UPPER_SENTINEL)
+    return cells_q & Q(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lon, longitude__lte=max_lon,
+    )
+
+
+def annotate_distance(queryset, latitude, longitude):
+    """Добавляет аннотацию distance_km"""
+    return queryset.annotate(distance_km=distance_expression(latitude, longitude))
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """Заявки в радиусе radius_km с аннотацией distance_km"""
+    queryset = queryset.filter(geohash_prefilter(latitude, longitude, radius_km))
+    return annotate_distance(queryset, latitude, longitude).filter(distance_km__lte=radius_km)
+
+
+def parse_point(params):
+    """
+    Читает lat/lon/radius_km из параметров запроса
+    (поддерживаются также latitude/longitude/radius, которые шлёт фронтенд).
+    Возвращает (lat, lon, radius_km) или None, если координат нет.
+    Поднимает ValueError при некорректных значениях.
+    """
+    lat = params.get('lat') or params.get('latitude')
+    lon = params.get('lon') or params.get('longitude')
+    if lat in (None, '') or lon in (None, ''):
+        return None
+    lat, lon = float(lat), float(lon)
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        raise ValueError('coordinates out of range')
+    radius = params.get('radius_km') or params.get('radius')
+    radius = float(radius) if radius not in (None, '') else DEFAULT_RADIUS_KM
+    if not math.isfinite(radius) or radius <= 0:
+        raise ValueError('radius must be positive')
+    return lat, lon, min(radius, MAX_RADIUS_KM)
@@ -0,0 +1,66 @@
+"""
+Жизненный цикл статусов заявок
+
+Заявки в статусах 'active' и 'filled' переводятся в 'completed', когда наступает
+момент transition_at (дата и время начала активности). Перевод выполняется
+отдельным процессом (команда update_request_statuses), а не на чтении списка.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Request
+from .map_clusters import invalidate_requests
+from .changes import record_changes
+
+# Статусы, из которых заявка автоматически завершается
+EXPIRING_STATUSES = ['active', 'filled']
+
+
+def due_requests(now=None):
+    """Заявки, которые пора перевести в 'completed'"""
+    now = now or timezone.now()
+    return Request.objects.filter(
+        status__in=EXPIRING_STATUSES,
+        transition_at__lte=now
+    )
+
+
+def complete_due_requests(now=None, batch_size=500):
+    """
+    Переводит просроченные заявки в 'completed' небольшими пачками,
+    чтобы не держать долгую блокировку на запись.
+    Возвращает количество обновлённых заявок.
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        ids = list(due_requests(now).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            total += Request.objects.filter(
+                id__in=ids,
+                status__in=EXPIRING_STATUSES
+            ).update(status='completed', updated_at=timezone.now())
+            record_changes(ids)
+        invalidate_requests(ids)
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+def next_transition_at(now=None):
+    """Ближайший момент следующей смены статуса (None, если ждать нечего)"""
+    now = now or timezone.now()
+    return Request.objects.filter(
+        status__in=EXPIRING_STATUSES,
+        transition_at__gt=now
+    ).order_by('transition_at').values_list('transition_at', flat=True).first()
+
+
+def not_expired(now=None):
+    """
+    Условие "время заявки ещё не наступило" для путей чтения (лента, поиск,
+    карта): до прихода воркера просроченная заявка остаётся 'active'
+    """
+    return Q(transition_at__gt=now or timezone.now())
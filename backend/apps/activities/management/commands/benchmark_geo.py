@@ -0,0 +1,113 @@
+"""
+Бенчмарк геопоиска заявок
+Запуск: python manage.py benchmark_geo --count 1000000
+
+Создаёт синтетические заявки внутри транзакции (по умолчанию она откатывается),
+затем сравнивает поиск в радиусе через geohash + bounding box с полным
+перебором по формуле гаверсинусов.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.accounts.models import User
+from apps.activities.geo import annotate_distance, encode_geohash, within_radius
+from apps.activities.models import Category, Activity, Request
+
+# Москва и окрестности: ~60 x 60 км
+CENTER_LAT, CENTER_LON = 55.7558, 37.6173
+SPREAD_LAT, SPREAD_LON = 0.27, 0.48
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает геопоиск через geohash с полным перебором на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1_000_000, help='Количество синтетических заявок')
+        parser.add_argument('--queries', type=int, default=50, help='Количество поисковых запросов')
+        parser.add_argument('--radius', type=float, default=3.0, help='Радиус поиска, км')
+        parser.add_argument('--full-scan-queries', type=int, default=3,
+                            help='Сколько запросов выполнить полным перебором (он медленный)')
+        parser.add_argument('--keep', action='store_true', help='Не откатывать созданные данные')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            self._populate(rng, options['count'])
+            if connection.vendor == 'sqlite':
+                # Без статистики SQLite выбирает индекс по status и сканирует всю таблицу
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            points = [self._random_point(rng) for _ in range(options['queries'])]
+            radius = options['radius']
+
+            base = Request.objects.filter(status='active')
+            indexed = self._measure(
+                lambda lat, lon: len(within_radius(base, lat, lon, radius).values_list('id', 'distance_km')),
+                points
+            )
+            full_scan = self._measure(
+                lambda lat, lon: len(
+                    annotate_distance(base, lat, lon).filter(distance_km__lte=radius).values_list('id', 'distance_km')
+                ),
+                points[:options['full_scan_queries']]
+            )
+
+            self._report('geohash + bbox + haversine', indexed)
+            self._report('полный перебор (haversine)', full_scan)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def _random_point(self, rng):
+        return (CENTER_LAT + rng.uniform(-SPREAD_LAT, SPREAD_LAT),
+                CENTER_LON + rng.uniform(-SPREAD_LON, SPREAD_LON))
+
+    def _populate(self, rng, count):
+        user, _ = User.objects.get_or_create(username='benchmark_geo_user')
+        category, _ = Category.objects.get_or_create(slug='benchmark-geo', defaults={'name': 'Бенчмарк гео'})
+        activity, _ = Activity.objects.get_or_create(
+            slug='benchmark-geo', defaults={'name': 'Бенчмарк гео', 'category': category}
+        )
+        start = time.perf_counter()
+        future = timezone.localtime() + timedelta(days=30)
+        batch = []
+        for i in range(count):
+            lat, lon = self._random_point(rng)
+            lat, lon = round(lat, 6), round(lon, 6)
+            batch.append(Request(
+                creator=user, request_type='sport', activity=activity, format='group',
+                date=future.date(), time=future.time().replace(microsecond=0),
+                location_name=f'Точка {i}', latitude=lat, longitude=lon,
+                geohash=encode_geohash(lat, lon), transition_at=future,
+                max_participants=4, title=f'Бенчмарк {i}', description='',
+            ))
+            if len(batch) >= 5000:
+                Request.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Request.objects.bulk_create(batch)
+        self.stdout.write(f'Создано заявок: {count} за {time.perf_counter() - start:.1f} с')
+
+    def _measure(self, run, points):
+        timings, found = [], []
+        for lat, lon in points:
+            start = time.perf_counter()
+            found.append(run(lat, lon))
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings, found
+
+    def _report(self, label, result):
+        timings, found = result
+        if not timings:
+            return
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: запросов {len(timings)}, p50 {statistics.median(timings):.1f} мс, '
+            f'p95 {p95:.1f} мс, найдено в среднем {statistics.mean(found):.0f}'
+        ))
@@ -0,0 +1,105 @@
+"""
+Бенчмарк рендеринга и сжатия ответов API
+Запуск: python manage.py benchmark_renderers --limit 100 --notifications 200
+
+Для страницы ленты заявок (request_list) и списка уведомлений (notification_list)
+сравнивает стандартный JSONRenderer DRF с FastJSONRenderer (orjson)
+и размер/время сжатия gzip и brotli. Недостающие уведомления создаются
+внутри транзакции, которая откатывается.
+"""
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request as ApiRequest
+from rest_framework.test import APIRequestFactory
+from apps.accounts.models import User
+from apps.activities.models import Request
+from apps.activities.pagination import FEED_ORDERING
+from apps.activities.serializers import RequestSerializer, REQUEST_LIST_RELATED
+from apps.notifications.models import Notification
+from apps.notifications.serializers import NotificationSerializer
+from config.renderers import FastJSONRenderer
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает JSON-рендереры и сжатие на ответах request_list и notification_list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Заявок на странице ленты')
+        parser.add_argument('--notifications', type=int, default=200, help='Уведомлений в списке')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого замера')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        with transaction.atomic():
+            user = User.objects.order_by('id').first() or User.objects.create(username='benchmark_renderers')
+            api_request = ApiRequest(APIRequestFactory().get('/api/requests/'))
+            api_request.user = user
+
+            requests = list(
+                Request.objects.select_related(*REQUEST_LIST_RELATED)
+                .order_by(*FEED_ORDERING[1:])[:options['limit']]
+            )
+            self._report('request_list', repeat, lambda: RequestSerializer(
+                requests, many=True, context={'request': api_request}
+            ).data)
+
+            self._ensure_notifications(user, options['notifications'])
+            notifications = list(
+                Notification.objects.filter(user=user)
+                .select_related('related_user', *[f'related_request__{field}' for field in REQUEST_LIST_RELATED])
+                [:options['notifications']]
+            )
+            self._report('notification_list', repeat, lambda: NotificationSerializer(
+                notifications, many=True
+            ).data)
+
+            transaction.set_rollback(True)
+
+    def _ensure_notifications(self, user, count):
+        missing = count - Notification.objects.filter(user=user).count()
+        if missing <= 0:
+            return
+        related = list(Request.objects.order_by('-id')[:50]) or [None]
+        Notification.objects.bulk_create([
+            Notification(
+                user=user, notification_type='new_response', title='Новый отклик на заявку',
+                message='Пользователь откликнулся на вашу заявку', related_user=user,
+                related_request=related[i % len(related)],
+            )
+            for i in range(missing)
+        ])
+
+    def _measure(self, repeat, run):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+    def _report(self, label, repeat, serialize):
+        serialize_ms, data = self._measure(repeat, serialize)
+        json_ms, body = self._measure(repeat, lambda: JSONRenderer().render(data))
+        fast_ms, fast_body = self._measure(repeat, lambda: FastJSONRenderer().render(data))
+
+        self.stdout.write(self.style.SUCCESS(f'{label}: {len(data)} объектов, сериализация {serialize_ms:.1f} мс'))
+        self.stdout.write(f'  JSONRenderer:     {json_ms:7.2f} мс, {len(body)} байт')
+        self.stdout.write(f'  FastJSONRenderer: {fast_ms:7.2f} мс, {len(fast_body)} байт')
+
+        gzip_ms, gzipped = self._measure(repeat, lambda: compress_string(fast_body))
+        self.stdout.write(f'  gzip:             {gzip_ms:7.2f} мс, {len(gzipped)} байт')
+        if brotli is not None:
+            quality = settings.COMPRESSION_BROTLI_QUALITY
+            br_ms, compressed = self._measure(repeat, lambda: brotli.compress(fast_body, quality=quality))
+            self.stdout.write(f'  brotli (q={quality}):     {br_ms:7.2f} мс, {len(compressed)} байт')
@@ -0,0 +1,33 @@
+"""
+Команда для выполнения рассылок по интересам, не завершённых в фоновом пуле
+(процесс перезапустили или он упал между коммитом заявки и рассылкой)
+Запускать через cron: python manage.py process_interest_matches
+"""
+from django.core.management.base import BaseCommand
+from apps.activities.matching import due_jobs, purge_jobs, run_job, JOB_RETENTION_DAYS
+from apps.activities.models import InterestMatchJob
+
+
+class Command(BaseCommand):
+    help = 'Выполняет незавершённые рассылки уведомлений о новых заявках по интересам'
+
+    def handle(self, *args, **options):
+        processed = notified = errors = 0
+        for job_id in list(due_jobs().values_list('id', flat=True)):
+            try:
+                result = run_job(job_id)
+            except Exception as e:
+                errors += 1
+                self.stderr.write(f'Рассылка {job_id}: {type(e).__name__}: {e}')
+                continue
+            if result is not None:
+                processed += 1
+                notified += result
+
+        purged = purge_jobs()
+        failed = InterestMatchJob.objects.filter(status='failed').count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено рассылок: {processed}, уведомлено: {notified}, ошибок: {errors}; '
+            f'не выполнено после всех попыток: {failed}; '
+            f'удалено выполненных старше {JOB_RETENTION_DAYS} дн.: {purged}'
+        ))
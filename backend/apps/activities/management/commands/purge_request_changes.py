@@ -0,0 +1,21 @@
+"""
+Команда для очистки журнала дельта-синхронизации ленты
+Запускать через cron: python manage.py purge_request_changes
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.activities.changes import purge_changes
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из журнала изменений строки, вытесненные более поздними изменениями заявки, '
+            'и tombstone заявок, удалённых раньше CHANGES_RETENTION_DAYS')
+
+    def handle(self, *args, **options):
+        superseded, tombstones = purge_changes()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Удалено вытесненных изменений: {superseded}, '
+                f'tombstone: {tombstones} (старше {settings.CHANGES_RETENTION_DAYS} дн.)'
+            )
+        )
@@ -0,0 +1,31 @@
+"""
+Команда для полной пересборки поискового индекса заявок
+Запуск: python manage.py rebuild_search_index
+(после массовой загрузки данных в обход сигналов, например bulk_create)
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from apps.activities.search import rebuild_index
+from apps.activities.search.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс заявок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Количество заявок, индексируемых за один проход')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        start = time.perf_counter()
+        with transaction.atomic():
+            backend.create_table(connection)
+            total = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Проиндексировано заявок: {total} ({type(backend).__name__}) '
+                f'за {time.perf_counter() - start:.1f} с'
+            )
+        )
@@ -0,0 +1,24 @@
+"""
+Команда для исправления расхождений в счётчике участников заявок
+Запускать через cron: python manage.py reconcile_participant_counts
+"""
+from django.core.management.base import BaseCommand
+from apps.activities.participants import reconcile_participant_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает current_participants и статусы "active"/"filled" для всех заявок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Количество заявок, обрабатываемых за один проход')
+
+    def handle(self, *args, **options):
+        fixed_counts, fixed_statuses = reconcile_participant_counts(
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Исправлено счётчиков: {fixed_counts}, статусов: {fixed_statuses}'
+            )
+        )
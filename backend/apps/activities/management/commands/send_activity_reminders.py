@@ -7,6 +7,7 @@ from django.utils import timezone
 from datetime import timedelta
 from apps.activities.models import Request, Participation
 from apps.notifications.models import Notification
+from apps.notifications.services import notify_many
 
 
 class Command(BaseCommand):
@@ -24,34 +25,30 @@ class Command(BaseCommand):
         created_count = 0
         
         for req in requests_today:
-            # Уведомляем создателя
-            Notification.objects.get_or_create(
-                user=req.creator,
-                notification_type='activity_reminder',
-                related_request=req,
-                defaults={
-                    'title': 'Напоминание: активность сегодня',
-                    'message': f'Сегодня состоится активность "{req.title}" в {req.time}',
-                }
+            # Создатель и все подтверждённые участники
+            recipients = {req.creator_id}
+            recipients.update(
+                Participation.objects.filter(
+                    request=req,
+                    status='approved'
+                ).values_list('user_id', flat=True)
             )
             
-            # Уведомляем всех подтверждённых участников
-            participations = Participation.objects.filter(
-                request=req,
-                status='approved'
+            # Повторный запуск не дублирует напоминания
+            recipients -= set(
+                Notification.objects.filter(
+                    notification_type='activity_reminder',
+                    related_request=req
+                ).values_list('user_id', flat=True)
             )
             
-            for participation in participations:
-                Notification.objects.get_or_create(
-                    user=participation.user,
-                    notification_type='activity_reminder',
-                    related_request=req,
-                    defaults={
-                        'title': 'Напоминание: активность сегодня',
-                        'message': f'Сегодня состоится активность "{req.title}" в {req.time}',
-                    }
-                )
-                created_count += 1
+            created_count += len(notify_many(
+                recipients,
+                notification_type='activity_reminder',
+                title='Напоминание: активность сегодня',
+                message=f'Сегодня состоится активность "{req.title}" в {req.time}',
+                related_request=req
+            ))
         
         self.stdout.write(
             self.style.SUCCESS(f'Создано напоминаний: {created_count}')
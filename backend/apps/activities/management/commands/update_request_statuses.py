@@ -0,0 +1,45 @@
+"""
+Команда для перевода прошедших заявок в статус "completed"
+Разовый запуск через cron: python manage.py update_request_statuses
+Постоянный воркер: python manage.py update_request_statuses --loop
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.activities.lifecycle import complete_due_requests, next_transition_at
+
+
+class Command(BaseCommand):
+    help = 'Переводит прошедшие активные и набранные заявки в статус "completed"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно, просыпаясь к ближайшей смене статуса')
+        parser.add_argument('--interval', type=int, default=60,
+                            help='Максимальная пауза между проверками в секундах (по умолчанию 60)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Размер пачки обновления')
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            completed = complete_due_requests(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Завершено заявок: {completed}'))
+            return
+
+        interval = max(1, options['interval'])
+        self.stdout.write(self.style.SUCCESS('Воркер статусов заявок запущен'))
+        try:
+            while True:
+                completed = complete_due_requests(batch_size=options['batch_size'])
+                if completed:
+                    self.stdout.write(f'Завершено заявок: {completed}')
+
+                # Спим до ближайшей смены статуса, но не дольше interval
+                now = timezone.now()
+                upcoming = next_transition_at(now)
+                sleep_for = interval
+                if upcoming:
+                    sleep_for = min(interval, max(1, (upcoming - now).total_seconds()))
+                time.sleep(sleep_for)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Воркер статусов заявок остановлен'))
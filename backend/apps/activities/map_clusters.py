@@ -0,0 +1,156 @@
+"""
+Серверная кластеризация заявок для карты
+
+Видимая область разбивается на тайлы веб-меркатора (z/x/y, как у Яндекс.Карт),
+каждый тайл — на сетку CLUSTER_GRID x CLUSTER_GRID ячеек. Для ячейки
+отдаются количество заявок, центроид и несколько id для превью.
+Результат тайла кэшируется по ключу (zoom, x, y) и сбрасывается, когда в тайле
+создаётся, перемещается, меняет статус или удаляется заявка.
+"""
+import math
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Request
+
+MIN_ZOOM = 0
+MAX_ZOOM = 19
+# Ячеек сетки кластеризации по каждой оси тайла (тайл 256px -> ячейка 64px)
+CLUSTER_GRID = 4
+# Сколько id заявок отдавать в кластере для превью
+REPRESENTATIVE_IDS = 3
+# Максимум тайлов на один запрос
+MAX_TILES = 64
+TILE_CACHE_TIMEOUT = 300
+TILE_CACHE_PREFIX = 'map_tile'
+
+_MAX_MERCATOR_LAT = 85.05112878
+
+
+def _clamp_lat(lat):
+    return max(-_MAX_MERCATOR_LAT, min(_MAX_MERCATOR_LAT, lat))
+
+
+def _mercator(lat, lon, zoom):
+    """Координаты точки в тайлах (дробные) на уровне zoom"""
+    n = 1 << zoom
+    lat_rad = math.radians(_clamp_lat(float(lat)))
+    x = (float(lon) + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return min(max(x, 0.0), n - 1e-9), min(max(y, 0.0), n - 1e-9)
+
+
+def tile_for_point(lat, lon, zoom):
+    x, y = _mercator(lat, lon, zoom)
+    return int(x), int(y)
+
+
+def tile_bounds(x, y, zoom):
+    """(min_lat, min_lon, max_lat, max_lon) тайла"""
+    n = 1 << zoom
+
+    def lat_at(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return lat_at(y + 1), x / n * 360.0 - 180.0, lat_at(y), (x + 1) / n * 360.0 - 180.0
+
+
+def tiles_for_viewport(min_lat, min_lon, max_lat, max_lon, zoom):
+    """Список тайлов (x, y), покрывающих видимую область"""
+    x1, y1 = tile_for_point(max_lat, min_lon, zoom)
+    x2, y2 = tile_for_point(min_lat, max_lon, zoom)
+    return [(x, y) for x in range(x1, x2 + 1) for y in range(y1, y2 + 1)]
+
+
+def tile_cache_key(zoom, x, y):
+    return f'{TILE_CACHE_PREFIX}:{zoom}:{x}:{y}'
+
+
+def visible_requests(now=None):
+    """Заявки, которые показываются на карте всем пользователям"""
+    # lifecycle сам импортирует map_clusters — импорт здесь, а не в начале модуля
+    from .lifecycle import not_expired
+    return Request.objects.filter(not_expired(now), status='active', visibility='public')
+
+
+def build_tile(zoom, x, y, now=None):
+    """
+    Кластеры одного тайла. Возвращает (clusters, timeout): тайл не должен жить
+    в кэше дольше, чем до ближайшего завершения одной из его заявок.
+    """
+    now = now or timezone.now()
+    min_lat, min_lon, max_lat, max_lon = tile_bounds(x, y, zoom)
+    rows = visible_requests(now).filter(
+        latitude__gte=min_lat, latitude__lt=max_lat,
+        longitude__gte=min_lon, longitude__lt=max_lon,
+    ).order_by('-created_at').values_list('id', 'latitude', 'longitude', 'transition_at')
+
+    cells = {}
+    earliest_transition = None
+    for pk, lat, lon, transition_at in rows:
+        lat, lon = float(lat), float(lon)
+        tx, ty = _mercator(lat, lon, zoom)
+        cell_key = (int((tx - x) * CLUSTER_GRID), int((ty - y) * CLUSTER_GRID))
+        cell = cells.setdefault(cell_key, {'count': 0, 'lat_sum': 0.0, 'lon_sum': 0.0, 'ids': []})
+        cell['count'] += 1
+        cell['lat_sum'] += lat
+        cell['lon_sum'] += lon
+        if len(cell['ids']) < REPRESENTATIVE_IDS:
+            cell['ids'].append(pk)
+        if earliest_transition is None or transition_at < earliest_transition:
+            earliest_transition = transition_at
+
+    clusters = [
+        {
+            'count': cell['count'],
+            'latitude': round(cell['lat_sum'] / cell['count'], 6),
+            'longitude': round(cell['lon_sum'] / cell['count'], 6),
+            'ids': cell['ids'],
+        }
+        for cell in cells.values()
+    ]
+
+    timeout = TILE_CACHE_TIMEOUT
+    if earliest_transition is not None:
+        timeout = max(1, min(timeout, int((earliest_transition - now).total_seconds()) + 1))
+    return clusters, timeout
+
+
+def get_clusters(min_lat, min_lon, max_lat, max_lon, zoom):
+    """
+    Кластеры для видимой области. Тайлы берутся из кэша одним get_many,
+    недостающие строятся и сохраняются.
+    """
+    tiles = tiles_for_viewport(min_lat, min_lon, max_lat, max_lon, zoom)
+    if len(tiles) > MAX_TILES:
+        raise ValueError('too many tiles')
+
+    keys = {tile_cache_key(zoom, x, y): (x, y) for x, y in tiles}
+    cached = cache.get_many(keys.keys())
+    clusters = []
+    now = timezone.now()
+    for key, (x, y) in keys.items():
+        tile_clusters = cached.get(key)
+        if tile_clusters is None:
+            tile_clusters, timeout = build_tile(zoom, x, y, now)
+            cache.set(key, tile_clusters, timeout)
+        clusters.extend(tile_clusters)
+    return clusters
+
+
+def invalidate_point(latitude, longitude):
+    """Сбрасывает кэш тайлов всех уровней, содержащих точку"""
+    if latitude is None or longitude is None:
+        return
+    cache.delete_many([
+        tile_cache_key(zoom, *tile_for_point(latitude, longitude, zoom))
+        for zoom in range(MIN_ZOOM, MAX_ZOOM + 1)
+    ])
+
+
+def invalidate_requests(request_ids):
+    """Сбрасывает кэш тайлов для заявок, изменённых массовым UPDATE"""
+    if not request_ids:
+        return
+    points = set(Request.objects.filter(id__in=request_ids).values_list('latitude', 'longitude'))
+    for lat, lon in points:
+        invalidate_point(lat, lon)
@@ -0,0 +1,182 @@
+"""
+Подбор получателей уведомления о новой заявке по интересам
+
+Инвертированный индекс «активность → пользователи» — покрывающий индекс
+Interest(activity, user, level): подбор читает только его, без таблицы
+интересов и пользователей. Уровень интереса должен быть совместим
+с уровнем заявки (COMPATIBLE_LEVELS): заявку «Любой» видят все
+интересующиеся, остальные — свой и соседние уровни.
+
+Рассылка записывается строкой InterestMatchJob в одной транзакции с заявкой
+и после коммита запускается в фоновом пуле (INTEREST_MATCH_WORKERS потоков),
+поэтому request_create не ждёт её. Если процесс завершится раньше, чем
+рассылка закончится, её подберёт `python manage.py process_interest_matches`
+(через cron): захват истекает через INTEREST_MATCH_LEASE секунд.
+
+Получатели идут пачками по INTEREST_MATCH_CHUNK: на пачку — один SELECT
+по индексу и notify_many (bulk_create и outbox Telegram) в одной транзакции
+с продвижением last_user_id рассылки. Поэтому прерванная рассылка
+продолжается со следующего получателя, и никто не получает уведомление
+дважды. Ограничения на число получателей нет.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from apps.accounts.models import Interest
+from apps.notifications.services import notify_many
+from .models import InterestMatchJob
+
+# Сколько дней хранить выполненные рассылки
+JOB_RETENTION_DAYS = 7
+
+logger = logging.getLogger(__name__)
+
+# Уровни интереса, которым подходит заявка данного уровня
+COMPATIBLE_LEVELS = {
+    'beginner': ('beginner', 'intermediate'),
+    'intermediate': ('beginner', 'intermediate', 'advanced'),
+    'advanced': ('intermediate', 'advanced', 'professional'),
+    'professional': ('advanced', 'professional'),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.INTEREST_MATCH_WORKERS, thread_name_prefix='interest-match'
+            )
+    return _executor
+
+
+def matching_users(activity_id, level, exclude_user_id=None):
+    """id пользователей с интересом к активности и совместимым уровнем, по возрастанию"""
+    interests = Interest.objects.filter(activity_id=activity_id)
+    if level in COMPATIBLE_LEVELS:
+        interests = interests.filter(level__in=COMPATIBLE_LEVELS[level])
+    if exclude_user_id is not None:
+        interests = interests.exclude(user_id=exclude_user_id)
+    return interests.order_by('user_id').values_list('user_id', flat=True)
+
+
+def _lease_until():
+    return timezone.now() + timedelta(seconds=settings.INTEREST_MATCH_LEASE)
+
+
+def claim_job(job_id):
+    """Захватывает рассылку; False — её ведёт другой процесс или она уже завершена"""
+    return InterestMatchJob.objects.filter(pk=job_id, status='pending').filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=timezone.now())
+    ).update(claimed_until=_lease_until(), attempts=F('attempts') + 1) == 1
+
+
+def notify_interested(job):
+    """Рассылает уведомление о новой заявке с места остановки; возвращает число получателей"""
+    req = job.request
+    if req.status == 'active':
+        users = matching_users(req.activity_id, req.level, exclude_user_id=req.creator_id)
+    else:
+        # Заявку успели отменить или набрать
+        users = Interest.objects.none()
+    chunk = settings.INTEREST_MATCH_CHUNK
+    notified = 0
+    while True:
+        # Keyset по user_id: каждая пачка — range scan по индексу
+        user_ids = list(users.filter(user_id__gt=job.last_user_id)[:chunk])
+        if not user_ids:
+            break
+        with transaction.atomic():
+            # Продвигаем рассылку, только если её не продвинул другой процесс
+            advanced = InterestMatchJob.objects.filter(pk=job.pk, last_user_id=job.last_user_id).update(
+                last_user_id=user_ids[-1],
+                notified=F('notified') + len(user_ids),
+                claimed_until=_lease_until(),
+            )
+            if not advanced:
+                logger.warning('Рассылка %s продолжена другим процессом', job.pk)
+                return notified
+            notify_many(
+                user_ids,
+                notification_type='new_request_nearby',
+                title='Новая заявка по вашим интересам',
+                message=f'Создана новая заявка "{req.title}" по активности "{req.activity.name}"',
+                related_request=req,
+                related_user=req.creator
+            )
+        job.last_user_id = user_ids[-1]
+        notified += len(user_ids)
+    InterestMatchJob.objects.filter(pk=job.pk, last_user_id=job.last_user_id).update(
+        status='done', claimed_until=None, finished_at=timezone.now()
+    )
+    return notified
+
+
+def run_job(job_id):
+    """
+    Выполняет рассылку, если удалось её захватить. Возвращает число
+    уведомлённых или None, если рассылку ведёт другой процесс.
+    Ошибка возвращает рассылку в очередь (после INTEREST_MATCH_MAX_ATTEMPTS — failed).
+    """
+    if not claim_job(job_id):
+        return None
+    job = InterestMatchJob.objects.select_related('request__activity', 'request__creator').get(pk=job_id)
+    try:
+        return notify_interested(job)
+    except Exception as e:
+        InterestMatchJob.objects.filter(pk=job_id).update(
+            status='failed' if job.attempts >= settings.INTEREST_MATCH_MAX_ATTEMPTS else 'pending',
+            claimed_until=None,
+            last_error=f'{type(e).__name__}: {e}'[:1000],
+        )
+        raise
+
+
+def due_jobs():
+    """Незавершённые рассылки, которые никто не ведёт (или чей захват истёк)"""
+    return InterestMatchJob.objects.filter(status='pending').filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=timezone.now())
+    ).order_by('id')
+
+
+def purge_jobs():
+    """Удаляет выполненные рассылки старше JOB_RETENTION_DAYS; возвращает их количество"""
+    cutoff = timezone.now() - timedelta(days=JOB_RETENTION_DAYS)
+    deleted, _ = InterestMatchJob.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def _run(job_id):
+    close_old_connections()
+    try:
+        notified = run_job(job_id)
+        if notified is not None:
+            logger.info('Рассылка %s: уведомлено по интересам %s', job_id, notified)
+    except Exception:
+        logger.exception('Ошибка рассылки по интересам %s', job_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_interest_notifications(request_id):
+    """
+    Записывает рассылку в текущей транзакции (вызывать в транзакции создания
+    заявки) и после коммита запускает её в фоновом пуле
+    """
+    job = InterestMatchJob.objects.create(request_id=request_id)
+
+    def submit():
+        if settings.INTEREST_MATCH_WORKERS > 0:
+            get_executor().submit(_run, job.pk)
+        else:
+            run_job(job.pk)
+
+    transaction.on_commit(submit)
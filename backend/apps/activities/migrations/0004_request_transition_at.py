@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:02
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_transition_at(apps, schema_editor):
+    Request = apps.get_model('activities', 'Request')
+    batch = []
+    for req in Request.objects.only('id', 'date', 'time').iterator(chunk_size=1000):
+        req.transition_at = timezone.make_aware(datetime.combine(req.date, req.time))
+        batch.append(req)
+        if len(batch) >= 1000:
+            Request.objects.bulk_update(batch, ['transition_at'])
+            batch = []
+    if batch:
+        Request.objects.bulk_update(batch, ['transition_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0003_increase_coordinates_precision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='transition_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Следующая смена статуса'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', 'transition_at'], name='activities__status_5ae668_idx'),
+        ),
+        migrations.RunPython(fill_transition_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:05
+
+from django.db import migrations, models
+
+from apps.activities.geo import encode_geohash
+
+
+def fill_geohash(apps, schema_editor):
+    Request = apps.get_model('activities', 'Request')
+    batch = []
+    for req in Request.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=1000):
+        req.geohash = encode_geohash(req.latitude, req.longitude)
+        batch.append(req)
+        if len(batch) >= 1000:
+            Request.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Request.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0004_request_transition_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12, verbose_name='Geohash координат'),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
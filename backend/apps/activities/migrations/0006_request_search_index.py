@@ -0,0 +1,79 @@
+# Полнотекстовый индекс заявок
+#
+# Схема и первичное заполнение — снимок на момент миграции (SQL здесь,
+# а не вызовы apps.activities.search): изменения модуля поиска не меняют
+# того, что делает эта миграция.
+#
+# SQLite заполняется исходным текстом без стеммера: основа слова — его
+# начало, а слова запроса ищутся как префиксы основ, поэтому находится то же.
+# Основы записывает python manage.py rebuild_search_index.
+from django.db import migrations
+
+SQLITE_TABLE = 'activities_request_fts'
+POSTGRES_TABLE = 'activities_request_search'
+
+
+def _sqlite_has_fts5(cursor):
+    cursor.execute('PRAGMA compile_options')
+    return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def _sqlite_text(column):
+    # Как search.stemmer.tokenize: ё -> е (регистр сводит токенизатор unicode61)
+    return f"REPLACE(REPLACE(COALESCE({column}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ('
+                f'request_id bigint PRIMARY KEY REFERENCES activities_request (id) ON DELETE CASCADE, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_gin '
+                f'ON {POSTGRES_TABLE} USING GIN (document)'
+            )
+            # Веса: название A, активность B, место C, описание D
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_TABLE} (request_id, document) '
+                f"SELECT r.id, "
+                f"setweight(to_tsvector('russian', COALESCE(r.title, '')), 'A') || "
+                f"setweight(to_tsvector('russian', COALESCE(r.description, '')), 'D') || "
+                f"setweight(to_tsvector('russian', COALESCE(a.name, '')), 'B') || "
+                f"setweight(to_tsvector('russian', COALESCE(r.location_name, '')), 'C') "
+                f'FROM activities_request r LEFT JOIN activities_activity a ON a.id = r.activity_id '
+                f'ON CONFLICT (request_id) DO NOTHING'
+            )
+        elif connection.vendor == 'sqlite' and _sqlite_has_fts5(cursor):
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5('
+                f"title, description, activity, location, tokenize='unicode61', prefix='2 3')"
+            )
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, title, description, activity, location) '
+                f"SELECT r.id, {_sqlite_text('r.title')}, {_sqlite_text('r.description')}, "
+                f"{_sqlite_text('a.name')}, {_sqlite_text('r.location_name')} "
+                f'FROM activities_request r LEFT JOIN activities_activity a ON a.id = r.activity_id'
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    table = {'postgresql': POSTGRES_TABLE, 'sqlite': SQLITE_TABLE}.get(connection.vendor)
+    if table:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0005_request_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
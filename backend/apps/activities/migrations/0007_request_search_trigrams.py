@@ -0,0 +1,44 @@
+# Триграммные индексы для поиска с опечатками (PostgreSQL, pg_trgm)
+#
+# Схема — снимок на момент миграции, без вызовов apps.activities.search.
+# На SQLite словарь триграмм строится в памяти процесса, схема не нужна.
+from django.db import migrations
+
+# Поля с триграммными индексами: (таблица, колонка)
+FUZZY_COLUMNS = (
+    ('activities_request', 'title'),
+    ('activities_request', 'location_name'),
+    ('activities_activity', 'name'),
+)
+
+
+def create_fuzzy_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, column in FUZZY_COLUMNS:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING GIN ({column} gin_trgm_ops)'
+            )
+
+
+def drop_fuzzy_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table, column in FUZZY_COLUMNS:
+            cursor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0006_request_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fuzzy_index, drop_fuzzy_index),
+    ]
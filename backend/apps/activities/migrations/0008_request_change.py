@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0007_request_search_trigrams'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_id', models.BigIntegerField(unique=True, verbose_name='Заявка')),
+                ('deleted', models.BooleanField(default=False, verbose_name='Удалена')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменена')),
+            ],
+            options={
+                'verbose_name': 'Изменение заявки',
+                'verbose_name_plural': 'Изменения заявок',
+                'indexes': [models.Index(fields=['changed_at'], name='activities__changed_affcf4_idx')],
+            },
+        ),
+    ]
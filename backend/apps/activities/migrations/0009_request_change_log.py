@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0008_request_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestchange',
+            name='seq',
+            field=models.BigIntegerField(blank=True, null=True, unique=True, verbose_name='Порядковый номер'),
+        ),
+        migrations.AlterField(
+            model_name='requestchange',
+            name='request_id',
+            field=models.BigIntegerField(db_index=True, verbose_name='Заявка'),
+        ),
+        # Уже записанные изменения получают seq = id: выданные токены остаются верными
+        migrations.RunSQL(
+            'UPDATE activities_requestchange SET seq = id',
+            migrations.RunSQL.noop,
+        ),
+    ]
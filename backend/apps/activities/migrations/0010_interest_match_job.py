@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0009_request_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestMatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('last_user_id', models.BigIntegerField(default=0, verbose_name='Последний получатель')),
+                ('notified', models.PositiveIntegerField(default=0, verbose_name='Уведомлено')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('claimed_until', models.DateTimeField(blank=True, null=True, verbose_name='Захвачена до')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interest_match_jobs', to='activities.request', verbose_name='Заявка')),
+            ],
+            options={
+                'verbose_name': 'Рассылка по интересам',
+                'verbose_name_plural': 'Рассылки по интересам',
+                'indexes': [models.Index(fields=['status', 'claimed_until'], name='activities__status_a04fb9_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
+from datetime import datetime
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from apps.accounts.models import User
 
 
@@ -81,6 +83,8 @@ class Request(models.Model):
     latitude = models.DecimalField(max_digits=10, decimal_places=6, verbose_name='Широта')
     longitude = models.DecimalField(max_digits=10, decimal_places=6, verbose_name='Долгота')
     address = models.TextField(blank=True, verbose_name='Адрес')
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False, db_index=True,
+                               verbose_name='Geohash координат')
     
     # Участники
     level = models.CharField(max_length=50, choices=[
@@ -103,6 +107,10 @@ class Request(models.Model):
     visibility = models.CharField(max_length=20, choices=VISIBILITY_CHOICES, default='public', verbose_name='Видимость')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name='Статус')
     
+    # Жизненный цикл: момент, когда активная/набранная заявка становится завершённой
+    transition_at = models.DateTimeField(null=True, blank=True, editable=False,
+                                         verbose_name='Следующая смена статуса')
+    
     # Метаданные
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлена')
@@ -115,10 +123,51 @@ class Request(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['status', 'request_type']),
             models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['status', 'transition_at']),
         ]
     
     def __str__(self):
         return f'{self.title} - {self.creator.username}'
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Координаты на момент загрузки: по ним сигналы сбрасывают кэш карты
+        # в прежнем тайле без повторного SELECT (None — координаты не загружались)
+        instance._loaded_position = (
+            (instance.latitude, instance.longitude)
+            if 'latitude' in instance.__dict__ and 'longitude' in instance.__dict__ else None
+        )
+        return instance
+    
+    @staticmethod
+    def compute_transition_at(date, time):
+        """Момент начала активности (в часовом поясе проекта)"""
+        if not date or not time:
+            return None
+        return timezone.make_aware(datetime.combine(date, time))
+    
+    def save(self, *args, **kwargs):
+        # Производные поля пересчитываются вместе с исходными
+        self.transition_at = self.compute_transition_at(self.date, self.time)
+        self.geohash = self.compute_geohash(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & {'date', 'time'}:
+                update_fields.add('transition_at')
+            if update_fields & {'latitude', 'longitude'}:
+                update_fields.add('geohash')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def compute_geohash(latitude, longitude):
+        """Geohash координат заявки (см. apps/activities/geo.py)"""
+        if latitude is None or longitude is None:
+            return ''
+        from .geo import encode_geohash
+        return encode_geohash(latitude, longitude)
 
 
 class Participation(models.Model):
@@ -181,3 +230,60 @@ class Review(models.Model):
     
     def __str__(self):
         return f'{self.reviewer.username} -> {self.reviewed_user.username} ({self.rating}/5)'
+
+
+class InterestMatchJob(models.Model):
+    """
+    Рассылка уведомления о новой заявке по интересам (см. apps/activities/matching.py).
+    Пишется в одной транзакции с заявкой; last_user_id — последний уведомлённый
+    получатель, поэтому прерванная рассылка продолжается с места остановки.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает'),
+        ('done', 'Выполнена'),
+        ('failed', 'Ошибка'),
+    ]
+    
+    request = models.ForeignKey(Request, on_delete=models.CASCADE, related_name='interest_match_jobs',
+                                verbose_name='Заявка')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    last_user_id = models.BigIntegerField(default=0, verbose_name='Последний получатель')
+    notified = models.PositiveIntegerField(default=0, verbose_name='Уведомлено')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    claimed_until = models.DateTimeField(null=True, blank=True, verbose_name='Захвачена до')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Завершена')
+    
+    class Meta:
+        verbose_name = 'Рассылка по интересам'
+        verbose_name_plural = 'Рассылки по интересам'
+        indexes = [
+            models.Index(fields=['status', 'claimed_until']),
+        ]
+    
+    def __str__(self):
+        return f'Заявка {self.request_id}: {self.get_status_display()}'
+
+
+class RequestChange(models.Model):
+    """
+    Журнал изменений заявок для дельта-синхронизации ленты (см. apps/activities/changes.py).
+    Только добавление: каждое изменение — новая строка. seq проставляется после
+    коммита, в порядке появления строк для читателей, и служит курсором клиента.
+    Удалённые заявки остаются строками с deleted=True (tombstone).
+    """
+    request_id = models.BigIntegerField(db_index=True, verbose_name='Заявка')
+    deleted = models.BooleanField(default=False, verbose_name='Удалена')
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name='Изменена')
+    seq = models.BigIntegerField(null=True, blank=True, unique=True, verbose_name='Порядковый номер')
+    
+    class Meta:
+        verbose_name = 'Изменение заявки'
+        verbose_name_plural = 'Изменения заявок'
+        indexes = [
+            models.Index(fields=['changed_at']),
+        ]
+    
+    def __str__(self):
+        return f'#{self.id}: заявка {self.request_id}{" (удалена)" if self.deleted else ""}'
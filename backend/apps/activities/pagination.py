@@ -0,0 +1,128 @@
+"""
+Курсорная (keyset) пагинация ленты заявок
+
+Лента упорядочена по (-interest_priority, -created_at, id). Курсор хранит
+ключ последней/первой строки страницы, поэтому страница N стоит столько же,
+сколько первая, и не "съезжает" при появлении новых заявок.
+"""
+import base64
+import json
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+FEED_ORDERING = ('-interest_priority', '-created_at', 'id')
+
+# Пределы целых в курсоре (bigint): большее число БД не примет
+MAX_CURSOR_INT = 2 ** 63 - 1
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или составлен не сервером"""
+
+
+def cursor_int(value):
+    """Целое из курсора; вне диапазона bigint — ValueError, а не ошибка БД"""
+    value = int(value)
+    if not -MAX_CURSOR_INT <= value <= MAX_CURSOR_INT:
+        raise ValueError(value)
+    return value
+
+
+def encode_cursor(obj, direction):
+    payload = {
+        'p': getattr(obj, 'interest_priority', 0),
+        'c': obj.created_at.isoformat(),
+        'i': obj.id,
+        'd': direction,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(payload['c'])
+        if created_at is None or payload['d'] not in ('next', 'prev'):
+            raise InvalidCursor(cursor)
+        return cursor_int(payload['p']), created_at, cursor_int(payload['i']), payload['d']
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def _after(priority, created_at, pk):
+    """Строки, идущие после ключа в порядке FEED_ORDERING"""
+    return (
+        Q(interest_priority__lt=priority) |
+        Q(interest_priority=priority, created_at__lt=created_at) |
+        Q(interest_priority=priority, created_at=created_at, id__gt=pk)
+    )
+
+
+def _before(priority, created_at, pk):
+    """Строки, идущие перед ключом в порядке FEED_ORDERING"""
+    return (
+        Q(interest_priority__gt=priority) |
+        Q(interest_priority=priority, created_at__gt=created_at) |
+        Q(interest_priority=priority, created_at=created_at, id__lt=pk)
+    )
+
+
+class FeedCursorPagination(BasePagination):
+    """
+    Параметры: limit (по умолчанию PAGE_SIZE, максимум max_limit) и cursor.
+    queryset должен быть аннотирован полем interest_priority.
+    """
+    limit_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    max_limit = 100
+
+    def get_limit(self, request):
+        default = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, default))
+        except (TypeError, ValueError):
+            limit = default
+        return max(1, min(limit, self.max_limit))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        direction = 'next'
+
+        if cursor:
+            priority, created_at, pk, direction = decode_cursor(cursor)
+            if direction == 'next':
+                queryset = queryset.filter(_after(priority, created_at, pk)).order_by(*FEED_ORDERING)
+            else:
+                queryset = queryset.filter(_before(priority, created_at, pk)).order_by(
+                    'interest_priority', 'created_at', '-id'
+                )
+        else:
+            queryset = queryset.order_by(*FEED_ORDERING)
+
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        if direction == 'prev':
+            rows.reverse()
+            has_next, has_prev = bool(rows), has_more
+        else:
+            has_next, has_prev = has_more, bool(cursor) and bool(rows)
+
+        self.next_cursor = encode_cursor(rows[-1], 'next') if rows and has_next else None
+        self.prev_cursor = encode_cursor(rows[0], 'prev') if rows and has_prev else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_cursor,
+            'prev': self.prev_cursor,
+            'limit': self.limit,
+            'results': data,
+        })
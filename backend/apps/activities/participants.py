@@ -0,0 +1,140 @@
+"""
+Счётчик участников заявки
+
+Request.current_participants и статусы 'active'/'filled' поддерживаются
+на записи атомарными условными UPDATE, поэтому пути чтения доверяют
+сохранённому значению и не пересчитывают участников.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import Request, Participation
+from .map_clusters import invalidate_requests
+from .changes import record_changes
+from config.cache import invalidate_tags, user_tag
+
+
+def refresh_fill_status(request_id):
+    """
+    Приводит статус заявки в соответствие со счётчиком:
+    'active' -> 'filled' при заполнении, 'filled' -> 'active' при освобождении мест
+    """
+    changed = Request.objects.filter(
+        pk=request_id,
+        status='active',
+        current_participants__gte=F('max_participants')
+    ).update(status='filled')
+    changed += Request.objects.filter(
+        pk=request_id,
+        status='filled',
+        current_participants__lt=F('max_participants')
+    ).update(status='active')
+    if changed:
+        # Набранные заявки не показываются на карте
+        transaction.on_commit(lambda: invalidate_requests([request_id]))
+        record_changes([request_id])
+    return changed
+
+
+def add_participant(req, user, message=''):
+    """
+    Занимает место в заявке и создаёт подтверждённое участие.
+    Возвращает Participation или None, если свободных мест нет.
+    Повторный отклик того же пользователя поднимает IntegrityError
+    (счётчик при этом откатывается вместе с транзакцией).
+    """
+    with transaction.atomic():
+        reserved = Request.objects.filter(
+            pk=req.pk,
+            current_participants__lt=F('max_participants')
+        ).update(current_participants=F('current_participants') + 1)
+        if not reserved:
+            return None
+
+        participation = Participation.objects.create(
+            request=req,
+            user=user,
+            message=message,
+            status='approved'
+        )
+        refresh_fill_status(req.pk)
+
+    req.refresh_from_db(fields=['current_participants', 'status'])
+    return participation
+
+
+def release_participant(participation, new_status):
+    """
+    Переводит подтверждённое участие в new_status и освобождает место.
+    Возвращает True, если участие действительно было подтверждённым.
+    """
+    with transaction.atomic():
+        changed = Participation.objects.filter(
+            pk=participation.pk,
+            status='approved'
+        ).update(status=new_status, updated_at=timezone.now())
+        if changed:
+            Request.objects.filter(
+                pk=participation.request_id,
+                current_participants__gt=0
+            ).update(current_participants=F('current_participants') - 1)
+            refresh_fill_status(participation.request_id)
+            # UPDATE не вызывает сигналы — сбрасываем общий кэш и пишем журнал явно
+            invalidate_tags(user_tag(participation.user_id))
+            record_changes([participation.request_id])
+
+    participation.status = new_status
+    return bool(changed)
+
+
+def reconcile_participant_counts(batch_size=1000):
+    """
+    Массово исправляет расхождения current_participants с фактическим
+    количеством подтверждённых участий и статусы 'active'/'filled'.
+    Возвращает (исправлено счётчиков, исправлено статусов).
+    """
+    fixed_counts = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Request.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'current_participants')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        actual = dict(
+            Participation.objects.filter(
+                request_id__in=[pk for pk, _ in batch],
+                status='approved'
+            ).values('request_id').annotate(count=Count('id')).values_list('request_id', 'count')
+        )
+        drifted = [
+            Request(pk=pk, current_participants=actual.get(pk, 0))
+            for pk, stored in batch
+            if stored != actual.get(pk, 0)
+        ]
+        if drifted:
+            Request.objects.bulk_update(drifted, ['current_participants'])
+            record_changes([req.pk for req in drifted])
+            fixed_counts += len(drifted)
+
+    to_filled = Request.objects.filter(
+        status='active',
+        current_participants__gte=F('max_participants')
+    )
+    to_active = Request.objects.filter(
+        status='filled',
+        current_participants__lt=F('max_participants')
+    )
+    with transaction.atomic():
+        record_changes([
+            *to_filled.values_list('id', flat=True),
+            *to_active.values_list('id', flat=True),
+        ])
+        fixed_statuses = to_filled.update(status='filled')
+        fixed_statuses += to_active.update(status='active')
+
+    return fixed_counts, fixed_statuses
@@ -0,0 +1,98 @@
+"""
+Логика поиска заявок
+
+Поиск идёт по полнотекстовому индексу (см. backends), результаты
+сортируются по релевантности. Если точных совпадений меньше
+FUZZY_MIN_RESULTS, запрос повторяется с учётом опечаток (триграммы).
+Индекс поддерживается сигналами и пересобирается командой rebuild_search_index.
+"""
+from ..lifecycle import not_expired
+from ..models import Request
+from .backends import get_backend
+
+# Размер страницы результатов по умолчанию и максимальный
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 100
+# При меньшем числе точных совпадений подключается поиск с опечатками
+FUZZY_MIN_RESULTS = 5
+
+
+def request_rows(queryset):
+    """Строки для индекса: (id, title, description, activity, location)"""
+    return queryset.values_list('id', 'title', 'description', 'activity__name', 'location_name')
+
+
+def index_requests(request_ids):
+    """Обновляет заявки в индексе (удалённые из него убираются)"""
+    backend = get_backend()
+    request_ids = list(request_ids)
+    rows = list(request_rows(Request.objects.filter(id__in=request_ids)))
+    backend.index_rows(rows)
+    missing = set(request_ids) - {row[0] for row in rows}
+    if missing:
+        backend.remove(missing)
+
+
+def remove_requests(request_ids):
+    get_backend().remove(list(request_ids))
+
+
+def rebuild_index(queryset=None, batch_size=1000, connection=None):
+    """
+    Полностью пересобирает индекс. queryset может быть queryset'ом
+    исторической модели (из миграции). Возвращает число проиндексированных заявок.
+    """
+    backend = get_backend(connection)
+    queryset = queryset if queryset is not None else Request.objects.all()
+    backend.clear(connection)
+    total = 0
+    last_id = 0
+    while True:
+        rows = list(request_rows(queryset.filter(id__gt=last_id).order_by('id'))[:batch_size])
+        if not rows:
+            break
+        backend.index_rows(rows, connection)
+        total += len(rows)
+        last_id = rows[-1][0]
+    return total
+
+
+def search_requests(query: str, filters: dict = None):
+    """
+    Полнотекстовый поиск заявок.
+    Возвращает queryset, упорядоченный по релевантности (без среза).
+    """
+    requests = Request.objects.select_related('creator', 'activity__category').filter(
+        not_expired(),
+        status='active',
+        visibility='public'
+    )
+
+    if filters:
+        # Применяем дополнительные фильтры
+        category_id = filters.get('category_id')
+        activity_id = filters.get('activity_id')
+        request_type = filters.get('request_type')
+        level = filters.get('level')
+        format_type = filters.get('format')
+
+        if category_id:
+            requests = requests.filter(activity__category_id=category_id)
+        if activity_id:
+            requests = requests.filter(activity_id=activity_id)
+        if request_type:
+            requests = requests.filter(request_type=request_type)
+        if level:
+            requests = requests.filter(level=level)
+        if format_type:
+            requests = requests.filter(format=format_type)
+
+    query = (query or '').strip()
+    if not query:
+        return requests.order_by('-created_at', '-id')
+
+    backend = get_backend()
+    results = backend.search(requests, query)
+    if results.count() < FUZZY_MIN_RESULTS:
+        results = backend.fuzzy_search(requests, query)
+    return results.order_by('-search_rank', '-created_at', '-id')
@@ -0,0 +1,285 @@
+"""
+Полнотекстовые индексы заявок
+
+Индексируются название, описание, название активности и место проведения.
+Все бэкенды реализуют один интерфейс:
+    create_table / drop_table — схема индекса (для rebuild_search_index;
+                                миграции 0006/0007 держат свой снимок SQL)
+    index_rows(rows)          — (id, title, description, activity, location)
+    remove(ids)               — удаление из индекса
+    search(queryset, query)   — queryset, отфильтрованный по запросу,
+                                с аннотацией search_rank (больше — релевантнее)
+    fuzzy_search(queryset, query) — то же с учётом опечаток (триграммы)
+    create_fuzzy_index / drop_fuzzy_index — схема для поиска с опечатками
+
+SQLiteFTSBackend — FTS5, в индекс пишутся основы слов (стеммер Snowball),
+PostgresBackend  — tsvector с конфигурацией 'russian' и GIN-индексом,
+                   опечатки — pg_trgm,
+LikeBackend      — icontains для остальных СУБД.
+"""
+from django.db import connection as default_connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from . import trigrams
+from .stemmer import stem, stem_text, tokenize
+
+REQUEST_TABLE = 'activities_request'
+ACTIVITY_TABLE = 'activities_activity'
+
+# Веса полей: название, описание, активность, место
+FIELD_WEIGHTS = (10.0, 1.0, 5.0, 3.0)
+
+
+def _query_terms(query):
+    return [stem(token) for token in tokenize(query)]
+
+
+def no_results(queryset):
+    """Пустой результат с той же аннотацией search_rank, что и у найденного"""
+    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class LikeBackend:
+    """Поиск подстрокой без индекса"""
+    vendor = None
+
+    def create_table(self, connection):
+        pass
+
+    def drop_table(self, connection):
+        pass
+
+    def index_rows(self, rows, connection=None):
+        pass
+
+    def remove(self, ids, connection=None):
+        pass
+
+    def clear(self, connection=None):
+        pass
+
+    def create_fuzzy_index(self, connection):
+        pass
+
+    def drop_fuzzy_index(self, connection):
+        pass
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(activity__name__icontains=query) |
+            Q(location_name__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def fuzzy_search(self, queryset, query):
+        # Поиска с опечатками нет: остаются точные совпадения
+        return self.search(queryset, query)
+
+
+class SQLiteFTSBackend(LikeBackend):
+    """SQLite FTS5: rowid записи индекса равен id заявки"""
+    vendor = 'sqlite'
+    table = 'activities_request_fts'
+
+    def create_table(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5('
+                f"title, description, activity, location, tokenize='unicode61', prefix='2 3')"
+            )
+
+    def drop_table(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index_rows(self, rows, connection=None):
+        connection = connection or default_connection
+        rows = list(rows)
+        trigrams.add_texts(text for row in rows for text in (row[1], row[3], row[4]))
+        rows = [
+            (pk, stem_text(title), stem_text(description), stem_text(activity), stem_text(location))
+            for pk, title, description, activity, location in rows
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, description, activity, location) '
+                f'VALUES (%s, %s, %s, %s, %s)',
+                rows
+            )
+
+    def remove(self, ids, connection=None):
+        connection = connection or default_connection
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in ids])
+
+    def clear(self, connection=None):
+        connection = connection or default_connection
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def match_expression(self, query):
+        """Выражение MATCH: все основы слов запроса как префиксы"""
+        return ' '.join(f'"{term}"*' for term in _query_terms(query))
+
+    def fuzzy_match_expression(self, query):
+        """Выражение MATCH, где каждое слово заменено на альтернативы из словаря"""
+        groups = []
+        for alternatives in trigrams.expand_query(query):
+            groups.append('(' + ' OR '.join(f'"{term}"*' for term in alternatives) + ')')
+        return ' AND '.join(groups)
+
+    def search(self, queryset, query):
+        return self._match(queryset, self.match_expression(query))
+
+    def fuzzy_search(self, queryset, query):
+        return self._match(queryset, self.fuzzy_match_expression(query))
+
+    def _match(self, queryset, match):
+        if not match:
+            return no_results(queryset)
+        weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS)
+        # bm25 отрицателен и тем меньше, чем документ релевантнее
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({self.table}, {weights}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = {REQUEST_TABLE}.id',
+            [match],
+            output_field=FloatField()
+        ))
+
+
+class PostgresBackend(LikeBackend):
+    """PostgreSQL: отдельная таблица с tsvector и GIN-индексом"""
+    vendor = 'postgresql'
+    table = 'activities_request_search'
+    config = 'russian'
+
+    def create_table(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                f'request_id bigint PRIMARY KEY REFERENCES {REQUEST_TABLE} (id) ON DELETE CASCADE, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)'
+            )
+
+    def drop_table(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index_rows(self, rows, connection=None):
+        connection = connection or default_connection
+        rows = list(rows)
+        if not rows:
+            return
+        # Веса A-D в порядке убывания: название, активность, место, описание
+        document = (
+            f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'D') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'C')"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (request_id, document) VALUES (%s, {document}) '
+                f'ON CONFLICT (request_id) DO UPDATE SET document = EXCLUDED.document',
+                [(pk, title or '', description or '', activity or '', location or '')
+                 for pk, title, description, activity, location in rows]
+            )
+
+    def remove(self, ids, connection=None):
+        connection = connection or default_connection
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE request_id = ANY(%s)', [list(ids)])
+
+    def clear(self, connection=None):
+        connection = connection or default_connection
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+
+    def tsquery(self, query):
+        """Все слова запроса как префиксы: 'футб & парк' -> 'футб:* & парк:*'"""
+        return ' & '.join(f'{token}:*' for token in tokenize(query))
+
+    def search(self, queryset, query):
+        tsquery = self.tsquery(query)
+        if not tsquery:
+            return no_results(queryset)
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT request_id FROM {self.table} WHERE document @@ to_tsquery('{self.config}', %s)",
+                [tsquery]
+            )
+        ).annotate(search_rank=RawSQL(
+            f"SELECT ts_rank_cd(document, to_tsquery('{self.config}', %s)) FROM {self.table} "
+            f'WHERE request_id = {REQUEST_TABLE}.id',
+            [tsquery],
+            output_field=FloatField()
+        ))
+
+    # Поля с триграммными индексами: (таблица, колонка)
+    fuzzy_columns = ((REQUEST_TABLE, 'title'), (REQUEST_TABLE, 'location_name'), (ACTIVITY_TABLE, 'name'))
+
+    def create_fuzzy_index(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for table, column in self.fuzzy_columns:
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING GIN ({column} gin_trgm_ops)'
+                )
+
+    def drop_fuzzy_index(self, connection):
+        with connection.cursor() as cursor:
+            for table, column in self.fuzzy_columns:
+                cursor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+
+    def fuzzy_search(self, queryset, query):
+        query = ' '.join(tokenize(query))
+        if not query:
+            return no_results(queryset)
+        # <% — word_similarity не ниже pg_trgm.word_similarity_threshold, использует GIN-индекс;
+        # UNION вместо OR, чтобы каждое условие шло по своему индексу
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT id FROM {REQUEST_TABLE} WHERE %s <%% title '
+            f'UNION SELECT id FROM {REQUEST_TABLE} WHERE %s <%% location_name '
+            f'UNION SELECT r.id FROM {REQUEST_TABLE} r JOIN {ACTIVITY_TABLE} a ON a.id = r.activity_id '
+            f'WHERE %s <%% a.name',
+            [query, query, query]
+        )).annotate(search_rank=RawSQL(
+            f'GREATEST(word_similarity(%s, {REQUEST_TABLE}.title), '
+            f'word_similarity(%s, {REQUEST_TABLE}.location_name), '
+            f'(SELECT word_similarity(%s, name) FROM {ACTIVITY_TABLE} '
+            f'WHERE id = {REQUEST_TABLE}.activity_id))',
+            [query, query, query],
+            output_field=FloatField()
+        ))
+
+
+_BACKENDS = {}
+
+
+def get_backend(connection=None):
+    """Бэкенд полнотекстового поиска для текущей СУБД"""
+    connection = connection or default_connection
+    if connection.vendor not in _BACKENDS:
+        if connection.vendor == 'postgresql':
+            backend = PostgresBackend()
+        elif connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+            backend = SQLiteFTSBackend()
+        else:
+            backend = LikeBackend()
+        _BACKENDS[connection.vendor] = backend
+    return _BACKENDS[connection.vendor]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
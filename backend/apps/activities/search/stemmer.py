@@ -0,0 +1,125 @@
+"""
+Нормализация текста для поиска: токенизация и стемминг русских слов
+
+Стеммер — реализация алгоритма Snowball для русского языка
+(https://snowballstem.org/algorithms/russian/stemmer.html) без внешних зависимостей.
+Одинаково применяется к индексируемому тексту и к запросу.
+"""
+import re
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_VOWELS = set('аеиоуыэюя')
+
+_PERFECTIVE_GERUND_1 = ('вшись', 'вши', 'в')
+_PERFECTIVE_GERUND_2 = ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв')
+_ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому',
+    'ее', 'ие', 'ые', 'ое', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+)
+_PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+_PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+_REFLEXIVE = ('ся', 'сь')
+_VERB_1 = ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно')
+_VERB_2 = (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+    'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+)
+_NOUN = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях',
+    'ев', 'ов', 'ие', 'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ию', 'ью', 'ия', 'ья',
+    'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+)
+_SUPERLATIVE = ('ейше', 'ейш')
+_DERIVATIONAL = ('ость', 'ост')
+
+
+def _regions(word):
+    """Начала областей RV и R2"""
+    rv = len(word)
+    for i, ch in enumerate(word):
+        if ch in _VOWELS:
+            rv = i + 1
+            break
+
+    def after_non_vowel_following_vowel(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = after_non_vowel_following_vowel(0)
+    r2 = after_non_vowel_following_vowel(r1)
+    return rv, r2
+
+
+def _strip(word, start, group_1=(), group_2=()):
+    """
+    Ищет самое длинное окончание из group_1 + group_2 в области [start:].
+    Окончания group_1 должны идти после 'а' или 'я'.
+    Возвращает слово без окончания или None.
+    """
+    best, best_group = '', 0
+    for group_no, group in ((1, group_1), (2, group_2)):
+        for ending in group:
+            if len(ending) > len(best) and word.endswith(ending) and len(word) - len(ending) >= start:
+                best, best_group = ending, group_no
+    if not best:
+        return None
+    stem = word[:-len(best)]
+    if best_group == 1 and (len(stem) <= start or stem[-1] not in 'ая'):
+        return None
+    return stem
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball"""
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    if rv >= len(word):
+        return word
+
+    # Шаг 1
+    result = _strip(word, rv, _PERFECTIVE_GERUND_1, _PERFECTIVE_GERUND_2)
+    if result is not None:
+        word = result
+    else:
+        word = _strip(word, rv, group_2=_REFLEXIVE) or word
+        result = _strip(word, rv, group_2=_ADJECTIVE)
+        if result is not None:
+            word = _strip(result, rv, _PARTICIPLE_1, _PARTICIPLE_2) or result
+        else:
+            result = _strip(word, rv, _VERB_1, _VERB_2)
+            if result is None:
+                result = _strip(word, rv, group_2=_NOUN)
+            if result is not None:
+                word = result
+
+    # Шаг 2
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3
+    word = _strip(word, max(rv, r2), group_2=_DERIVATIONAL) or word
+
+    # Шаг 4
+    result = _strip(word, rv, group_2=_SUPERLATIVE)
+    if result is not None:
+        word = result
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        word = word[:-1]
+    elif result is None and word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре (ё -> е)"""
+    if not text:
+        return []
+    return [token.replace('ё', 'е') for token in _WORD_RE.findall(text.lower())]
+
+
+def stem_text(text):
+    """Текст из основ слов — то, что попадает в полнотекстовый индекс"""
+    return ' '.join(stem(token) for token in tokenize(text))
@@ -0,0 +1,168 @@
+"""
+Автодополнение для строки поиска
+
+Индекс — отсортированный массив ключей (нормализованное название, начиная
+с каждого слова), поиск префикса — двоичный поиск (bisect) без обращения к БД.
+В индекс входят активные активности, категории и популярные места проведения.
+
+Строится при старте процесса (warm_up из asgi/wsgi) или при первом запросе,
+обновляется сигналами при изменении справочника и создании заявок
+и перестраивается раз в SUGGEST_TTL, чтобы подхватить изменения других процессов.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+from django.db import DatabaseError
+from django.db.models import Count
+from .stemmer import tokenize
+
+# Порядок типов в выдаче
+KIND_ORDER = {'activity': 0, 'category': 1, 'location': 2}
+# Сколько мест проведения держать в индексе и с какого числа заявок место «популярно»
+MAX_LOCATIONS = 500
+LOCATION_MIN_COUNT = 2
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+# Сколько совпадений по префиксу просматривать перед сортировкой
+MAX_CANDIDATES = 200
+SUGGEST_TTL = 600
+
+
+def normalize(text):
+    return ' '.join(tokenize(text))
+
+
+class SuggestIndex:
+    """Отсортированный массив (ключ, запись) с поиском по префиксу"""
+
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+        self.items = {}
+        self.location_counts = Counter()
+
+    def add(self, kind, key, name, weight=0, **extra):
+        """Добавляет (или заменяет) запись; key уникален в пределах kind"""
+        self.remove(kind, key)
+        item = {'type': kind, 'name': name, **extra}
+        self.items[(kind, key)] = (item, weight)
+        words = normalize(name).split(' ')
+        for i in range(len(words)):
+            suffix = ' '.join(words[i:])
+            if not suffix:
+                continue
+            # Совпадение с начала названия ранжируется выше совпадения со второго слова
+            entry = (i > 0, KIND_ORDER[kind], -weight, name, kind, key)
+            position = bisect.bisect_left(self.keys, suffix)
+            self.keys.insert(position, suffix)
+            self.entries.insert(position, entry)
+
+    def remove(self, kind, key):
+        if (kind, key) not in self.items:
+            return
+        del self.items[(kind, key)]
+        kept = [(k, e) for k, e in zip(self.keys, self.entries) if (e[4], e[5]) != (kind, key)]
+        self.keys = [k for k, _ in kept]
+        self.entries = [e for _, e in kept]
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self.keys, prefix)
+        candidates = []
+        for position in range(start, min(start + MAX_CANDIDATES, len(self.keys))):
+            if not self.keys[position].startswith(prefix):
+                break
+            candidates.append(self.entries[position])
+        candidates.sort()
+
+        seen, result = set(), []
+        for entry in candidates:
+            kind, key = entry[4], entry[5]
+            if (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+            result.append(self.items[(kind, key)][0])
+            if len(result) >= limit:
+                break
+        return result
+
+    def add_activity(self, activity):
+        if not activity.is_active:
+            self.remove('activity', activity.pk)
+            return
+        self.add('activity', activity.pk, activity.name, id=activity.pk,
+                 category_id=activity.category_id, icon=activity.icon)
+
+    def add_category(self, category):
+        self.add('category', category.pk, category.name, id=category.pk, icon=category.icon)
+
+    def count_location(self, location_name):
+        """Учитывает новую заявку в месте проведения"""
+        key = normalize(location_name)
+        if not key:
+            return
+        self.location_counts[key] += 1
+        count = self.location_counts[key]
+        if count >= LOCATION_MIN_COUNT:
+            self.add('location', key, location_name, weight=count)
+
+
+def build_index():
+    from ..models import Activity, Category, Request
+
+    index = SuggestIndex()
+    for activity in Activity.objects.filter(is_active=True):
+        index.add_activity(activity)
+    for category in Category.objects.all():
+        index.add_category(category)
+
+    locations = (
+        Request.objects.exclude(location_name='')
+        .values('location_name')
+        .annotate(count=Count('id'))
+        .order_by('-count')
+    )
+    for row in locations[:MAX_LOCATIONS]:
+        key = normalize(row['location_name'])
+        index.location_counts[key] += row['count']
+        if index.location_counts[key] >= LOCATION_MIN_COUNT:
+            index.add('location', key, row['location_name'], weight=index.location_counts[key])
+    return index
+
+
+_index = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index, _built_at
+    with _lock:
+        if _index is None or time.monotonic() - _built_at > SUGGEST_TTL:
+            _index = build_index()
+            _built_at = time.monotonic()
+        return _index
+
+
+def warm_up():
+    """Строит индекс при старте процесса (если база ещё не готова — при первом запросе)"""
+    try:
+        get_index()
+    except DatabaseError:
+        pass
+
+
+def suggest(prefix, limit=DEFAULT_LIMIT):
+    index = get_index()
+    with _lock:
+        return index.suggest(prefix, limit)
+
+
+def update(method, *args):
+    """Применяет изменение к уже построенному индексу"""
+    with _lock:
+        if _index is not None:
+            getattr(_index, method)(*args)
@@ -0,0 +1,130 @@
+"""
+Триграммный индекс словаря для поиска с опечатками (SQLite)
+
+Словарь — основы слов из названий заявок, мест проведения и активностей.
+Для слова запроса подбираются похожие основы по коэффициенту Жаккара
+множеств триграмм (как similarity() в pg_trgm), после чего запрос
+выполняется по полнотекстовому индексу уже с исправленными словами.
+
+Индекс живёт в памяти процесса: строится лениво при первом запросе,
+дополняется при индексации заявок и перестраивается раз в VOCABULARY_TTL
+(чтобы подхватить слова, добавленные другими процессами).
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from .stemmer import stem, tokenize
+
+# Минимальная похожесть (порог по умолчанию в pg_trgm)
+SIMILARITY_THRESHOLD = 0.3
+# Сколько похожих основ брать на одно слово запроса
+MAX_SUGGESTIONS = 5
+VOCABULARY_TTL = 600
+
+
+def trigrams(word):
+    """Триграммы слова с дополнением пробелами, как в pg_trgm"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb)
+
+
+def _vocabulary_words(text):
+    """Основы слов текста, пригодные для словаря (без чисел и коротких слов)"""
+    return {stem(token) for token in tokenize(text) if len(token) >= 3 and token.isalpha()}
+
+
+class TrigramIndex:
+    """Инвертированный индекс триграмма -> основы слов"""
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.words = {}
+
+    def add(self, word):
+        if word in self.words:
+            return
+        grams = trigrams(word)
+        self.words[word] = len(grams)
+        for gram in grams:
+            self.postings[gram].add(word)
+
+    def add_text(self, text):
+        for word in _vocabulary_words(text):
+            self.add(word)
+
+    def similar(self, word, limit=MAX_SUGGESTIONS, threshold=SIMILARITY_THRESHOLD):
+        """[(основа, похожесть)] по убыванию похожести"""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        scored = []
+        for candidate, common in shared.items():
+            score = common / (len(grams) + self.words[candidate] - common)
+            if score >= threshold:
+                scored.append((candidate, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+
+_index = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def build_index():
+    """Строит словарь по видимым заявкам и всем активностям"""
+    from ..lifecycle import not_expired
+    from ..models import Activity, Request
+
+    index = TrigramIndex()
+    rows = Request.objects.filter(
+        not_expired(),
+        status__in=['active', 'filled'],
+        visibility='public'
+    ).values_list('title', 'location_name').iterator(chunk_size=2000)
+    for title, location in rows:
+        index.add_text(title)
+        index.add_text(location)
+    for name in Activity.objects.values_list('name', flat=True):
+        index.add_text(name)
+    return index
+
+
+def get_index():
+    global _index, _built_at
+    with _lock:
+        if _index is None or time.monotonic() - _built_at > VOCABULARY_TTL:
+            _index = build_index()
+            _built_at = time.monotonic()
+        return _index
+
+
+def add_texts(texts):
+    """Пополняет уже построенный словарь (непостроенный соберётся целиком при первом запросе)"""
+    with _lock:
+        if _index is None:
+            return
+        for text in texts:
+            _index.add_text(text)
+
+
+def expand_query(query):
+    """
+    Для каждого слова запроса — список основ: собственная основа
+    и похожие основы из словаря. Возвращает [[основа, ...], ...].
+    """
+    index = get_index()
+    expanded = []
+    for token in tokenize(query):
+        word = stem(token)
+        alternatives = [word]
+        if token.isalpha() and len(token) >= 3:
+            alternatives += [candidate for candidate, _ in index.similar(word) if candidate != word]
+        expanded.append(alternatives)
+    return expanded
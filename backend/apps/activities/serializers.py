@@ -1,19 +1,80 @@
 """
 Serializers для activities приложения
 """
+from django.db.models import Count, QuerySet, prefetch_related_objects
 from rest_framework import serializers
+from config.serializers import SideloadMixin, SparseFieldsetMixin, normalized_context, sparse_fieldset
 from .models import Category, Activity, Request, Participation, Favorite, Review
-from apps.accounts.serializers import UserSerializer
+from apps.accounts.serializers import UserSerializer, UserBriefSerializer
 
+# Связи, которые нужны RequestSerializer при сериализации списка
+REQUEST_LIST_RELATED = ['creator', 'activity__category']
+# Поля, для которых RequestListSerializer загружает флаги пачкой
+REQUEST_FLAG_FIELDS = {'participations_count', 'is_favorite', 'is_participating'}
 
-class CategorySerializer(serializers.ModelSerializer):
+
+def prefetch_request_flags(requests, context):
+    """
+    Загружает флаги текущего пользователя для списка заявок фиксированным
+    числом запросов и кладёт их в context['request_flags']:
+    избранное и подтверждённые участия — множества id,
+    количество откликов (pending + approved) — один GROUP BY
+    """
+    ids = [req.id for req in requests]
+    flags = {
+        'ids': set(ids),
+        'favorite_ids': set(),
+        'participating_ids': set(),
+        'participations_counts': {},
+    }
+    if ids:
+        flags['participations_counts'] = dict(
+            Participation.objects.filter(
+                request_id__in=ids,
+                status__in=['pending', 'approved']
+            ).values('request_id').annotate(count=Count('id')).values_list('request_id', 'count')
+        )
+        request = context.get('request')
+        if request and request.user and request.user.is_authenticated:
+            flags['favorite_ids'] = set(
+                Favorite.objects.filter(
+                    user=request.user,
+                    request_id__in=ids
+                ).values_list('request_id', flat=True)
+            )
+            flags['participating_ids'] = set(
+                Participation.objects.filter(
+                    user=request.user,
+                    request_id__in=ids,
+                    status='approved'
+                ).values_list('request_id', flat=True)
+            )
+    context['request_flags'] = flags
+    return flags
+
+
+class RequestListSerializer(serializers.ListSerializer):
+    """Сериализация списка заявок за фиксированное число запросов"""
+    
+    def to_representation(self, data):
+        if isinstance(data, QuerySet):
+            data = data.select_related(*REQUEST_LIST_RELATED)
+        items = list(data.all() if hasattr(data, 'all') else data)
+        # Для уже загруженных списков догружаем связи пачкой
+        prefetch_related_objects(items, *REQUEST_LIST_RELATED)
+        if REQUEST_FLAG_FIELDS & set(self.child.fields):
+            prefetch_request_flags(items, self.context)
+        return [self.child.to_representation(item) for item in items]
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'icon', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class ActivitySerializer(serializers.ModelSerializer):
+class ActivitySerializer(SideloadMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     category_id = serializers.IntegerField(write_only=True, required=False)
     
@@ -22,9 +83,65 @@ class ActivitySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'category', 'category_id', 
                  'description', 'icon', 'is_active', 'created_at']
         read_only_fields = ['id', 'created_at']
+    
+    sideload_fields = {'category': 'categories'}
+
+
+class ActivityBriefSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Активность в карточках списков"""
+    class Meta:
+        model = Activity
+        fields = ['id', 'name', 'icon', 'category_id']
+
+
+class RequestFlagsMixin:
+    """Флаги текущего пользователя и расстояние — общие для полной заявки и карточки"""
+    
+    def _prefetched_flags(self, obj):
+        """Флаги, загруженные RequestListSerializer, если заявка была в списке"""
+        flags = self.context.get('request_flags')
+        if flags and obj.id in flags['ids']:
+            return flags
+        return None
+    
+    def get_participations_count(self, obj):
+        """Количество всех откликов (pending + approved)"""
+        flags = self._prefetched_flags(obj)
+        if flags is not None:
+            return flags['participations_counts'].get(obj.id, 0)
+        return obj.participations.filter(status__in=['pending', 'approved']).count()
+    
+    def get_is_favorite(self, obj):
+        """Проверяет, находится ли заявка в избранном у текущего пользователя"""
+        flags = self._prefetched_flags(obj)
+        if flags is not None:
+            return obj.id in flags['favorite_ids']
+        request = self.context.get('request')
+        if request and request.user and request.user.is_authenticated:
+            return Favorite.objects.filter(user=request.user, request=obj).exists()
+        return False
+    
+    def get_is_participating(self, obj):
+        """Проверяет, участвует ли текущий пользователь в заявке (со статусом approved)"""
+        flags = self._prefetched_flags(obj)
+        if flags is not None:
+            return obj.id in flags['participating_ids']
+        request = self.context.get('request')
+        if request and request.user and request.user.is_authenticated:
+            return obj.participations.filter(user=request.user, status='approved').exists()
+        return False
+    
+    def to_representation(self, instance):
+        """Добавляет расстояние до точки поиска, если queryset был аннотирован distance_km"""
+        data = super().to_representation(instance)
+        distance = getattr(instance, 'distance_km', None)
+        sparse_fields = getattr(self, '_sparse_fields', None)
+        if distance is not None and (sparse_fields is None or 'distance_km' in sparse_fields):
+            data['distance_km'] = round(distance, 3)
+        return data
 
 
-class RequestSerializer(serializers.ModelSerializer):
+class RequestSerializer(SideloadMixin, SparseFieldsetMixin, RequestFlagsMixin, serializers.ModelSerializer):
     creator = UserSerializer(read_only=True)
     activity = ActivitySerializer(read_only=True)
     activity_id = serializers.IntegerField(write_only=True)
@@ -48,25 +165,9 @@ class RequestSerializer(serializers.ModelSerializer):
                  'visibility', 'status', 'is_favorite', 'is_participating', 'created_at', 'updated_at']
         read_only_fields = ['id', 'creator', 'current_participants', 
                            'created_at', 'updated_at']
+        list_serializer_class = RequestListSerializer
     
-    def get_participations_count(self, obj):
-        """Количество всех откликов (pending + approved)"""
-        return obj.participations.filter(status__in=['pending', 'approved']).count()
-    
-    def get_is_favorite(self, obj):
-        """Проверяет, находится ли заявка в избранном у текущего пользователя"""
-        request = self.context.get('request')
-        if request and request.user and request.user.is_authenticated:
-            from .models import Favorite
-            return Favorite.objects.filter(user=request.user, request=obj).exists()
-        return False
-    
-    def get_is_participating(self, obj):
-        """Проверяет, участвует ли текущий пользователь в заявке (со статусом approved)"""
-        request = self.context.get('request')
-        if request and request.user and request.user.is_authenticated:
-            return obj.participations.filter(user=request.user, status='approved').exists()
-        return False
+    sideload_fields = {'creator': 'users', 'activity': 'activities'}
     
     def to_internal_value(self, data):
         """Преобразует строковые значения координат в Decimal и обрабатывает пустые значения"""
@@ -149,7 +250,60 @@ class RequestSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class ParticipationSerializer(serializers.ModelSerializer):
+class RequestCardSerializer(SideloadMixin, SparseFieldsetMixin, RequestFlagsMixin, serializers.ModelSerializer):
+    """
+    Компактная карточка заявки для списков (?view=card): краткие автор
+    и активность, первое фото и начало описания вместо полных полей.
+    expand=creator,activity возвращает их полное представление.
+    """
+    creator = UserBriefSerializer(read_only=True)
+    activity = ActivityBriefSerializer(read_only=True)
+    latitude = serializers.DecimalField(max_digits=10, decimal_places=6, coerce_to_string=False, read_only=True)
+    longitude = serializers.DecimalField(max_digits=10, decimal_places=6, coerce_to_string=False, read_only=True)
+    photo = serializers.SerializerMethodField()
+    description_preview = serializers.SerializerMethodField()
+    is_favorite = serializers.SerializerMethodField()
+    is_participating = serializers.SerializerMethodField()
+    
+    expandable_fields = {
+        'creator': lambda: UserSerializer(read_only=True),
+        'activity': lambda: ActivitySerializer(read_only=True),
+    }
+    sideload_fields = {'creator': 'users', 'activity': 'activities'}
+    
+    # Длина начала описания в карточке
+    PREVIEW_LENGTH = 100
+    
+    class Meta:
+        model = Request
+        fields = ['id', 'creator', 'request_type', 'activity', 'format', 'date', 'time',
+                 'location_name', 'address', 'latitude', 'longitude', 'level',
+                 'max_participants', 'current_participants', 'title', 'description_preview',
+                 'photo', 'status', 'is_favorite', 'is_participating']
+        read_only_fields = fields
+        list_serializer_class = RequestListSerializer
+    
+    def get_photo(self, obj):
+        """Первое фото заявки"""
+        return obj.photos[0] if obj.photos else None
+    
+    def get_description_preview(self, obj):
+        if len(obj.description) <= self.PREVIEW_LENGTH:
+            return obj.description
+        return obj.description[:self.PREVIEW_LENGTH] + '...'
+
+
+def request_list_serializer(request, instance, **kwargs):
+    """
+    Сериализатор списка заявок по параметрам запроса:
+    ?view=card — компактные карточки, fields=/expand= — выборочные поля,
+    normalized=1 — связи в блоке included (ответ собирать через normalized_data)
+    """
+    serializer_class = RequestCardSerializer if request.query_params.get('view') == 'card' else RequestSerializer
+    return serializer_class(instance, many=True, context=normalized_context(request), **sparse_fieldset(request), **kwargs)
+
+
+class ParticipationSerializer(SideloadMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_profile = serializers.SerializerMethodField()
     request = RequestSerializer(read_only=True)
@@ -161,6 +315,8 @@ class ParticipationSerializer(serializers.ModelSerializer):
                  'message', 'created_at', 'updated_at']
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
     
+    sideload_fields = {'user': 'users', 'request': 'requests'}
+    
     def get_user_profile(self, obj):
         """Возвращает профиль пользователя"""
         try:
@@ -170,7 +326,7 @@ class ParticipationSerializer(serializers.ModelSerializer):
             return None
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(SideloadMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     request = RequestSerializer(read_only=True)
     request_id = serializers.IntegerField(write_only=True, required=False)
@@ -179,6 +335,8 @@ class FavoriteSerializer(serializers.ModelSerializer):
         model = Favorite
         fields = ['id', 'user', 'request', 'request_id', 'created_at']
         read_only_fields = ['id', 'user', 'created_at']
+    
+    sideload_fields = {'user': 'users', 'request': 'requests'}
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -1,10 +1,16 @@
 """
 Сигналы для activities приложения
 """
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Review
+from .models import Activity, Category, Request, Review, Participation, Favorite
+from .map_clusters import invalidate_point
+from .catalog import bump_version as bump_catalog_version
+from .changes import record_changes
+from .search import index_requests, remove_requests, suggest
 from apps.accounts.models import Profile
+from config.cache import invalidate_tags, user_tag
 from django.db.models import Avg
 from decimal import Decimal
 
@@ -46,3 +52,134 @@ def review_saved(sender, instance, created, **kwargs):
 def review_deleted(sender, instance, **kwargs):
     """Пересчитывает рейтинг при удалении отзыва"""
     recalculate_user_rating(instance.reviewed_user)
+
+
+@receiver(pre_save, sender=Request)
+def remember_request_position(sender, instance, **kwargs):
+    """Запоминает прежние координаты, чтобы сбросить кэш карты и в старом тайле"""
+    instance._previous_position = getattr(instance, '_loaded_position', None)
+    if instance._previous_position is None and instance.pk:
+        # Экземпляр создан не из выборки или без координат — узнаём их в БД
+        instance._previous_position = Request.objects.filter(pk=instance.pk).values_list(
+            'latitude', 'longitude'
+        ).first()
+
+
+@receiver(post_save, sender=Request)
+def request_saved_map(sender, instance, **kwargs):
+    """Сбрасывает кэш кластеров карты для тайлов заявки после коммита"""
+    points = {(instance.latitude, instance.longitude)}
+    previous = getattr(instance, '_previous_position', None)
+    if previous:
+        points.add(tuple(previous))
+    instance._loaded_position = (instance.latitude, instance.longitude)
+    
+    def invalidate():
+        for point in points:
+            invalidate_point(*point)
+    
+    # До коммита параллельный запрос тайла пересобрал бы его из старых данных
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_delete, sender=Request)
+def request_deleted_map(sender, instance, **kwargs):
+    """Сбрасывает кэш кластеров карты при удалении заявки после коммита"""
+    latitude, longitude = instance.latitude, instance.longitude
+    transaction.on_commit(lambda: invalidate_point(latitude, longitude))
+
+
+@receiver(post_save, sender=Request)
+def request_saved_search(sender, instance, **kwargs):
+    """Обновляет заявку в поисковом индексе после коммита"""
+    transaction.on_commit(lambda: index_requests([instance.pk]))
+
+
+@receiver(post_delete, sender=Request)
+def request_deleted_search(sender, instance, **kwargs):
+    """Убирает заявку из поискового индекса"""
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_requests([pk]))
+
+
+@receiver(post_save, sender=Activity)
+def activity_saved_search(sender, instance, created, **kwargs):
+    """Название активности входит в индекс — переиндексируем её заявки"""
+    if created:
+        return
+    request_ids = list(Request.objects.filter(activity=instance).values_list('id', flat=True))
+    for start in range(0, len(request_ids), 500):
+        batch = request_ids[start:start + 500]
+        transaction.on_commit(lambda batch=batch: index_requests(batch))
+
+
+@receiver(post_save, sender=Activity)
+def activity_saved_suggest(sender, instance, **kwargs):
+    """Обновляет активность в индексе автодополнения"""
+    suggest.update('add_activity', instance)
+
+
+@receiver(post_delete, sender=Activity)
+def activity_deleted_suggest(sender, instance, **kwargs):
+    suggest.update('remove', 'activity', instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def category_saved_suggest(sender, instance, **kwargs):
+    """Обновляет категорию в индексе автодополнения"""
+    suggest.update('add_category', instance)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted_suggest(sender, instance, **kwargs):
+    suggest.update('remove', 'category', instance.pk)
+
+
+@receiver(post_save, sender=Request)
+def request_created_suggest(sender, instance, created, **kwargs):
+    """Новая заявка повышает популярность места проведения"""
+    if created:
+        suggest.update('count_location', instance.location_name)
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, **kwargs):
+    """Сбрасывает кэш справочника во всех процессах после коммита"""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Request)
+@receiver(post_delete, sender=Request)
+def request_changed_cache(sender, instance, **kwargs):
+    """Сбрасывает общий кэш, помеченный автором заявки"""
+    invalidate_tags(user_tag(instance.creator_id))
+
+
+@receiver(post_save, sender=Participation)
+@receiver(post_delete, sender=Participation)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def participation_changed_cache(sender, instance, **kwargs):
+    """Отклики и избранное меняют данные пользователя"""
+    invalidate_tags(user_tag(instance.user_id))
+
+
+@receiver(post_save, sender=Request)
+def request_saved_changes(sender, instance, **kwargs):
+    """Журнал дельта-синхронизации ленты"""
+    record_changes([instance.pk])
+
+
+@receiver(post_delete, sender=Request)
+def request_deleted_changes(sender, instance, **kwargs):
+    record_changes([instance.pk], deleted=True)
+
+
+@receiver(post_save, sender=Participation)
+@receiver(post_delete, sender=Participation)
+def participation_changed_changes(sender, instance, **kwargs):
+    """Отклики меняют participations_count в карточке заявки"""
+    record_changes([instance.request_id])
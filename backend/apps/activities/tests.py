@@ -0,0 +1,481 @@
+"""
+Тесты activities приложения
+"""
+import base64
+import json
+from datetime import date, time
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.accounts.models import Interest, User
+from apps.notifications.models import Notification
+from apps.notifications.services import notify_many
+from . import changes, map_clusters
+from .pagination import encode_cursor
+from .matching import claim_job, due_jobs, run_job
+from .participants import add_participant, reconcile_participant_counts, release_participant
+from .models import Activity, Category, InterestMatchJob, Participation, Request, RequestChange
+from .search import search_requests
+from .search.backends import LikeBackend
+
+
+def create_request(creator, activity, **fields):
+    values = {
+        'creator': creator,
+        'request_type': 'sport',
+        'activity': activity,
+        'format': 'partner',
+        'date': date(2099, 1, 1),
+        'time': time(10, 0),
+        'location_name': 'Парк Горького',
+        'latitude': 55.7298,
+        'longitude': 37.6011,
+        'level': 'any',
+        'max_participants': 4,
+        'title': 'Футбол в парке',
+        'description': 'Ищем игроков на воскресную игру',
+    }
+    values.update(fields)
+    return Request.objects.create(**values)
+
+
+def create_activity():
+    category, _ = Category.objects.get_or_create(slug='sport-test', defaults={'name': 'Спорт (тест)'})
+    activity, _ = Activity.objects.get_or_create(
+        slug='football-test', defaults={'name': 'Футбол (тест)', 'category': category}
+    )
+    return activity
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='creator', password='password')
+        self.activity = create_activity()
+        # Индекс обновляется после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            self.request = create_request(self.user, self.activity)
+
+    def test_query_without_words_returns_empty_result(self):
+        """Запрос из одних знаков препинания — пустой результат, а не FieldError"""
+        for query in ['*', '"', '!!!']:
+            self.assertEqual(list(search_requests(query)), [])
+            response = self.client.get('/api/requests/search/', {'q': query})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), [])
+            response = self.client.get('/api/requests/search/', {'q': query, 'page': 1})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['count'], 0)
+
+    def test_query_finds_request(self):
+        self.assertEqual([req.id for req in search_requests('футбол')], [self.request.id])
+
+    def test_expired_request_is_hidden_before_worker_runs(self):
+        """Просроченная заявка ещё 'active', но в поиске и ленте её уже нет"""
+        with self.captureOnCommitCallbacks(execute=True):
+            expired = create_request(self.user, self.activity, date=date(2000, 1, 1))
+        self.assertEqual(expired.status, 'active')
+        self.assertEqual([req.id for req in search_requests('футбол')], [self.request.id])
+        response = self.client.get('/api/requests/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(expired.id, [req['id'] for req in response.json()])
+
+    def test_fuzzy_fallback_keeps_search_rank(self):
+        """Мало точных совпадений — запрос с опечатками, результат всё так же сортируется по search_rank"""
+        self.assertEqual([req.id for req in search_requests('футбал')], [self.request.id])
+        self.assertEqual(list(search_requests('zzzz')), [])
+        with mock.patch('apps.activities.search.get_backend', return_value=LikeBackend()):
+            # У LikeBackend поиска с опечатками нет — остаются точные совпадения
+            self.assertEqual([req.id for req in search_requests('парке')], [self.request.id])
+            self.assertEqual(list(search_requests('zzzz')), [])
+
+
+class NormalizedFeedTests(TestCase):
+    """?normalized=1: объекты included сериализуются с выбранными полями"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='creator', password='password')
+        self.activity = create_activity()
+        self.request = create_request(self.user, self.activity)
+
+    def feed(self, **params):
+        response = self.client.get('/api/requests/', {'normalized': 1, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_nested_fields_apply_to_included(self):
+        data = self.feed(fields='id,creator.username,activity.name')
+        self.assertEqual(data['results'], [{'id': self.request.id, 'creator_id': self.user.id,
+                                            'activity_id': self.activity.id}])
+        self.assertEqual(data['included']['users'], [{'username': 'creator'}])
+        self.assertEqual(data['included']['activities'], [{'name': self.activity.name}])
+
+    def test_expand_applies_to_included(self):
+        data = self.feed(view='card', expand='creator', fields='id,creator.email')
+        self.assertEqual(data['included']['users'], [{'email': self.user.email}])
+        # Полное представление активности, и его связи тоже попадают в included
+        data = self.feed(view='card', expand='activity')
+        self.assertIn('slug', data['included']['activities'][0])
+        self.assertEqual([item['id'] for item in data['included']['categories']], [self.activity.category_id])
+
+
+class ParticipantCountTests(TestCase):
+    """Счётчик current_participants и статусы 'active'/'filled' на записи"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create(username='creator')
+        self.users = [User.objects.create(username=f'player{i}') for i in range(3)]
+        self.request = create_request(self.creator, create_activity(), max_participants=2)
+
+    def counter(self):
+        self.request.refresh_from_db()
+        return self.request.current_participants, self.request.status
+
+    def join(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/requests/{self.request.pk}/participate/', {}, format='json')
+
+    def test_join_full_request_is_refused(self):
+        self.assertEqual(self.join(self.users[0]).status_code, 201)
+        self.assertEqual(self.join(self.users[1]).status_code, 201)
+        self.assertEqual(self.counter(), (2, 'filled'))
+
+        response = self.join(self.users[2])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Заявка уже заполнена')
+        self.assertEqual(self.counter(), (2, 'filled'))
+        self.assertIsNone(add_participant(self.request, self.users[2]))
+        self.assertEqual(self.counter(), (2, 'filled'))
+        self.assertFalse(Participation.objects.filter(user=self.users[2]).exists())
+
+    def test_repeated_join_rolls_back_counter(self):
+        add_participant(self.request, self.users[0])
+        with self.assertRaises(IntegrityError):
+            add_participant(self.request, self.users[0])
+        self.assertEqual(self.counter(), (1, 'active'))
+
+    def test_leave_decrements_once(self):
+        """Два процесса с одним и тем же участием освобождают место один раз"""
+        add_participant(self.request, self.users[0])
+        add_participant(self.request, self.users[1])
+        first = Participation.objects.get(user=self.users[0])
+        stale = Participation.objects.get(user=self.users[0])
+        self.assertTrue(release_participant(first, 'cancelled'))
+        self.assertFalse(release_participant(stale, 'cancelled'))
+        self.assertEqual(self.counter(), (1, 'active'))
+
+    def test_exclude_decrements_once(self):
+        add_participant(self.request, self.users[0])
+        add_participant(self.request, self.users[1])
+        participation = Participation.objects.get(user=self.users[0])
+        self.client.force_authenticate(self.creator)
+        url = f'/api/requests/{self.request.pk}/participations/{participation.pk}/exclude/'
+        for _ in range(2):
+            self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.counter(), (1, 'active'))
+        self.assertEqual(Participation.objects.get(pk=participation.pk).status, 'excluded')
+
+    def test_reconcile_fixes_drifted_counter(self):
+        add_participant(self.request, self.users[0])
+        Request.objects.filter(pk=self.request.pk).update(current_participants=2, status='filled')
+        other = create_request(self.creator, create_activity(), max_participants=2)
+        self.assertEqual(reconcile_participant_counts(batch_size=1), (1, 1))
+        self.assertEqual(self.counter(), (1, 'active'))
+        other.refresh_from_db()
+        self.assertEqual((other.current_participants, other.status), (0, 'active'))
+        self.assertEqual(reconcile_participant_counts(), (0, 0))
+
+
+def forge_cursor(payload):
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+class FeedPaginationTests(TestCase):
+    """Курсорная пагинация ленты заявок (?limit=/?cursor=)"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = User.objects.create(username='creator')
+        activity = create_activity()
+        self.requests = [create_request(user, activity, title=f'Заявка {i}') for i in range(5)]
+        # Одинаковое время создания: порядок задаёт только id
+        Request.objects.update(created_at=timezone.now())
+        self.ids = sorted(req.pk for req in self.requests)
+
+    def page(self, **params):
+        response = self.client.get('/api/requests/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return [item['id'] for item in data['results']], data
+
+    def test_equal_created_at_is_ordered_by_id(self):
+        seen = []
+        ids, data = self.page(limit=2)
+        self.assertIsNone(data['prev'])
+        while True:
+            seen += ids
+            if not data['next']:
+                break
+            ids, data = self.page(limit=2, cursor=data['next'])
+        self.assertEqual(seen, self.ids)
+
+    def test_prev_and_next_round_trip(self):
+        first, data = self.page(limit=2)
+        second, data = self.page(limit=2, cursor=data['next'])
+        third, data = self.page(limit=2, cursor=data['next'])
+        self.assertEqual((second, third, data['next']), (self.ids[2:4], self.ids[4:], None))
+
+        back, data = self.page(limit=2, cursor=data['prev'])
+        self.assertEqual(back, second)
+        back, data = self.page(limit=2, cursor=data['prev'])
+        self.assertEqual((back, data['prev']), (first, None))
+        forward, _ = self.page(limit=2, cursor=data['next'])
+        self.assertEqual(forward, second)
+
+    def test_invalid_cursor_is_rejected(self):
+        valid = json.loads(base64.urlsafe_b64decode(encode_cursor(self.requests[0], 'next') + '=='))
+        cursors = [
+            'garbage', '!!!', 'ыы', forge_cursor([1, 2]), forge_cursor('text'),
+            forge_cursor({**valid, 'd': 'sideways'}),
+            forge_cursor({**valid, 'c': 'вчера'}),
+            forge_cursor({**valid, 'c': 5}),
+            forge_cursor({**valid, 'i': 'x'}),
+            forge_cursor({**valid, 'i': 10 ** 30}),
+            forge_cursor({**valid, 'p': 10 ** 30}),
+            forge_cursor({key: value for key, value in valid.items() if key != 'i'}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/requests/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'Неверный курсор'})
+
+
+class RequestCancelTests(TestCase):
+    """Уведомление участников об отмене — notify_many, без запроса на участника"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(username='creator', password='password')
+        self.client.force_authenticate(self.creator)
+        self.activity = create_activity()
+
+    def cancel(self, participants):
+        req = create_request(self.creator, self.activity, max_participants=participants + 1)
+        users = User.objects.bulk_create([
+            User(username=f'participant{req.pk}-{i}') for i in range(participants)
+        ])
+        Participation.objects.bulk_create([
+            Participation(request=req, user=user, status='approved') for user in users
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/api/requests/{req.pk}/edit/', {'status': 'cancelled'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            Notification.objects.filter(related_request=req, notification_type='request_cancelled').count(),
+            participants
+        )
+        return len(queries)
+
+    def test_queries_do_not_depend_on_participants(self):
+        self.assertEqual(self.cancel(40), self.cancel(2))
+
+
+class RequestChangesTests(TestCase):
+    """Журнал дельта-синхронизации ленты"""
+
+    def sync(self, token):
+        changed, deleted, token, _ = changes.changes_since(token, changes.MAX_LIMIT)
+        return changed, deleted, token
+
+    def test_repeated_changes_are_appended_and_returned_once(self):
+        token = changes.head_token()
+        changes.record_changes([1, 2])
+        changes.record_changes([1])
+        changed, deleted, _ = self.sync(token)
+        self.assertEqual(sorted(changed), [1, 2])
+        self.assertEqual(deleted, [])
+
+    def test_deletion_wins_over_earlier_change(self):
+        token = changes.head_token()
+        changes.record_changes([1])
+        changes.record_changes([1], deleted=True)
+        self.assertEqual(self.sync(token)[:2], ([], [1]))
+
+    def test_change_committed_after_token_is_not_lost(self):
+        """Строка с меньшим id, ставшая видимой после выдачи токена, всё равно приходит"""
+        changes.record_changes([1])
+        first_id = RequestChange.objects.get().id
+        # Транзакция B взяла id позже, но закоммитилась раньше, чем A
+        RequestChange.objects.create(id=first_id + 10, request_id=2)
+        token = changes.head_token()
+        RequestChange.objects.create(id=first_id + 5, request_id=3)
+        changed, _, token = self.sync(token)
+        self.assertEqual(changed, [3])
+        self.assertEqual(self.sync(token)[:2], ([], []))
+
+    def test_purge_keeps_latest_change_and_tombstones(self):
+        changes.record_changes([1])
+        changes.record_changes([1])
+        changes.record_changes([2])
+        changes.record_changes([2], deleted=True)
+        self.assertEqual(changes.purge_changes(), (2, 0))
+        self.assertEqual(
+            sorted(RequestChange.objects.values_list('request_id', 'deleted')),
+            [(1, False), (2, True)]
+        )
+
+
+class MapCacheTests(TestCase):
+    """Сброс кэша тайлов карты при изменении заявки"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='creator', password='password')
+        self.activity = create_activity()
+        with self.captureOnCommitCallbacks(execute=True):
+            req = create_request(self.user, self.activity)
+        self.request = Request.objects.get(pk=req.pk)
+
+    def tile_key(self, latitude, longitude):
+        zoom = map_clusters.MAX_ZOOM
+        return map_clusters.tile_cache_key(zoom, *map_clusters.tile_for_point(latitude, longitude, zoom))
+
+    def test_tiles_are_invalidated_after_commit(self):
+        old_key = self.tile_key(self.request.latitude, self.request.longitude)
+        new_key = self.tile_key(59.9386, 30.3141)
+        cache.set_many({old_key: [], new_key: []})
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.request.latitude, self.request.longitude = 59.9386, 30.3141
+            self.request.save()
+            # До коммита тайлы не трогаем: иначе их пересоберут из старых данных
+            self.assertIsNotNone(cache.get(old_key))
+            self.assertIsNotNone(cache.get(new_key))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(old_key))
+        self.assertIsNone(cache.get(new_key))
+
+    def test_delete_invalidates_tile_after_commit(self):
+        key = self.tile_key(self.request.latitude, self.request.longitude)
+        cache.set(key, [])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.request.delete()
+            self.assertIsNotNone(cache.get(key))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(key))
+
+    def test_save_does_not_reload_position(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.request.title = 'Новое название'
+            self.request.save()
+        self.assertFalse([
+            query for query in queries
+            if query['sql'].startswith('SELECT "activities_request"."latitude"')
+        ])
+
+
+@override_settings(INTEREST_MATCH_WORKERS=0, INTEREST_MATCH_CHUNK=3)
+class InterestMatchTests(TestCase):
+    """Рассылка о новой заявке по интересам переживает перезапуск процесса"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(username='creator', password='password')
+        self.client.force_authenticate(self.creator)
+        self.activity = create_activity()
+        self.interested = User.objects.bulk_create([User(username=f'fan{i}') for i in range(7)])
+        Interest.objects.bulk_create([
+            Interest(user=user, activity=self.activity, level='beginner') for user in self.interested
+        ])
+
+    def create_request(self):
+        response = self.client.post('/api/requests/create/', {
+            'request_type': 'sport', 'activity_id': self.activity.pk, 'format': 'partner',
+            'date': '2099-01-01', 'time': '10:00', 'location_name': 'Парк', 'level': 'any',
+            'max_participants': 4, 'title': 'Футбол', 'description': 'Игра',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return InterestMatchJob.objects.get(request_id=response.data['id'])
+
+    def notified(self, job):
+        return Notification.objects.filter(related_request_id=job.request_id, notification_type='new_request_nearby')
+
+    def test_job_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = self.create_request()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.notified), ('done', 7))
+        self.assertEqual(self.notified(job).count(), 7)
+
+    def test_lost_job_is_picked_up_by_command(self):
+        # Процесс завершился после коммита, фоновый пул рассылку не начал
+        with self.captureOnCommitCallbacks(execute=False):
+            job = self.create_request()
+        self.assertFalse(self.notified(job).exists())
+
+        call_command('process_interest_matches', stdout=StringIO())
+        call_command('process_interest_matches', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(self.notified(job).count(), 7)
+
+    def test_interrupted_job_resumes_without_duplicates(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            job = self.create_request()
+        calls = []
+
+        def crash_on_second_chunk(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('процесс остановлен')
+            return notify_many(*args, **kwargs)
+
+        with mock.patch('apps.activities.matching.notify_many', crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.notified, job.attempts), ('pending', 3, 1))
+        self.assertIn('процесс остановлен', job.last_error)
+
+        run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.notified), ('done', 7))
+        self.assertEqual(self.notified(job).count(), 7)
+        self.assertEqual(self.notified(job).values('user_id').distinct().count(), 7)
+
+    def test_claimed_job_is_not_run_twice(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            job = self.create_request()
+        self.assertTrue(claim_job(job.pk))
+        self.assertIsNone(run_job(job.pk))
+        self.assertFalse(due_jobs().exists())
+
+    @override_settings(INTEREST_MATCH_MAX_ATTEMPTS=2)
+    def test_job_fails_after_max_attempts(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            job = self.create_request()
+        with mock.patch('apps.activities.matching.notify_many', side_effect=RuntimeError('нет БД')):
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNone(run_job(job.pk))
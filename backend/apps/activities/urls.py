@@ -8,6 +8,9 @@ urlpatterns = [
     path('activities/', views.activity_list, name='activity_list'),
     path('', views.request_list, name='request_list'),
     path('create/', views.request_create, name='request_create'),
+    path('map/', views.request_map, name='request_map'),
+    path('batch/', views.request_batch, name='request_batch'),
+    path('changes/', views.request_changes, name='request_changes'),
     path('<int:pk>/', views.request_detail, name='request_detail'),
     path('<int:pk>/edit/', views.request_edit, name='request_edit'),
     path('<int:pk>/delete/', views.request_delete, name='request_delete'),
@@ -19,6 +22,7 @@ urlpatterns = [
     path('my/participations/', views.my_participations, name='my_participations'),
     path('favorites/', views.favorites_list, name='favorites_list'),
     path('search/', views.search_requests, name='search_requests'),
+    path('suggest/', views.search_suggest, name='search_suggest'),
     path('<int:pk>/reviews/', views.review_create, name='review_create'),
     path('reviews/user/<int:user_id>/', views.reviews_list, name='reviews_list'),
     path('upload-photo/', views.upload_photo, name='upload_photo'),
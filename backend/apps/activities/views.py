@@ -5,13 +5,30 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q, Count, Avg, Case, When, IntegerField
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Count, Avg, Max, Case, When, IntegerField, Value, Exists, OuterRef
 from django.utils import timezone
 from datetime import timedelta
 from .models import Category, Activity, Request, Participation, Favorite, Review
 from .serializers import (CategorySerializer, ActivitySerializer, RequestSerializer,
-                         ParticipationSerializer, FavoriteSerializer, ReviewSerializer)
-from .search import search_requests as search_requests_func
+                         ParticipationSerializer, FavoriteSerializer, ReviewSerializer,
+                         REQUEST_LIST_RELATED, request_list_serializer)
+from config.serializers import add_included, normalized_context, normalized_data, sparse_fieldset
+from .search import (search_requests as search_requests_func,
+                     DEFAULT_LIMIT as SEARCH_DEFAULT_LIMIT, MAX_LIMIT as SEARCH_MAX_LIMIT)
+from .participants import add_participant, release_participant, refresh_fill_status
+from .pagination import FeedCursorPagination, InvalidCursor, FEED_ORDERING
+from .geo import parse_point, within_radius, annotate_distance
+from .lifecycle import not_expired
+from . import map_clusters
+from .search import suggest
+from .catalog import catalog_response, get_version as catalog_version
+from . import changes as feed_changes
+from .matching import schedule_interest_notifications
+from config.conditional import conditional
+from config.microcache import anonymous_cache
+from config.batch import parse_ids
+from apps.notifications.services import notify_many
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 import uuid
@@ -24,48 +41,31 @@ from decimal import Decimal
 @permission_classes([AllowAny])
 def category_list(request):
     """Список категорий"""
-    categories = Category.objects.all()
-    serializer = CategorySerializer(categories, many=True)
-    return Response(serializer.data)
+    return catalog_response(request, 'categories')
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def activity_list(request):
     """Список активностей"""
-    activities = Activity.objects.filter(is_active=True)
-    
     category_id = request.query_params.get('category_id')
-    if category_id:
-        activities = activities.filter(category_id=category_id)
-    
-    serializer = ActivitySerializer(activities, many=True)
-    return Response(serializer.data)
+    if not category_id:
+        return catalog_response(request, 'activities')
+    try:
+        category_id = int(category_id)
+    except ValueError:
+        return Response({'error': 'Неверный category_id'}, status=status.HTTP_400_BAD_REQUEST)
+    return catalog_response(request, f'activities:{category_id}')
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def request_list(request):
-    """Список заявок с фильтрами"""
-    # Получаем текущую дату и время
+def feed_queryset(request):
+    """
+    Лента заявок с фильтрами из параметров запроса, упорядоченная по FEED_ORDERING
+    (общая для request_list и /api/home/)
+    """
+    # Прошедшие заявки переводятся в 'completed' воркером update_request_statuses,
+    # здесь только читаем и отсекаем их по transition_at
     now = timezone.now()
-    today = now.date()
-    current_time = now.time()
-    
-    # Сначала помечаем прошедшие активности как completed
-    # Находим все активные заявки, которые уже прошли (но не "набрана")
-    past_requests = Request.objects.filter(
-        Q(status='active') & (Q(date__lt=today) | Q(date=today, time__lt=current_time))
-    )
-    
-    # Помечаем их как завершённые
-    past_requests.update(status='completed')
-    
-    # Также помечаем прошедшие заявки со статусом "набрана" как завершённые
-    past_filled_requests = Request.objects.filter(
-        Q(status='filled') & (Q(date__lt=today) | Q(date=today, time__lt=current_time))
-    )
-    past_filled_requests.update(status='completed')
     
     # Проверяем, является ли пользователь модератором
     is_mod = request.user.is_authenticated and (request.user.is_moderator or request.user.is_staff)
@@ -79,7 +79,7 @@ def request_list(request):
     creator_id = request.query_params.get('creator_id')
     
     # Начинаем с базового queryset
-    requests = Request.objects.all()
+    requests = Request.objects.select_related(*REQUEST_LIST_RELATED)
     
     # Применяем фильтры
     if category_id:
@@ -116,38 +116,30 @@ def request_list(request):
                 # Показываем только активные заявки, которые ещё не прошли
                 # ИЛИ заявки, в которых пользователь участвует (даже если они "filled")
                 requests = requests.filter(
-                    (
-                        Q(status='active') & 
-                        Q(visibility='public') & 
-                        (Q(date__gt=today) | Q(date=today, time__gte=current_time))
-                    ) | 
+                    Q(not_expired(now), status='active', visibility='public') |
                     Q(id__in=user_participation_ids)
                 )
             else:
                 # Для неавторизованных показываем только активные заявки
                 requests = requests.filter(
-                    Q(status='active') & 
-                    Q(visibility='public') & 
-                    (Q(date__gt=today) | Q(date=today, time__gte=current_time))
+                    not_expired(now), status='active', visibility='public'
                 )
     
     # Если пользователь авторизован, добавляем рекомендации на основе интересов
+    user_interests = []
     if request.user.is_authenticated:
         from apps.accounts.models import Interest
         user_interests = list(Interest.objects.filter(user=request.user).values_list('activity_id', flat=True))
-        if user_interests:
-            # Приоритизируем заявки по интересам пользователя
-            requests = requests.annotate(
-                interest_priority=Case(
-                    When(activity_id__in=user_interests, then=1),
-                    default=0,
-                    output_field=IntegerField()
-                )
-            ).order_by('-interest_priority', '-created_at')
-        else:
-            requests = requests.order_by('-created_at')
+    if user_interests:
+        # Приоритизируем заявки по интересам пользователя
+        interest_priority = Case(
+            When(activity_id__in=user_interests, then=1),
+            default=0,
+            output_field=IntegerField()
+        )
     else:
-        requests = requests.order_by('-created_at')
+        interest_priority = Value(0, output_field=IntegerField())
+    requests = requests.annotate(interest_priority=interest_priority).order_by(*FEED_ORDERING)
     
     # Быстрые теги
     quick_tag = request.query_params.get('quick_tag')
@@ -163,66 +155,184 @@ def request_list(request):
         saturday = today + timedelta(days=days_until_saturday)
         sunday = saturday + timedelta(days=1)
         requests = requests.filter(date__in=[saturday, sunday])
-    elif quick_tag == 'nearby':
-        # Фильтр по геолокации (можно добавить позже)
-        pass
-    
-    # Синхронизируем current_participants и проверяем статус перед сериализацией
-    requests_list = list(requests)
-    for req in requests_list:
-        active_count = Participation.objects.filter(
-            request=req,
-            status='approved'
-        ).count()
-        needs_save = False
-        if req.current_participants != active_count:
-            req.current_participants = active_count
-            needs_save = True
-        
-        # ВСЕГДА проверяем статус на основе актуального количества участников
-        if active_count >= req.max_participants and req.status == 'active':
-            req.status = 'filled'
-            needs_save = True
-        elif active_count < req.max_participants and req.status == 'filled':
-            req.status = 'active'
-            needs_save = True
-        
-        if needs_save:
-            req.save(update_fields=['current_participants', 'status'])
-    
-    serializer = RequestSerializer(requests_list, many=True, context={'request': request})
-    return Response(serializer.data)
+    
+    return requests
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@anonymous_cache
+def request_list(request):
+    """Список заявок с фильтрами"""
+    requests = feed_queryset(request)
+    quick_tag = request.query_params.get('quick_tag')
+    
+    # Геопоиск: lat/lon (или latitude/longitude) добавляют distance_km,
+    # 'nearby' или явный radius_km ограничивают выдачу радиусом
+    try:
+        point = parse_point(request.query_params)
+    except ValueError:
+        return Response(
+            {'error': 'Некорректные координаты или радиус'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    sort_by_distance = False
+    if point:
+        lat, lon, radius_km = point
+        if quick_tag == 'nearby' or 'radius_km' in request.query_params or 'radius' in request.query_params:
+            requests = within_radius(requests, lat, lon, radius_km)
+        else:
+            requests = annotate_distance(requests, lat, lon)
+        sort_by_distance = quick_tag == 'nearby' or request.query_params.get('sort') == 'distance'
+    
+    paginator = FeedCursorPagination()
+    if sort_by_distance:
+        # Ближайшие сначала; limit ограничивает выдачу (курсоры работают только с порядком ленты)
+        requests = requests.order_by('distance_km', 'id')
+        if paginator.limit_query_param in request.query_params:
+            requests = requests[:paginator.get_limit(request)]
+        serializer = request_list_serializer(request, requests)
+        return Response(normalized_data(serializer))
+    
+    # Курсорная пагинация включается параметрами limit/cursor;
+    # без них лента отдаётся целиком в прежнем формате (список)
+    if paginator.limit_query_param in request.query_params or paginator.cursor_query_param in request.query_params:
+        try:
+            page = paginator.paginate_queryset(requests, request)
+        except InvalidCursor:
+            return Response(
+                {'error': 'Неверный курсор'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = request_list_serializer(request, page)
+        response = paginator.get_paginated_response(serializer.data)
+        add_included(response.data, serializer)
+        return response
+    
+    serializer = request_list_serializer(request, requests)
+    return Response(normalized_data(serializer))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def request_changes(request):
+    """
+    Дельта-синхронизация ленты
+    GET /api/requests/changes/ — токен текущего конца журнала (взять до загрузки ленты)
+    GET /api/requests/changes/?since=<токен>&limit=100 — изменения после токена:
+        updated — изменённые заявки, которые сейчас есть в ленте
+                  (фильтры те же, что у /api/requests/),
+        removed — удалённые и выпавшие из ленты (набраны, отменены, завершены, скрыты)
+    """
+    since = request.query_params.get('since')
+    if not since:
+        return Response({'next': feed_changes.head_token(), 'has_more': False, 'updated': [], 'removed': []})
+    
+    try:
+        limit = min(feed_changes.MAX_LIMIT, max(1, int(request.query_params.get('limit', feed_changes.DEFAULT_LIMIT))))
+    except ValueError:
+        return Response({'error': 'Неверный limit'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        changed, deleted, next_token, has_more = feed_changes.changes_since(since, limit)
+    except feed_changes.ExpiredToken:
+        return Response(
+            {'error': 'Токен устарел, загрузите ленту заново'},
+            status=status.HTTP_410_GONE
+        )
+    except feed_changes.InvalidToken:
+        return Response({'error': 'Неверный токен'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    visible = list(feed_queryset(request).filter(id__in=changed)) if changed else []
+    visible_ids = {req.id for req in visible}
+    serializer = request_list_serializer(request, visible)
+    return Response(add_included({
+        'next': next_token,
+        'has_more': has_more,
+        'updated': serializer.data,
+        'removed': deleted + [pk for pk in changed if pk not in visible_ids],
+    }, serializer))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def request_map(request):
+    """
+    Кластеры заявок для карты
+    GET /api/requests/map/?min_lat=..&min_lon=..&max_lat=..&max_lon=..&zoom=..
+    """
+    try:
+        min_lat = float(request.query_params['min_lat'])
+        min_lon = float(request.query_params['min_lon'])
+        max_lat = float(request.query_params['max_lat'])
+        max_lon = float(request.query_params['max_lon'])
+        zoom = int(request.query_params.get('zoom', 12))
+    except (KeyError, TypeError, ValueError):
+        return Response(
+            {'error': 'Необходимо указать min_lat, min_lon, max_lat, max_lon и zoom'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    zoom = max(map_clusters.MIN_ZOOM, min(zoom, map_clusters.MAX_ZOOM))
+    if min_lat > max_lat or min_lon > max_lon:
+        return Response(
+            {'error': 'Некорректная область карты'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        clusters = map_clusters.get_clusters(min_lat, min_lon, max_lat, max_lon, zoom)
+    except ValueError:
+        return Response(
+            {'error': 'Слишком большая область для этого масштаба'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response({'zoom': zoom, 'clusters': clusters})
+
+
+def request_detail_validators(request, pk):
+    """
+    Валидаторы request_detail одним запросом: изменяемые без updated_at поля
+    заявки (счётчик, статус), данные автора, отклики и флаги текущего пользователя
+    """
+    from apps.accounts.serializers import UserSerializer
+
+    queryset = Request.objects.filter(pk=pk).annotate(
+        responses=Count('participations', filter=Q(participations__status__in=['pending', 'approved'])),
+        responses_changed=Max('participations__updated_at'),
+    )
+    fields = ['updated_at', 'current_participants', 'status', 'activity_id',
+              *[f'creator__{name}' for name in UserSerializer.Meta.fields],
+              'responses', 'responses_changed']
+    user = request.user
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            favorite=Exists(Favorite.objects.filter(request=OuterRef('pk'), user=user)),
+            participating=Exists(Participation.objects.filter(
+                request=OuterRef('pk'), user=user, status='approved'
+            )),
+        )
+        fields += ['favorite', 'participating']
+    row = queryset.values_list(*fields).first()
+    if row is None:
+        return None
+
+    updated_at, responses_changed = row[0], row[fields.index('responses_changed')]
+    # Избранное удаляется без следа, поэтому для авторизованных — только ETag
+    last_modified = None
+    if not user.is_authenticated:
+        last_modified = max(updated_at, responses_changed or updated_at)
+    return (row, catalog_version()), last_modified
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional(request_detail_validators)
 def request_detail(request, pk):
     """Детали заявки"""
     try:
         req = Request.objects.get(pk=pk)
         
-        # Синхронизируем current_participants
-        active_count = Participation.objects.filter(
-            request=req,
-            status='approved'
-        ).count()
-        needs_save = False
-        if req.current_participants != active_count:
-            req.current_participants = active_count
-            needs_save = True
-        
-        # ВСЕГДА проверяем статус на основе актуального количества участников
-        if active_count >= req.max_participants and req.status == 'active':
-            req.status = 'filled'
-            needs_save = True
-        elif active_count < req.max_participants and req.status == 'filled':
-            req.status = 'active'
-            needs_save = True
-        
-        if needs_save:
-            req.save(update_fields=['current_participants', 'status'])
-        
-        serializer = RequestSerializer(req, context={'request': request})
+        serializer = RequestSerializer(req, context={'request': request}, **sparse_fieldset(request))
         return Response(serializer.data)
     except Request.DoesNotExist:
         return Response(
@@ -231,6 +341,28 @@ def request_detail(request, pk):
         )
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def request_batch(request):
+    """
+    Несколько заявок за один запрос (как request_detail для каждой)
+    GET /api/requests/batch/?ids=1,2,3
+    Флаги текущего пользователя загружаются пачкой, число SQL-запросов
+    не зависит от количества ids. Несуществующие id — в not_found.
+    """
+    try:
+        ids = parse_ids(request.query_params.get('ids'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    found = Request.objects.select_related(*REQUEST_LIST_RELATED).in_bulk(ids)
+    serializer = request_list_serializer(request, [found[pk] for pk in ids if pk in found])
+    return Response(add_included({
+        'results': serializer.data,
+        'not_found': [pk for pk in ids if pk not in found],
+    }, serializer))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def request_create(request):
@@ -240,32 +372,13 @@ def request_create(request):
     
     serializer = RequestSerializer(data=data, context={'request': request})
     if serializer.is_valid():
-        req = serializer.save(creator=request.user)
-        
-        # Создаём уведомления для пользователей с интересами в этой активности
-        from apps.accounts.models import Interest
-        from apps.notifications.models import Notification
-        
-        # Получаем пользователей с интересами в этой активности
-        interested_users = Interest.objects.filter(
-            activity=req.activity
-        ).exclude(user=request.user).values_list('user', flat=True).distinct()
-        
-        # Отправляем уведомления (можно добавить фильтр по геолокации)
-        for user_id in interested_users[:50]:  # Ограничение для производительности
-            from apps.accounts.models import User
-            try:
-                user = User.objects.get(pk=user_id)
-                Notification.objects.create(
-                    user=user,
-                    notification_type='new_request_nearby',
-                    title='Новая заявка по вашим интересам',
-                    message=f'Создана новая заявка "{req.title}" по активности "{req.activity.name}"',
-                    related_request=req,
-                    related_user=request.user
-                )
-            except User.DoesNotExist:
-                pass
+        with transaction.atomic():
+            req = serializer.save(creator=request.user)
+            
+            # Уведомления пользователям с интересами в этой активности: рассылка
+            # пишется вместе с заявкой и выполняется после коммита в фоновом пуле
+            # (apps/activities/matching.py)
+            schedule_interest_notifications(req.pk)
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -276,76 +389,53 @@ def request_create(request):
 def request_edit(request, pk):
     """Редактирование заявки"""
     try:
-        req = Request.objects.get(pk=pk, creator=request.user)
-        old_status = req.status
-        old_date = req.date
-        
-        serializer = RequestSerializer(req, data=request.data, partial=True, context={'request': request})
-        if serializer.is_valid():
-            req = serializer.save()
-            
-            # Синхронизируем current_participants и проверяем статус
-            active_count = Participation.objects.filter(
-                request=req,
-                status='approved'
-            ).count()
-            needs_save = False
-            if req.current_participants != active_count:
-                req.current_participants = active_count
-                needs_save = True
-            
-            # Автоматически устанавливаем статус "набрана" если все слоты заполнены
-            if active_count >= req.max_participants and req.status == 'active':
-                req.status = 'filled'
-                needs_save = True
-            elif active_count < req.max_participants and req.status == 'filled':
-                req.status = 'active'
-                needs_save = True
-            
-            if needs_save:
-                req.save(update_fields=['current_participants', 'status'])
-            
-            # Проверяем изменения статуса и даты для уведомлений
-            from apps.notifications.models import Notification
+        with transaction.atomic():
+            # Блокируем строку, чтобы не затереть счётчик участников параллельным откликом
+            req = Request.objects.select_for_update().get(pk=pk, creator=request.user)
+            old_status = req.status
+            old_date = req.date
             
-            new_status = req.status
-            new_date = req.date
-            
-            # Уведомление об отмене
-            if new_status == 'cancelled' and old_status != 'cancelled':
-                # Уведомляем всех участников
-                participations = Participation.objects.filter(
-                    request=req,
-                    status='approved'
-                )
-                for participation in participations:
-                    Notification.objects.create(
-                        user=participation.user,
-                        notification_type='request_cancelled',
-                        title='Заявка отменена',
-                        message=f'Заявка "{req.title}" была отменена',
-                        related_request=req,
-                        related_user=request.user
-                    )
-            
-            # Уведомление о переносе (если изменилась дата)
-            if new_date != old_date and new_status == 'active':
-                participations = Participation.objects.filter(
-                    request=req,
-                    status='approved'
-                )
-                for participation in participations:
-                    Notification.objects.create(
-                        user=participation.user,
-                        notification_type='request_rescheduled',
-                        title='Заявка перенесена',
-                        message=f'Заявка "{req.title}" перенесена на {new_date}',
-                        related_request=req,
-                        related_user=request.user
-                    )
+            serializer = RequestSerializer(req, data=request.data, partial=True, context={'request': request})
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            req = serializer.save()
             
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            # max_participants или статус могли измениться — пересчитываем "набрана"/"активна"
+            refresh_fill_status(req.pk)
+            req.refresh_from_db(fields=['current_participants', 'status'])
+        
+        # Проверяем изменения статуса и даты для уведомлений
+        new_status = req.status
+        new_date = req.date
+        participants = Participation.objects.filter(
+            request=req,
+            status='approved'
+        ).values_list('user_id', flat=True)
+        
+        # Уведомление об отмене
+        if new_status == 'cancelled' and old_status != 'cancelled':
+            # Уведомляем всех участников
+            notify_many(
+                participants,
+                notification_type='request_cancelled',
+                title='Заявка отменена',
+                message=f'Заявка "{req.title}" была отменена',
+                related_request=req,
+                related_user=request.user
+            )
+        
+        # Уведомление о переносе (если изменилась дата)
+        if new_date != old_date and new_status == 'active':
+            notify_many(
+                participants,
+                notification_type='request_rescheduled',
+                title='Заявка перенесена',
+                message=f'Заявка "{req.title}" перенесена на {new_date}',
+                related_request=req,
+                related_user=request.user
+            )
+        
+        return Response(serializer.data)
     except Request.DoesNotExist:
         return Response(
             {'error': 'Заявка не найдена или нет прав на редактирование'},
@@ -382,9 +472,8 @@ def request_delete(request, pk):
         
         # Если удалил модератор и указана причина - отправляем уведомление
         if is_mod and reason and creator:
-            from apps.notifications.models import Notification
-            Notification.objects.create(
-                user=creator,
+            notify_many(
+                [creator],
                 notification_type='request_cancelled',
                 title='Заявка удалена модератором',
                 message=f'Ваша заявка "{request_title}" была удалена модератором. Причина: {reason}',
@@ -426,39 +515,25 @@ def participate(request, pk):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Проверяем, не заполнена ли заявка
-        current_participants = Participation.objects.filter(
-            request=req,
-            status='approved'
-        ).count()
+        # Атомарно занимаем место и создаём участие со статусом 'approved'
+        # (автоматическое одобрение); None — мест уже нет
+        try:
+            participation = add_participant(req, request.user, request.data.get('message', ''))
+        except IntegrityError:
+            return Response(
+                {'error': 'Вы уже откликнулись на эту заявку'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if current_participants >= req.max_participants:
+        if participation is None:
             return Response(
                 {'error': 'Заявка уже заполнена'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Создаём участие со статусом 'approved' (автоматическое одобрение)
-        participation = Participation.objects.create(
-            request=req,
-            user=request.user,
-            message=request.data.get('message', ''),
-            status='approved'
-        )
-        
-        # Обновляем количество участников
-        req.current_participants = current_participants + 1
-        
-        # Если все слоты заполнены, меняем статус на "набрана"
-        if req.current_participants >= req.max_participants and req.status == 'active':
-            req.status = 'filled'
-        
-        req.save(update_fields=['current_participants', 'status'])
-        
         # Создаём уведомление для создателя заявки
-        from apps.notifications.models import Notification
-        Notification.objects.create(
-            user=req.creator,
+        notify_many(
+            [req.creator_id],
             notification_type='new_response',
             title='Кто-то вступил в вашу заявку',
             message=f'{request.user.username} вступил в заявку "{req.title}"',
@@ -479,10 +554,12 @@ def participate(request, pk):
 @permission_classes([IsAuthenticated])
 def favorites_list(request):
     """Список избранных заявок пользователя"""
-    favorites = Favorite.objects.filter(user=request.user)
+    favorites = Favorite.objects.filter(user=request.user).select_related(
+        *[f'request__{field}' for field in REQUEST_LIST_RELATED]
+    )
     requests = [favorite.request for favorite in favorites]
-    serializer = RequestSerializer(requests, many=True, context={'request': request})
-    return Response(serializer.data)
+    serializer = request_list_serializer(request, requests)
+    return Response(normalized_data(serializer))
 
 
 @api_view(['GET', 'POST', 'DELETE'])
@@ -519,32 +596,19 @@ def participation_exclude(request, pk, participation_id):
         participation = Participation.objects.get(pk=participation_id, request=req)
         
         # Сохраняем данные для уведомления
-        excluded_user = participation.user
+        excluded_user_id = participation.user_id
         
         # Меняем статус на 'excluded' вместо удаления
-        participation.status = 'excluded'
-        participation.save()
-        
-        # Обновляем количество участников (исключенные не считаются)
-        active_count = Participation.objects.filter(
-            request=req, 
-            status='approved'
-        ).count()
-        req.current_participants = active_count
-        
-        # Если слотов стало меньше, чем max_participants, и статус "набрана", возвращаем в "активна"
-        if active_count < req.max_participants and req.status == 'filled':
-            req.status = 'active'
-        # Если все слоты заполнены, меняем статус на "набрана"
-        elif active_count >= req.max_participants and req.status == 'active':
-            req.status = 'filled'
-        
-        req.save(update_fields=['current_participants', 'status'])
+        if participation.status == 'approved':
+            # Освобождаем место и возвращаем "активна", если заявка была набрана
+            release_participant(participation, 'excluded')
+        else:
+            participation.status = 'excluded'
+            participation.save(update_fields=['status', 'updated_at'])
         
         # Создаём уведомление для исключённого участника
-        from apps.notifications.models import Notification
-        Notification.objects.create(
-            user=excluded_user,
+        notify_many(
+            [excluded_user_id],
             notification_type='participation_rejected',
             title='Вас исключили из активности',
             message=f'Вас исключили из активности "{req.title}"',
@@ -583,8 +647,11 @@ def request_participations(request, pk):
             request=req,
             status='approved'
         ).order_by('-created_at')
-        serializer = ParticipationSerializer(participations, many=True)
-        return Response(serializer.data)
+        serializer = ParticipationSerializer(
+            participations.select_related('user__profile'), many=True,
+            context=normalized_context(request), **sparse_fieldset(request)
+        )
+        return Response(normalized_data(serializer))
     except Request.DoesNotExist:
         return Response(
             {'error': 'Заявка не найдена'},
@@ -596,9 +663,9 @@ def request_participations(request, pk):
 @permission_classes([IsAuthenticated])
 def my_requests(request):
     """Мои заявки"""
-    requests = Request.objects.filter(creator=request.user)
-    serializer = RequestSerializer(requests, many=True, context={'request': request})
-    return Response(serializer.data)
+    requests = Request.objects.filter(creator=request.user).select_related(*REQUEST_LIST_RELATED)
+    serializer = request_list_serializer(request, requests)
+    return Response(normalized_data(serializer))
 
 
 @api_view(['GET'])
@@ -607,19 +674,50 @@ def my_participations(request):
     """Заявки, в которых я участвую"""
     participations = Participation.objects.filter(user=request.user, status='approved')
     request_ids = participations.values_list('request_id', flat=True)
-    requests = Request.objects.filter(id__in=request_ids)
-    serializer = RequestSerializer(requests, many=True, context={'request': request})
-    return Response(serializer.data)
+    requests = Request.objects.filter(id__in=request_ids).select_related(*REQUEST_LIST_RELATED)
+    serializer = request_list_serializer(request, requests)
+    return Response(normalized_data(serializer))
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@anonymous_cache
 def search_requests(request):
     """Поиск заявок"""
     query = request.query_params.get('q', '')
     results = search_requests_func(query, request.query_params)
-    serializer = RequestSerializer(results, many=True, context={'request': request})
-    return Response(serializer.data)
+
+    # Без page/limit отдаём первые результаты списком, как раньше
+    if 'page' not in request.query_params and 'limit' not in request.query_params:
+        serializer = request_list_serializer(request, results[:SEARCH_DEFAULT_LIMIT])
+        return Response(normalized_data(serializer))
+
+    try:
+        page = max(1, int(request.query_params.get('page', 1)))
+        limit = min(SEARCH_MAX_LIMIT, max(1, int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT))))
+    except ValueError:
+        return Response({'error': 'Неверные параметры пагинации'}, status=status.HTTP_400_BAD_REQUEST)
+
+    offset = (page - 1) * limit
+    serializer = request_list_serializer(request, results[offset:offset + limit])
+    return Response(add_included({
+        'count': results.count(),
+        'page': page,
+        'limit': limit,
+        'results': serializer.data,
+    }, serializer))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_suggest(request):
+    """Автодополнение строки поиска: активности, категории, популярные места"""
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(suggest.MAX_LIMIT, max(1, int(request.query_params.get('limit', suggest.DEFAULT_LIMIT))))
+    except ValueError:
+        return Response({'error': 'Неверный limit'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(suggest.suggest(query, limit))
 
 
 @api_view(['GET'])
@@ -698,9 +796,8 @@ def review_create(request, pk):
         # Рейтинг будет автоматически пересчитан через сигнал post_save
         
         # Создаём уведомление
-        from apps.notifications.models import Notification
-        Notification.objects.create(
-            user=reviewed_user,
+        notify_many(
+            [reviewed_user],
             notification_type='new_review',
             title='Новый отзыв',
             message=f'{request.user.username} оставил вам отзыв по заявке "{req.title}"',
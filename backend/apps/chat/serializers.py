@@ -2,11 +2,12 @@
 Serializers для chat приложения
 """
 from rest_framework import serializers
+from config.serializers import SparseFieldsetMixin
 from .models import ChatRoom, Message
 from apps.accounts.serializers import UserSerializer
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     
     class Meta:
@@ -15,7 +16,7 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class ChatRoomSerializer(serializers.ModelSerializer):
+class ChatRoomSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     participants = UserSerializer(many=True, read_only=True)
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
@@ -0,0 +1,14 @@
+"""
+Сигналы для chat приложения
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Message
+from config.cache import invalidate_tags, user_tag
+
+
+@receiver(post_save, sender=Message)
+def message_saved_cache(sender, instance, **kwargs):
+    """Новое сообщение меняет чаты всех участников комнаты"""
+    participant_ids = instance.room.participants.values_list('id', flat=True)
+    invalidate_tags(*[user_tag(user_id) for user_id in participant_ids])
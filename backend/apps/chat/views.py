@@ -9,6 +9,8 @@ from django.db.models import Q
 from .models import ChatRoom, Message
 from .serializers import ChatRoomSerializer, MessageSerializer
 from apps.accounts.models import User
+from config.serializers import sparse_fieldset
+from config.cache import invalidate_tags, user_tag
 
 
 @api_view(['GET'])
@@ -16,7 +18,7 @@ from apps.accounts.models import User
 def chat_rooms_list(request):
     """Список чатов пользователя"""
     rooms = ChatRoom.objects.filter(participants=request.user).order_by('-updated_at')
-    serializer = ChatRoomSerializer(rooms, many=True, context={'request': request})
+    serializer = ChatRoomSerializer(rooms, many=True, context={'request': request}, **sparse_fieldset(request))
     return Response(serializer.data)
 
 
@@ -26,7 +28,7 @@ def chat_room_detail(request, pk):
     """Детали комнаты чата"""
     try:
         room = ChatRoom.objects.filter(participants=request.user).get(pk=pk)
-        serializer = ChatRoomSerializer(room, context={'request': request})
+        serializer = ChatRoomSerializer(room, context={'request': request}, **sparse_fieldset(request))
         return Response(serializer.data)
     except ChatRoom.DoesNotExist:
         return Response(
@@ -44,9 +46,10 @@ def messages_list(request, pk):
         messages = Message.objects.filter(room=room).order_by('created_at')
         
         # Помечаем сообщения как прочитанные
-        Message.objects.filter(room=room, is_read=False).exclude(sender=request.user).update(is_read=True)
+        if Message.objects.filter(room=room, is_read=False).exclude(sender=request.user).update(is_read=True):
+            invalidate_tags(user_tag(request.user.pk))
         
-        serializer = MessageSerializer(messages, many=True)
+        serializer = MessageSerializer(messages.select_related('sender'), many=True, **sparse_fieldset(request))
         return Response(serializer.data)
     except ChatRoom.DoesNotExist:
         return Response(
@@ -178,17 +181,16 @@ def send_message(request, pk):
         room.save()
         
         # Создаём уведомления для всех участников комнаты, кроме отправителя
-        from apps.notifications.models import Notification
-        for participant in room.participants.exclude(id=request.user.id):
-            # Обрезаем текст сообщения для уведомления (макс 100 символов)
-            message_preview = content[:100] + ('...' if len(content) > 100 else '')
-            Notification.objects.create(
-                user=participant,
-                notification_type='new_message',
-                title=f'Новое сообщение от {request.user.username}',
-                message=f'{message_preview}',
-                related_user=request.user
-            )
+        from apps.notifications.services import notify_many
+        # Обрезаем текст сообщения для уведомления (макс 100 символов)
+        message_preview = content[:100] + ('...' if len(content) > 100 else '')
+        notify_many(
+            room.participants.exclude(id=request.user.id).values_list('id', flat=True),
+            notification_type='new_message',
+            title=f'Новое сообщение от {request.user.username}',
+            message=f'{message_preview}',
+            related_user=request.user
+        )
         
         # Отправляем сообщение через WebSocket (если подключены клиенты)
         try:
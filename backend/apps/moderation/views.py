@@ -9,6 +9,7 @@ from django.utils import timezone
 from .models import Complaint, Ban
 from .serializers import ComplaintSerializer, BanSerializer
 from apps.activities.models import Request
+from apps.activities.participants import refresh_fill_status
 from apps.accounts.models import User
 
 
@@ -87,7 +88,7 @@ def complaint_resolve(request, pk):
         complaint.save()
         
         # Отправляем уведомления и изменяем рейтинг
-        from apps.notifications.models import Notification
+        from apps.notifications.services import notify_many
         from apps.accounts.models import Profile
         from decimal import Decimal
         
@@ -98,8 +99,8 @@ def complaint_resolve(request, pk):
                 'rejected': 'отклонена',
                 'reviewed': 'рассмотрена'
             }
-            Notification.objects.create(
-                user=complaint.complainant,
+            notify_many(
+                [complaint.complainant_id],
                 notification_type='new_message',  # Используем существующий тип
                 title='Жалоба обработана',
                 message=f'Ваша жалоба была {status_labels.get(status_value, "обработана")}. {comment if comment else ""}',
@@ -108,8 +109,8 @@ def complaint_resolve(request, pk):
         
         # Уведомление тому, на кого пожаловались
         if status_value == 'resolved' and complaint.reported_user:
-            Notification.objects.create(
-                user=complaint.reported_user,
+            notify_many(
+                [complaint.reported_user_id],
                 notification_type='new_message',
                 title='Поступила жалоба',
                 message=f'На вас поступила жалоба, которая была признана обоснованной.',
@@ -193,6 +194,9 @@ def moderate_request(request, pk):
             req.visibility = 'link'
         
         req.save()
+        if action == 'approve':
+            # Возвращённая в работу заявка может быть уже набрана
+            refresh_fill_status(req.pk)
         return Response({'message': f'Заявка {action}'})
     except Request.DoesNotExist:
         return Response(
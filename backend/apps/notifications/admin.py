@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, TelegramMessage
 
 
 @admin.register(Notification)
@@ -7,3 +7,11 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ['user', 'notification_type', 'title', 'is_read', 'created_at']
     list_filter = ['notification_type', 'is_read', 'created_at']
     search_fields = ['user__username', 'title', 'message']
+
+
+@admin.register(TelegramMessage)
+class TelegramMessageAdmin(admin.ModelAdmin):
+    list_display = ['user', 'chat_id', 'status', 'attempts', 'latency_ms', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['user__username', 'text', 'last_error']
+    raw_id_fields = ['user', 'notification']
@@ -0,0 +1,383 @@
+"""
+Доставка уведомлений в Telegram
+
+Веб-процессы не ходят в Telegram: notify_many() в той же транзакции, что
+и уведомления, пишет исходящие сообщения в outbox (таблица TelegramMessage).
+Откат транзакции откатывает и сообщения, а коммит гарантирует, что они
+будут отправлены, даже если процесс сразу после него упадёт.
+
+Разбирает outbox постоянный воркер `python manage.py telegram_delivery` —
+один процесс с одним Bot и одной HTTP-сессией на всё время работы.
+Сообщения захватываются пачками на TELEGRAM_CLAIM_LEASE секунд
+(status='sending', claimed_by — id воркера):
+  - PostgreSQL и другие БД с SKIP LOCKED — SELECT ... FOR UPDATE SKIP LOCKED,
+    параллельные воркеры не ждут друг друга и не берут одни строки;
+  - SQLite — условный UPDATE с повторной проверкой статуса: запись в SQLite
+    сериализована, поэтому строку захватывает ровно один воркер.
+Если воркер упал, захват истекает и сообщения берёт следующий. Отправленное
+сразу помечается 'sent' (с задержкой доставки latency_ms), так что повторно
+может уйти только сообщение, отправленное в последний момент перед падением.
+Исчерпавшие попытки остаются со статусом 'failed' и возвращаются в работу
+командой `python manage.py telegram_outbox --replay`.
+
+Воркер соблюдает ограничения Bot API:
+  - не больше TELEGRAM_GLOBAL_RATE сообщений в секунду на бота — равномерно,
+    без всплесков в начале секунды, за которые Telegram отвечает 429
+    (лимит на бота: при нескольких воркерах его нужно разделить между ними);
+  - не чаще одного сообщения в чат за TELEGRAM_CHAT_INTERVAL секунд.
+
+Пока чат ждёт своей очереди, его новые сообщения копятся в таблице
+и уходят одним сообщением (до 4096 символов) — так всплеск в активном чате
+не превращается в сотни отдельных отправок.
+
+Ошибки:
+  - RetryAfter (429) — пауза на retry_after для чата и всего бота,
+    сообщения возвращаются в очередь без траты попытки;
+  - сетевые ошибки и таймауты — повтор с экспоненциальной задержкой
+    (TELEGRAM_RETRY_BASE * 2^попытка, не больше TELEGRAM_RETRY_MAX),
+    после TELEGRAM_MAX_ATTEMPTS попыток — 'failed';
+  - Forbidden (бот заблокирован) — сразу 'failed' все сообщения чата;
+  - BadRequest — 'failed' только отклонённое сообщение; если отклонена
+    склейка, её сообщения отправляются по одному.
+
+Текст пользователя в сообщениях экранирован (format_notification_text),
+поэтому склейка не создаёт и не ломает разметку Markdown.
+
+Для проверки без сети: `python manage.py fake_telegram_api` и
+TELEGRAM_API_URL=http://127.0.0.1:8081.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+from apps.accounts.models import User
+from .models import TelegramMessage
+
+logger = logging.getLogger(__name__)
+
+# Предел длины сообщения Bot API
+MAX_MESSAGE_LENGTH = 4096
+
+# Разделитель сообщений, объединённых в одно
+COALESCE_SEPARATOR = '\n\n'
+
+
+def enqueue(user_ids, text, notification_ids=None):
+    """
+    Пишет сообщение в outbox для пользователей с подтверждённым Telegram:
+    один SELECT получателей и один bulk_create. Вызывается внутри транзакции,
+    создающей уведомления; notification_ids — {user_id: id уведомления}.
+    Возвращает число сообщений.
+    """
+    notification_ids = notification_ids or {}
+    recipients = list(
+        User.objects.filter(pk__in=user_ids, telegram_verified=True, telegram_id__isnull=False)
+        .values_list('id', 'telegram_id')
+    )
+    TelegramMessage.objects.bulk_create([
+        TelegramMessage(
+            user_id=user_id, chat_id=chat_id, text=text,
+            notification_id=notification_ids.get(user_id),
+        )
+        for user_id, chat_id in recipients
+    ])
+    return len(recipients)
+
+
+def worker_id():
+    """Уникальный id воркера для claimed_by"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _claimable(now):
+    """Ожидающие своего времени и захваченные упавшим воркером"""
+    return Q(status='pending', available_at__lte=now) | Q(status='sending', claimed_until__lt=now)
+
+
+def claim_batch(worker, limit, exclude_chats=()):
+    """
+    Захватывает до limit сообщений за воркером; возвращает
+    [(id, chat_id, text, attempts, created_at), ...] в порядке постановки
+    """
+    now = timezone.now()
+    due = TelegramMessage.objects.filter(_claimable(now))
+    if exclude_chats:
+        due = due.exclude(chat_id__in=exclude_chats)
+    due = due.order_by('id')
+    claim = {
+        'status': 'sending',
+        'claimed_by': worker,
+        'claimed_until': now + timedelta(seconds=settings.TELEGRAM_CLAIM_LEASE),
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            TelegramMessage.objects.filter(id__in=ids).update(**claim)
+    else:
+        # Без блокировок строк: условие захвата проверяется ещё раз внутри UPDATE,
+        # а запись в SQLite сериализована — чужой захват не перезапишется
+        TelegramMessage.objects.filter(
+            _claimable(now), id__in=due.values('id')[:limit]
+        ).update(**claim)
+    return list(
+        TelegramMessage.objects.filter(claimed_by=worker, status='sending')
+        .order_by('id')
+        .values_list('id', 'chat_id', 'text', 'attempts', 'created_at')
+    )
+
+
+def _owned(worker, ids):
+    """Свои захваченные строки: истёкший и перехваченный захват не трогаем"""
+    return TelegramMessage.objects.filter(id__in=ids, claimed_by=worker, status='sending')
+
+
+def mark_sent(worker, created):
+    """created — {id: created_at}; записывает время и задержку доставки"""
+    if not created:
+        return
+    now = timezone.now()
+    latency = Case(
+        *(When(id=pk, then=Value(max(0, int((now - at).total_seconds() * 1000)))) for pk, at in created.items()),
+        output_field=IntegerField(),
+    )
+    _owned(worker, list(created)).update(
+        status='sent', sent_at=now, latency_ms=latency, claimed_until=None, last_error=''
+    )
+
+
+def mark_failed(worker, ids, error):
+    _owned(worker, ids).update(status='failed', claimed_until=None, last_error=str(error)[:1000])
+
+
+def schedule_retry(worker, ids, delay, error, count_attempt=True):
+    """Возвращает сообщения в очередь; исчерпавшие попытки — 'failed'. Возвращает их число"""
+    available_at = timezone.now() + timedelta(seconds=delay)
+    error = str(error)[:1000]
+    if not count_attempt:
+        _owned(worker, ids).update(status='pending', available_at=available_at,
+                                   claimed_until=None, last_error=error)
+        return 0
+    failed = _owned(worker, ids).filter(attempts__gte=settings.TELEGRAM_MAX_ATTEMPTS - 1).update(
+        status='failed', attempts=F('attempts') + 1, claimed_until=None, last_error=error
+    )
+    _owned(worker, ids).update(
+        status='pending', attempts=F('attempts') + 1, available_at=available_at,
+        claimed_until=None, last_error=error
+    )
+    return failed
+
+
+def replay_failed(since=None):
+    """Возвращает недоставленные сообщения в очередь с обнулёнными попытками"""
+    failed = TelegramMessage.objects.filter(status='failed')
+    if since is not None:
+        failed = failed.filter(created_at__gte=since)
+    return failed.update(status='pending', attempts=0, available_at=timezone.now(), claimed_by='')
+
+
+def purge_sent(days):
+    """Удаляет отправленные сообщения старше days дней"""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = TelegramMessage.objects.filter(status='sent', sent_at__lt=cutoff).delete()
+    return deleted
+
+
+def coalesce(messages):
+    """
+    Склеивает сообщения чата [(id, текст), ...] в как можно меньше частей
+    не длиннее MAX_MESSAGE_LENGTH: [(текст, [id, ...]), ...]. Сообщения не
+    обрезаются (это делает format_notification_text по исходному тексту):
+    срез мог бы разорвать разметку.
+    """
+    parts = []
+    for pk, text in messages:
+        if parts and len(parts[-1][0]) + len(COALESCE_SEPARATOR) + len(text) <= MAX_MESSAGE_LENGTH:
+            parts[-1] = (parts[-1][0] + COALESCE_SEPARATOR + text, parts[-1][1] + [pk])
+        else:
+            parts.append((text, [pk]))
+    return parts
+
+
+def retry_delay(attempts):
+    """Задержка перед повтором: экспонента с разбросом, чтобы повторы не шли волной"""
+    delay = min(settings.TELEGRAM_RETRY_MAX, settings.TELEGRAM_RETRY_BASE * 2 ** attempts)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _seconds(value):
+    """retry_after в PTB — int или timedelta в зависимости от версии"""
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class RateLimiter:
+    """
+    Глобальный темп (token bucket ёмкостью в одно сообщение, то есть ровно
+    rate сообщений в секунду) и минимальный интервал между сообщениями в один чат
+    """
+
+    def __init__(self, rate, chat_interval, clock=time.monotonic):
+        self.rate = rate
+        self.chat_interval = chat_interval
+        self.clock = clock
+        self.tokens = 1.0
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.chat_ready_at = {}
+        self.lock = asyncio.Lock()
+
+    def busy_chats(self):
+        """Чаты, которым сейчас писать нельзя (устаревшие записи вычищаются)"""
+        now = self.clock()
+        self.chat_ready_at = {chat: at for chat, at in self.chat_ready_at.items() if at > now}
+        return set(self.chat_ready_at)
+
+    def next_ready_in(self):
+        """Через сколько секунд освободится первый занятый чат"""
+        if not self.chat_ready_at:
+            return None
+        return max(0.0, min(self.chat_ready_at.values()) - self.clock())
+
+    def block_chat(self, chat_id, seconds):
+        self.chat_ready_at[chat_id] = max(self.chat_ready_at.get(chat_id, 0.0), self.clock() + seconds)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    async def acquire(self, chat_id):
+        """Ждёт, пока освободится чат и появится глобальный токен, и занимает чат на chat_interval"""
+        wait = self.chat_ready_at.get(chat_id, 0.0) - self.clock()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        async with self.lock:
+            while True:
+                now = self.clock()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        self.block_chat(chat_id, self.chat_interval)
+
+
+class DeliveryWorker:
+    """Читает очередь TelegramMessage и отправляет её через один Bot"""
+
+    def __init__(self, bot, limiter, batch_size=200, concurrency=30, poll_interval=0.5):
+        self.bot = bot
+        self.limiter = limiter
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.poll_interval = poll_interval
+        self.worker = worker_id()
+        self.stats = {'sent': 0, 'messages': 0, 'retried': 0, 'dropped': 0, 'rate_limited': 0}
+
+    @sync_to_async
+    def _claim(self, busy_chats):
+        """Готовые к отправке сообщения, кроме чатов, которые ещё ждут интервала"""
+        return claim_batch(self.worker, self.batch_size, busy_chats)
+
+    @sync_to_async
+    def _sent(self, created):
+        mark_sent(self.worker, created)
+
+    @sync_to_async
+    def _failed(self, ids, error):
+        mark_failed(self.worker, ids, error)
+
+    @sync_to_async
+    def _retry(self, ids, delay, error, count_attempt=True):
+        return schedule_retry(self.worker, ids, delay, error, count_attempt)
+
+    async def _send_part(self, chat_id, text, ids, created):
+        await self.limiter.acquire(chat_id)
+        await self.bot.send_message(chat_id=chat_id, text=text, parse_mode='Markdown')
+        self.stats['sent'] += 1
+        self.stats['messages'] += len(ids)
+        # Отмечаем сразу: при падении воркера повторно не уйдёт
+        await self._sent({pk: created[pk] for pk in ids})
+
+    async def _reject(self, chat_id, ids, error):
+        logger.warning('Telegram отклонил сообщение %s для чата %s: %s', ids[0], chat_id, error)
+        self.stats['dropped'] += len(ids)
+        await self._failed(ids, error)
+
+    async def _send_chat(self, chat_id, rows):
+        """Отправляет накопившиеся сообщения одного чата"""
+        from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+        created = {row[0]: row[4] for row in rows}
+        texts = {row[0]: row[2] for row in rows}
+        pending = [row[0] for row in rows]
+        async with self.semaphore:
+            try:
+                for text, ids in coalesce([(row[0], row[2]) for row in rows]):
+                    try:
+                        await self._send_part(chat_id, text, ids, created)
+                    except BadRequest as e:
+                        if len(ids) == 1:
+                            await self._reject(chat_id, ids, e)
+                        else:
+                            # Отклонена склейка: отправляем по одному, 'failed' — только отклонённые
+                            for pk in ids:
+                                try:
+                                    await self._send_part(chat_id, texts[pk], [pk], created)
+                                except BadRequest as e:
+                                    await self._reject(chat_id, [pk], e)
+                                pending.remove(pk)
+                            continue
+                    pending = pending[len(ids):]
+            except RetryAfter as e:
+                seconds = _seconds(e.retry_after)
+                self.limiter.block_chat(chat_id, seconds)
+                self.limiter.pause(seconds)
+                self.stats['rate_limited'] += 1
+                await self._retry(pending, seconds, e, count_attempt=False)
+            except Forbidden as e:
+                logger.warning('Telegram отклонил сообщения для чата %s: %s', chat_id, e)
+                self.stats['dropped'] += len(pending)
+                await self._failed(pending, e)
+            except TelegramError as e:
+                attempts = max(row[3] for row in rows)
+                logger.warning('Ошибка отправки в чат %s (попытка %s): %s', chat_id, attempts + 1, e)
+                self.stats['retried'] += len(pending)
+                failed = await self._retry(pending, retry_delay(attempts), e)
+                if failed:
+                    logger.error('Чат %s: %s сообщений не доставлены после %s попыток',
+                                 chat_id, failed, settings.TELEGRAM_MAX_ATTEMPTS)
+                    self.stats['dropped'] += failed
+
+    async def step(self):
+        """Одна пачка: возвращает число взятых сообщений"""
+        rows = await self._claim(self.limiter.busy_chats())
+        chats = {}
+        for row in rows:
+            chats.setdefault(row[1], []).append(row)
+        await asyncio.gather(*(self._send_chat(chat_id, chat_rows) for chat_id, chat_rows in chats.items()))
+        return len(rows)
+
+    @sync_to_async
+    def pending(self):
+        return TelegramMessage.objects.filter(status__in=['pending', 'sending']).exists()
+
+    async def run(self, once=False):
+        """Работает постоянно; once=True — до опустошения очереди"""
+        while True:
+            if await self.step():
+                continue
+            if once and not await self.pending():
+                return
+            wait = self.limiter.next_ready_in()
+            await asyncio.sleep(self.poll_interval if wait is None else min(self.poll_interval, max(wait, 0.01)))
@@ -0,0 +1,170 @@
+"""
+Локальный сервер, имитирующий Telegram Bot API, для проверки доставки без сети
+Запуск: python manage.py fake_telegram_api --port 8081
+Воркер: TELEGRAM_API_URL=http://127.0.0.1:8081 python manage.py telegram_delivery
+Счётчики: GET http://127.0.0.1:8081/stats
+
+Поддерживаются getMe и sendMessage. Лимиты Bot API имитируются: сообщение
+в чат чаще --chat-interval или больше --global-rate в секунду получает 429
+с retry_after, как у настоящего API.
+"""
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from django.core.management.base import BaseCommand
+
+
+class FakeTelegramState:
+    """Счётчики и лимиты поддельного API (общие для потоков сервера)"""
+
+    def __init__(self, global_rate, chat_interval, error_rate):
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.chat_last = {}
+        self.message_id = 0
+        self.stats = {
+            'requests': 0, 'delivered': 0, 'rate_limited': 0, 'errors': 0,
+            'chats': 0, 'first_at': None, 'last_at': None,
+        }
+
+    def send(self, chat_id, text):
+        """(HTTP-код, тело ответа Bot API)"""
+        now = time.monotonic()
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.error_rate and random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return 502, {'ok': False, 'error_code': 502, 'description': 'Bad Gateway'}
+
+            while self.recent and self.recent[0] <= now - 1:
+                self.recent.popleft()
+            retry_after = 0
+            if len(self.recent) >= self.global_rate:
+                retry_after = self.recent[0] + 1 - now
+            last = self.chat_last.get(chat_id)
+            if last is not None and now - last < self.chat_interval:
+                retry_after = max(retry_after, last + self.chat_interval - now)
+            if retry_after > 0:
+                self.stats['rate_limited'] += 1
+                seconds = max(1, math.ceil(retry_after))
+                return 429, {
+                    'ok': False, 'error_code': 429,
+                    'description': f'Too Many Requests: retry after {seconds}',
+                    'parameters': {'retry_after': seconds},
+                }
+
+            self.recent.append(now)
+            if chat_id not in self.chat_last:
+                self.stats['chats'] += 1
+            self.chat_last[chat_id] = now
+            self.message_id += 1
+            self.stats['delivered'] += 1
+            self.stats['first_at'] = self.stats['first_at'] or time.time()
+            self.stats['last_at'] = time.time()
+            return 200, {'ok': True, 'result': {
+                'message_id': self.message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'text': text,
+            }}
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        if stats['first_at'] and stats['last_at'] > stats['first_at']:
+            stats['rate'] = round(stats['delivered'] / (stats['last_at'] - stats['first_at']), 1)
+        return stats
+
+
+def make_handler(state, latency, verbose):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, code, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _params(self):
+            raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                return json.loads(raw or b'{}')
+            return {key: values[0] for key, values in parse_qs(raw.decode()).items()}
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/stats':
+                return self._reply(200, state.snapshot())
+            self.do_POST()
+
+        def do_POST(self):
+            # /bot<token>/<method>
+            method = self.path.rsplit('/', 1)[-1].split('?')[0]
+            params = self._params() if self.command == 'POST' else {}
+            if latency:
+                time.sleep(latency)
+            if method == 'getMe':
+                return self._reply(200, {'ok': True, 'result': {
+                    'id': 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot',
+                }})
+            if method == 'sendMessage':
+                try:
+                    chat_id = int(params['chat_id'])
+                except (KeyError, ValueError):
+                    return self._reply(400, {'ok': False, 'error_code': 400,
+                                             'description': 'Bad Request: chat not found'})
+                code, payload = state.send(chat_id, params.get('text', ''))
+                return self._reply(code, payload)
+            self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = 'Запускает локальный поддельный Telegram Bot API для проверки воркера доставки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--global-rate', type=int, default=30,
+                            help='Сообщений в секунду на бота до ответа 429')
+        parser.add_argument('--chat-interval', type=float, default=1.0,
+                            help='Минимальный интервал между сообщениями в один чат, секунды')
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help='Задержка ответа, секунды')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Доля ответов 502 (имитация сбоев сети)')
+        parser.add_argument('--verbose', action='store_true', help='Логировать каждый запрос')
+
+    def handle(self, *args, **options):
+        state = FakeTelegramState(options['global_rate'], options['chat_interval'], options['error_rate'])
+        server = ThreadingHTTPServer(
+            (options['host'], options['port']),
+            make_handler(state, options['latency'], options['verbose']),
+        )
+        server.daemon_threads = True
+        self.stdout.write(self.style.SUCCESS(
+            f'Поддельный Telegram Bot API на http://{options["host"]}:{options["port"]} '
+            f'(лимиты: {options["global_rate"]}/с, чат — раз в {options["chat_interval"]} с)'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(self.style.SUCCESS(f'Остановлен: {state.snapshot()}'))
@@ -0,0 +1,70 @@
+"""
+Воркер доставки уведомлений в Telegram (apps/notifications/delivery.py)
+Постоянный воркер: python manage.py telegram_delivery
+Разобрать очередь и выйти: python manage.py telegram_delivery --once
+"""
+import asyncio
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.notifications.delivery import DeliveryWorker, RateLimiter
+
+
+class Command(BaseCommand):
+    help = 'Отправляет очередь уведомлений в Telegram с соблюдением лимитов Bot API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь и завершиться')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Сообщений очереди за одну выборку')
+        parser.add_argument('--concurrency', type=int, default=30,
+                            help='Одновременных запросов к Bot API (и размер пула соединений)')
+        parser.add_argument('--poll-interval', type=float, default=0.5,
+                            help='Пауза между проверками пустой очереди в секундах')
+
+    def handle(self, *args, **options):
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise CommandError('TELEGRAM_BOT_TOKEN не установлен')
+        try:
+            from telegram import Bot
+            from telegram.request import HTTPXRequest
+        except ImportError:
+            raise CommandError('python-telegram-bot не установлен')
+
+        # Один Bot и один пул HTTP-соединений на всё время работы
+        bot = Bot(
+            token=settings.TELEGRAM_BOT_TOKEN,
+            base_url=f'{settings.TELEGRAM_API_URL}/bot',
+            request=HTTPXRequest(connection_pool_size=options['concurrency']),
+        )
+        self.worker = None
+        started = time.monotonic()
+        self.stdout.write(self.style.SUCCESS(f'Воркер доставки Telegram запущен ({settings.TELEGRAM_API_URL})'))
+        try:
+            asyncio.run(self.serve(bot, options))
+        except KeyboardInterrupt:
+            pass
+        self.report(time.monotonic() - started)
+
+    async def serve(self, bot, options):
+        limiter = RateLimiter(settings.TELEGRAM_GLOBAL_RATE, settings.TELEGRAM_CHAT_INTERVAL)
+        self.worker = DeliveryWorker(
+            bot, limiter,
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+        )
+        async with bot:
+            await self.worker.run(once=options['once'])
+
+    def report(self, elapsed):
+        if self.worker is None:
+            return
+        stats = self.worker.stats
+        rate = stats['sent'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Воркер доставки Telegram остановлен за {elapsed:.1f} с: '
+            f'отправлено {stats["sent"]} сообщений ({rate:.1f}/с) с {stats["messages"]} уведомлениями, '
+            f'повторов {stats["retried"]}, снято {stats["dropped"]}, 429 — {stats["rate_limited"]}'
+        ))
@@ -0,0 +1,66 @@
+"""
+Состояние outbox сообщений Telegram и обслуживание
+Статистика: python manage.py telegram_outbox
+Вернуть недоставленные в очередь: python manage.py telegram_outbox --replay [--since-hours 24]
+Удалить старые отправленные (через cron): python manage.py telegram_outbox --purge
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count
+from django.utils import timezone
+from apps.notifications.delivery import purge_sent, replay_failed
+from apps.notifications.models import TelegramMessage
+
+
+class Command(BaseCommand):
+    help = 'Показывает состояние outbox Telegram, возвращает недоставленные сообщения в очередь, чистит отправленные'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replay', action='store_true',
+                            help='Вернуть сообщения со статусом failed в очередь (попытки обнуляются)')
+        parser.add_argument('--since-hours', type=float, default=None,
+                            help='Для --replay: только созданные за последние N часов')
+        parser.add_argument('--purge', action='store_true',
+                            help='Удалить отправленные старше TELEGRAM_OUTBOX_RETENTION_DAYS')
+
+    def handle(self, *args, **options):
+        if options['replay']:
+            since = None
+            if options['since_hours'] is not None:
+                since = timezone.now() - timedelta(hours=options['since_hours'])
+            replayed = replay_failed(since)
+            self.stdout.write(self.style.SUCCESS(f'Возвращено в очередь: {replayed}'))
+
+        if options['purge']:
+            days = settings.TELEGRAM_OUTBOX_RETENTION_DAYS
+            deleted = purge_sent(days)
+            self.stdout.write(self.style.SUCCESS(f'Удалено отправленных: {deleted} (старше {days} дн.)'))
+
+        self.report()
+
+    def report(self):
+        counts = dict(
+            TelegramMessage.objects.values_list('status').annotate(count=Count('id')).order_by()
+        )
+        self.stdout.write('Сообщений: ' + ', '.join(
+            f'{label} — {counts.get(status, 0)}' for status, label in TelegramMessage.STATUS_CHOICES
+        ))
+
+        now = timezone.now()
+        backlog = TelegramMessage.objects.filter(status='pending').order_by('created_at').first()
+        if backlog:
+            self.stdout.write(f'Самое старое в очереди: {(now - backlog.created_at).total_seconds():.0f} с')
+
+        # Задержка доставки за последний час
+        sent = TelegramMessage.objects.filter(status='sent', sent_at__gte=now - timedelta(hours=1))
+        total = sent.count()
+        if total:
+            average = sent.aggregate(value=Avg('latency_ms'))['value']
+            ordered = sent.order_by('latency_ms').values_list('latency_ms', flat=True)
+            p50 = ordered[total // 2]
+            p95 = ordered[min(total - 1, total * 95 // 100)]
+            self.stdout.write(
+                f'Отправлено за час: {total}, задержка: средняя {average:.0f} мс, '
+                f'p50 {p50} мс, p95 {p95} мс'
+            )
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_telegram_message'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='telegrammessage',
+            name='notificatio_availab_58a101_idx',
+        ),
+        migrations.AddField(
+            model_name='telegrammessage',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Воркер'),
+        ),
+        migrations.AddField(
+            model_name='telegrammessage',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Захвачено до'),
+        ),
+        migrations.AddField(
+            model_name='telegrammessage',
+            name='last_error',
+            field=models.TextField(blank=True, default='', verbose_name='Последняя ошибка'),
+        ),
+        migrations.AddField(
+            model_name='telegrammessage',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Задержка доставки, мс'),
+        ),
+        migrations.AddField(
+            model_name='telegrammessage',
+            name='notification',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='telegram_messages', to='notifications.notification', verbose_name='Уведомление'),
+        ),
+        migrations.AddField(
+            model_name='telegrammessage',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Отправлено'),
+        ),
+        migrations.AddField(
+            model_name='telegrammessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ожидает отправки'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не доставлено')], default='pending', max_length=20, verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='telegrammessage',
+            index=models.Index(fields=['status', 'available_at', 'id'], name='notificatio_status_4446c5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='telegrammessage',
+            index=models.Index(fields=['claimed_by'], name='notificatio_claimed_15e8b8_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.accounts.models import User
 
 
@@ -38,3 +39,42 @@ class Notification(models.Model):
     
     def __str__(self):
         return f'{self.user.username} - {self.title}'
+
+
+class TelegramMessage(models.Model):
+    """
+    Исходящее сообщение Telegram (outbox): пишется в одной транзакции
+    с уведомлением и разбирается воркером (см. apps/notifications/delivery.py)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sending', 'Отправляется'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Не доставлено'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='telegram_messages', verbose_name='Пользователь')
+    notification = models.ForeignKey(Notification, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='telegram_messages', verbose_name='Уведомление')
+    chat_id = models.BigIntegerField(verbose_name='Telegram чат')
+    text = models.TextField(verbose_name='Текст')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    available_at = models.DateTimeField(default=timezone.now, verbose_name='Отправить не раньше')
+    claimed_by = models.CharField(max_length=64, blank=True, default='', verbose_name='Воркер')
+    claimed_until = models.DateTimeField(null=True, blank=True, verbose_name='Захвачено до')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Отправлено')
+    latency_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name='Задержка доставки, мс')
+    last_error = models.TextField(blank=True, default='', verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    
+    class Meta:
+        verbose_name = 'Сообщение Telegram'
+        verbose_name_plural = 'Очередь Telegram'
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'id']),
+            models.Index(fields=['claimed_by']),
+        ]
+    
+    def __str__(self):
+        return f'{self.chat_id} - {self.status} - {self.text[:50]}'
@@ -0,0 +1,99 @@
+"""
+Курсорная (keyset) пагинация ленты уведомлений
+
+Лента упорядочена по (-created_at, id) и читается по индексу
+(user, -created_at). Курсор хранит ключ последней строки страницы и ключ
+первой строки первой страницы (head). next листает дальше, read_cursor
+(есть и на последней странице) передаётся в POST read-all/: помечаются
+ровно те уведомления, что клиент уже загрузил, а пришедшие позже — нет.
+"""
+import base64
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.response import Response
+from apps.activities.pagination import FeedCursorPagination, InvalidCursor, cursor_int
+
+NOTIFICATION_ORDERING = ('-created_at', 'id')
+
+
+def _key(obj):
+    return [obj.created_at.isoformat(), obj.id]
+
+
+def _parse_key(value):
+    created_at = parse_datetime(value[0])
+    if created_at is None:
+        raise InvalidCursor(value)
+    return created_at, cursor_int(value[1])
+
+
+def encode_cursor(obj, head):
+    payload = {'k': _key(obj), 'h': head}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """((created_at, id) последней строки, [created_at, id] первой строки ленты)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        _parse_key(payload['h'])
+        return _parse_key(payload['k']), payload['h']
+    except (ValueError, TypeError, KeyError, IndexError, json.JSONDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def _after(created_at, pk):
+    """Строки после ключа в порядке NOTIFICATION_ORDERING"""
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+
+def _not_after(created_at, pk):
+    """Строки до ключа включительно"""
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, id__lte=pk)
+
+
+def _not_before(created_at, pk):
+    """Строки от ключа включительно"""
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__gte=pk)
+
+
+def loaded_range(cursor):
+    """Q уведомлений, загруженных клиентом: от head до строки курсора включительно"""
+    (created_at, pk), head = decode_cursor(cursor)
+    return _not_before(*_parse_key(head)) & _not_after(created_at, pk)
+
+
+class NotificationCursorPagination(FeedCursorPagination):
+    """
+    Параметры: limit (по умолчанию PAGE_SIZE, максимум max_limit) и cursor.
+    Только вперёд: лента уведомлений листается "показать ещё".
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        head = None
+        if cursor:
+            (created_at, pk), head = decode_cursor(cursor)
+            queryset = queryset.filter(_after(created_at, pk))
+        rows = list(queryset.order_by(*NOTIFICATION_ORDERING)[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        if head is None and rows:
+            head = _key(rows[0])
+        self.read_cursor = encode_cursor(rows[-1], head) if rows else cursor
+        self.next_cursor = self.read_cursor if has_more else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_cursor,
+            'read_cursor': self.read_cursor,
+            'limit': self.limit,
+            'results': data,
+        })
@@ -1,18 +1,88 @@
 """
 Serializers для notifications приложения
 """
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
+from config.serializers import SideloadMixin, SparseFieldsetMixin
 from .models import Notification
-from apps.accounts.serializers import UserSerializer
-from apps.activities.serializers import RequestSerializer
+from apps.accounts.models import User
+from apps.accounts.serializers import UserSerializer, UserBriefSerializer
+from apps.activities.models import Request
+from apps.activities.serializers import RequestSerializer, REQUEST_LIST_RELATED, prefetch_request_flags
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationListSerializer(serializers.ListSerializer):
+    """
+    Связанные заявки и пользователи списка уведомлений загружаются пачкой
+    (по запросу на связь, queryset берётся из related_querysets сериализатора)
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+
+        sources = {field.source for field in self.child.fields.values()}
+        prefetch_related_objects(items, *(
+            Prefetch(name, queryset=queryset())
+            for name, queryset in self.child.related_querysets.items()
+            if name in sources
+        ))
+        if self.child.prefetch_flags and 'related_request' in sources:
+            prefetch_request_flags(
+                [item.related_request for item in items if item.related_request_id],
+                self.context
+            )
+        return [self.child.to_representation(item) for item in items]
+
+
+class NotificationSerializer(SideloadMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     related_user = UserSerializer(read_only=True)
     related_request = RequestSerializer(read_only=True)
-    
+
     class Meta:
         model = Notification
         fields = ['id', 'notification_type', 'title', 'message', 'is_read',
                  'related_request', 'related_user', 'created_at']
         read_only_fields = ['id', 'created_at']
+        list_serializer_class = NotificationListSerializer
+
+    sideload_fields = {'related_user': 'users', 'related_request': 'requests'}
+    related_querysets = {
+        'related_request': lambda: Request.objects.select_related(*REQUEST_LIST_RELATED),
+        'related_user': lambda: User.objects.all(),
+    }
+    # Флаги вложенных заявок (избранное, участие, отклики) — пачкой
+    prefetch_flags = True
+
+
+class RequestSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Заявка в ленте уведомлений: только то, что нужно для подписи и ссылки"""
+    activity_name = serializers.CharField(source='activity.name', read_only=True)
+
+    class Meta:
+        model = Request
+        fields = ['id', 'title', 'activity_name', 'date', 'time', 'status']
+        read_only_fields = fields
+
+
+class NotificationFeedSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Уведомление в постраничной ленте (?limit=/?cursor=): краткая заявка
+    и краткий пользователь вместо полных вложенных объектов
+    """
+    related_user = UserBriefSerializer(read_only=True)
+    related_request = RequestSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'notification_type', 'title', 'message', 'is_read',
+                 'related_request', 'related_user', 'created_at']
+        read_only_fields = fields
+        list_serializer_class = NotificationListSerializer
+
+    related_querysets = {
+        'related_request': lambda: Request.objects.select_related('activity').only(
+            'title', 'date', 'time', 'status', 'activity__name'
+        ),
+        'related_user': lambda: User.objects.only('username', 'first_name', 'last_name'),
+    }
+    prefetch_flags = False
@@ -0,0 +1,58 @@
+"""
+Рассылка уведомлений
+
+notify_many() — общая точка создания уведомлений для всех мест, где они
+появляются (заявки, чат, модерация, напоминания):
+  - строки вставляются bulk_create пачками по NOTIFY_BATCH_SIZE;
+  - кэш получателей (тег user:<id>) сбрасывается одним delete_many;
+  - сообщения Telegram пишутся в outbox в той же транзакции, что
+    и уведомления: откат убирает оба, коммит гарантирует доставку
+    (отправляет их воркер telegram_delivery).
+
+Число SQL-запросов не зависит от числа получателей: INSERT на каждую
+пачку, один SELECT получателей Telegram и INSERT в очередь.
+"""
+from django.db import transaction
+from config.cache import invalidate_tags, user_tag
+from .models import Notification
+from .telegram_sender import send_telegram_batch
+
+# Уведомлений в одном INSERT
+NOTIFY_BATCH_SIZE = 500
+
+
+def _user_ids(users):
+    """id получателей без повторов: принимает пользователей, id или values_list"""
+    ids = (getattr(user, 'pk', user) for user in users)
+    return list(dict.fromkeys(pk for pk in ids if pk is not None))
+
+
+def notify_many(users, notification_type, title, message, related_request=None, related_user=None):
+    """
+    Создаёт одинаковое уведомление для каждого из users и в той же
+    транзакции — сообщения в outbox Telegram. Возвращает созданные уведомления.
+    """
+    user_ids = _user_ids(users)
+    if not user_ids:
+        return []
+
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                related_request=related_request,
+                related_user=related_user,
+            )
+            for user_id in user_ids
+        ], batch_size=NOTIFY_BATCH_SIZE)
+        send_telegram_batch(
+            user_ids, title, message, notification_type,
+            notification_ids={notification.user_id: notification.pk for notification in notifications}
+        )
+
+    # bulk_create не шлёт post_save — сбрасываем кэш получателей сами
+    invalidate_tags(*(user_tag(user_id) for user_id in user_ids))
+    return notifications
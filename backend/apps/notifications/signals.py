@@ -1,27 +1,17 @@
 """
 Сигналы для notifications приложения
+
+Отправка в Telegram — в apps/notifications/services.py (notify_many),
+одной рассылкой на все уведомления события, а не по post_save.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Notification
+from config.cache import invalidate_tags, user_tag
 
 
 @receiver(post_save, sender=Notification)
-def send_notification_telegram(sender, instance, created, **kwargs):
-    """
-    Сигнал для отправки уведомления через Telegram при создании
-    """
-    if created:
-        from .telegram_sender import send_telegram_notification
-        try:
-            send_telegram_notification(
-                user=instance.user,
-                title=instance.title,
-                message=instance.message,
-                notification_type=instance.notification_type
-            )
-        except Exception as e:
-            # Логируем ошибку, но не прерываем создание уведомления
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Ошибка отправки Telegram уведомления: {e}")
+@receiver(post_delete, sender=Notification)
+def notification_changed_cache(sender, instance, **kwargs):
+    """Сбрасывает кэш уведомлений пользователя (счётчик непрочитанных)"""
+    invalidate_tags(user_tag(instance.user_id))
@@ -0,0 +1,331 @@
+"""
+Тесты notifications приложения
+"""
+import base64
+import json
+import math
+import re
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from .delivery import (DeliveryWorker, MAX_MESSAGE_LENGTH, RateLimiter, claim_batch,
+                       mark_sent, replay_failed, schedule_retry)
+from .models import Notification, TelegramMessage
+from .services import notify_many
+from .telegram_sender import format_notification_text
+
+# Пачка меньше предела переменных SQLite, чтобы число INSERT было предсказуемым
+BATCH_SIZE = 50
+
+
+@override_settings(TELEGRAM_BOT_TOKEN='test-token')
+@mock.patch('apps.notifications.services.NOTIFY_BATCH_SIZE', BATCH_SIZE)
+class NotifyManyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create([
+            User(
+                username=f'user{i}',
+                telegram_id=1000 + i if i % 2 else None,
+                telegram_verified=bool(i % 2),
+            )
+            for i in range(3 * BATCH_SIZE)
+        ])
+
+    def single(self):
+        """Один получатель с подтверждённым Telegram: INSERT уведомления и INSERT в outbox"""
+        return self.fan_out(self.users[1:2])
+
+    def fan_out(self, users):
+        with CaptureQueriesContext(connection) as queries:
+            notify_many(users, 'new_message', 'Новое сообщение', 'Текст')
+        return len(queries)
+
+    def test_queries_do_not_depend_on_recipients(self):
+        """Одна пачка — одинаковое число запросов для 1 и для BATCH_SIZE получателей"""
+        self.assertEqual(self.fan_out(self.users[2:BATCH_SIZE + 2]), self.single())
+
+    def test_queries_grow_only_with_batches(self):
+        """Каждая следующая пачка — один INSERT уведомлений"""
+        recipients = self.users[2:]
+        batches = math.ceil(len(recipients) / BATCH_SIZE)
+        self.assertGreater(batches, 1)
+        self.assertEqual(self.fan_out(recipients), self.single() + batches - 1)
+
+    def test_one_notification_and_message_per_recipient(self):
+        """Повторы убираются, в outbox — только пользователи с подтверждённым Telegram"""
+        users = self.users[:10]
+        notify_many(users + [user.pk for user in users], 'new_message', 'Новое сообщение', 'Текст')
+        self.assertEqual(Notification.objects.filter(user__in=users).count(), 10)
+        self.assertEqual(
+            set(TelegramMessage.objects.values_list('user_id', flat=True)),
+            {user.pk for user in users if user.telegram_verified}
+        )
+
+    def test_empty_recipients(self):
+        self.assertEqual(self.fan_out([]), 0)
+
+
+class FakeBot:
+    """Bot API без сети: отклоняет текст с незакрытой разметкой, как parse_mode='Markdown'"""
+
+    def __init__(self, forbidden=False):
+        self.forbidden = forbidden
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        from telegram.error import BadRequest, Forbidden
+
+        if self.forbidden:
+            raise Forbidden('Forbidden: bot was blocked by the user')
+        unescaped = re.sub(r'\\.', '', text)
+        if len(text) > MAX_MESSAGE_LENGTH or any(unescaped.count(char) % 2 for char in '*_`'):
+            raise BadRequest("Can't parse entities")
+        self.sent.append((chat_id, text))
+
+
+class DeliveryWorkerTests(TestCase):
+    """Склейка сообщений чата и разбор отказов Telegram"""
+
+    CHAT_ID = 5001
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='reader', telegram_id=cls.CHAT_ID, telegram_verified=True)
+
+    def enqueue(self, *texts):
+        return [
+            TelegramMessage.objects.create(user=self.user, chat_id=self.CHAT_ID, text=text).pk
+            for text in texts
+        ]
+
+    def deliver(self, bot):
+        worker = DeliveryWorker(bot, RateLimiter(1000, 0), poll_interval=0)
+        async_to_sync(worker.run)(once=True)
+        return worker
+
+    def statuses(self, ids):
+        return [TelegramMessage.objects.get(pk=pk).status for pk in ids]
+
+    def test_user_markup_is_escaped_before_coalescing(self):
+        """Разметка из текста пользователя не склеивается в чужие сущности"""
+        ids = self.enqueue(
+            format_notification_text('Футбол *вечером', 'Приходите_все', 'new_request_nearby'),
+            format_notification_text('Чат', 'ответ* [ссылка', 'new_message'),
+        )
+        bot = self.deliver(FakeBot()).bot
+        self.assertEqual(len(bot.sent), 1)
+        self.assertEqual(self.statuses(ids), ['sent', 'sent'])
+
+    def test_long_message_is_cut_on_source_text(self):
+        text = format_notification_text('Заголовок', '_' * MAX_MESSAGE_LENGTH)
+        self.assertLessEqual(len(text), MAX_MESSAGE_LENGTH)
+        ids = self.enqueue(text)
+        self.deliver(FakeBot())
+        self.assertEqual(self.statuses(ids), ['sent'])
+
+    def test_rejected_coalesced_part_is_resent_one_by_one(self):
+        """Отклонена склейка — 'failed' только сообщение, которое Telegram не принимает"""
+        ids = self.enqueue('первое', 'сломанное *', 'третье')
+        with self.assertLogs('apps.notifications.delivery', 'WARNING'):
+            bot = self.deliver(FakeBot()).bot
+        self.assertEqual(self.statuses(ids), ['sent', 'failed', 'sent'])
+        self.assertEqual([text for _, text in bot.sent], ['первое', 'третье'])
+
+        # Повтор после replay снова отклоняет только сломанное, отправленные не повторяются
+        self.assertEqual(replay_failed(), 1)
+        with self.assertLogs('apps.notifications.delivery', 'WARNING'):
+            bot = self.deliver(FakeBot()).bot
+        self.assertEqual(self.statuses(ids), ['sent', 'failed', 'sent'])
+        self.assertEqual(bot.sent, [])
+
+    def test_forbidden_fails_whole_chat(self):
+        ids = self.enqueue('первое', 'второе')
+        with self.assertLogs('apps.notifications.delivery', 'WARNING'):
+            worker = self.deliver(FakeBot(forbidden=True))
+        self.assertEqual(self.statuses(ids), ['failed', 'failed'])
+        self.assertEqual(worker.stats['dropped'], 2)
+
+
+@override_settings(TELEGRAM_BOT_TOKEN='test-token', TELEGRAM_CLAIM_LEASE=60, TELEGRAM_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+    """Захват, повторы и возврат сообщений outbox"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'reader{i}', telegram_id=6000 + i, telegram_verified=True)
+            for i in range(3)
+        ]
+
+    def enqueue(self):
+        notify_many(self.users, 'new_message', 'Новое сообщение', 'Текст')
+        return list(TelegramMessage.objects.order_by('id').values_list('id', flat=True))
+
+    def claimed(self, worker, limit=10, exclude_chats=()):
+        return [row[0] for row in claim_batch(worker, limit, exclude_chats)]
+
+    def expire_leases(self):
+        TelegramMessage.objects.filter(status='sending').update(
+            claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_claim_is_exclusive(self):
+        """Строку захватывает один воркер — и с SKIP LOCKED, и условным UPDATE (SQLite)"""
+        for skip_locked in (False, True):
+            with self.subTest(skip_locked=skip_locked):
+                TelegramMessage.objects.all().delete()
+                ids = self.enqueue()
+                with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', skip_locked):
+                    first = self.claimed('worker-a', limit=2)
+                    second = self.claimed('worker-b')
+                    self.assertEqual(self.claimed('worker-c'), [])
+                self.assertEqual(first, ids[:2])
+                self.assertEqual(second, ids[2:])
+
+    def test_busy_chats_are_skipped(self):
+        ids = self.enqueue()
+        self.assertEqual(self.claimed('worker-a', exclude_chats=[6000]), ids[1:])
+
+    def test_expired_lease_is_reclaimed(self):
+        """Захват упавшего воркера истекает; его поздняя отметка не трогает чужой захват"""
+        ids = self.enqueue()
+        created = dict(TelegramMessage.objects.values_list('id', 'created_at'))
+        self.assertEqual(self.claimed('worker-a'), ids)
+        self.assertEqual(self.claimed('worker-b'), [])
+
+        self.expire_leases()
+        self.assertEqual(self.claimed('worker-b'), ids)
+        mark_sent('worker-a', created)
+        self.assertEqual(TelegramMessage.objects.filter(status='sent').count(), 0)
+
+        mark_sent('worker-b', created)
+        self.assertEqual(
+            set(TelegramMessage.objects.values_list('status', 'claimed_by')), {('sent', 'worker-b')}
+        )
+        self.assertFalse(TelegramMessage.objects.filter(latency_ms__isnull=True).exists())
+
+    def test_retry_counts_attempts_until_failed(self):
+        ids = self.enqueue()
+        for attempt in range(1, 3):
+            self.assertEqual(self.claimed('worker-a'), ids)
+            self.assertEqual(schedule_retry('worker-a', ids, 0, 'timeout'), 0)
+            self.assertEqual(set(TelegramMessage.objects.values_list('status', 'attempts')), {('pending', attempt)})
+
+        # 429 возвращает в очередь без траты попытки
+        self.claimed('worker-a')
+        schedule_retry('worker-a', ids, 0, 'retry after', count_attempt=False)
+        self.assertEqual(set(TelegramMessage.objects.values_list('status', 'attempts')), {('pending', 2)})
+
+        self.claimed('worker-a')
+        self.assertEqual(schedule_retry('worker-a', ids, 0, 'timeout'), 3)
+        self.assertEqual(set(TelegramMessage.objects.values_list('status', 'attempts')), {('failed', 3)})
+        self.assertEqual(self.claimed('worker-b'), [])
+
+    def test_retry_waits_for_delay(self):
+        ids = self.enqueue()
+        self.claimed('worker-a')
+        schedule_retry('worker-a', ids, 60, 'timeout')
+        self.assertEqual(self.claimed('worker-a'), [])
+
+    def test_failed_messages_are_replayed(self):
+        ids = self.enqueue()
+        self.claimed('worker-a')
+        TelegramMessage.objects.filter(id=ids[0]).update(status='failed', attempts=3)
+        self.assertEqual(replay_failed(), 1)
+        message = TelegramMessage.objects.get(id=ids[0])
+        self.assertEqual((message.status, message.attempts, message.claimed_by), ('pending', 0, ''))
+        self.assertEqual(self.claimed('worker-b'), ids[:1])
+
+    def test_rollback_removes_messages(self):
+        """Откат транзакции с уведомлениями убирает и сообщения outbox"""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                notify_many(self.users, 'new_message', 'Новое сообщение', 'Текст')
+                self.assertEqual(TelegramMessage.objects.count(), 3)
+                raise RuntimeError('ошибка после рассылки')
+        self.assertFalse(TelegramMessage.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(claim_batch('worker-a', 10), [])
+
+
+def forge_cursor(payload):
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+class NotificationFeedTests(TestCase):
+    """Лента уведомлений (?limit=/?cursor=) и пометка прочитанными загруженного"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username='reader')
+        self.client.force_authenticate(self.user)
+        self.notify(5)
+        # Одинаковое время создания: порядок задаёт только id
+        Notification.objects.update(created_at=timezone.now())
+        self.ids = list(Notification.objects.order_by('id').values_list('id', flat=True))
+
+    def notify(self, count):
+        for i in range(count):
+            notify_many([self.user], 'new_message', f'Сообщение {i}', 'Текст')
+
+    def page(self, **params):
+        response = self.client.get('/api/notifications/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return [item['id'] for item in data['results']], data
+
+    def read_all(self, cursor):
+        return self.client.post('/api/notifications/read-all/', {'cursor': cursor}, format='json')
+
+    def unread(self):
+        return set(Notification.objects.filter(is_read=False).values_list('id', flat=True))
+
+    def test_equal_created_at_is_ordered_by_id(self):
+        seen = []
+        ids, data = self.page(limit=2)
+        while True:
+            seen += ids
+            if not data['next']:
+                break
+            ids, data = self.page(limit=2, cursor=data['next'])
+        self.assertEqual(seen, self.ids)
+        # read_cursor есть и на последней странице
+        self.assertIsNotNone(data['read_cursor'])
+
+    def test_read_all_marks_only_loaded_range(self):
+        """Пришедшие после загрузки и ещё не загруженные уведомления остаются непрочитанными"""
+        _, data = self.page(limit=2)
+        loaded, data = self.page(limit=2, cursor=data['next'])
+        self.notify(1)
+        newer = Notification.objects.latest('id').pk
+
+        response = self.read_all(data['read_cursor'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 4)
+        self.assertEqual(self.unread(), {self.ids[4], newer})
+
+    def test_invalid_cursor_is_rejected(self):
+        _, data = self.page(limit=2)
+        valid = json.loads(base64.urlsafe_b64decode(data['read_cursor'] + '=='))
+        cursors = [
+            'garbage', '!!!', forge_cursor([1, 2]), forge_cursor({'k': valid['k']}),
+            forge_cursor({**valid, 'k': ['вчера', 1]}),
+            forge_cursor({**valid, 'k': [valid['k'][0], 10 ** 30]}),
+            forge_cursor({**valid, 'h': 'x'}),
+            forge_cursor({**valid, 'h': [valid['h'][0], 10 ** 30]}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/notifications/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'error': 'Неверный курсор'})
+                self.assertEqual(self.read_all(cursor).status_code, 400)
+        self.assertEqual(len(self.unread()), 5)
@@ -6,13 +6,29 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import NotificationSerializer, NotificationFeedSerializer
+from .pagination import NotificationCursorPagination, InvalidCursor, loaded_range
+from config.serializers import normalized_context, normalized_data, sparse_fieldset
+from config.cache import get_or_set_tagged, invalidate_tags, user_tag
+from config.batch import parse_ids
+
+
+def unread_notifications_count(user_id):
+    """Количество непрочитанных (кэшируется до изменения уведомлений пользователя)"""
+    return get_or_set_tagged(
+        f'notifications:unread:{user_id}', [user_tag(user_id)],
+        lambda: Notification.objects.filter(user_id=user_id, is_read=False).count(),
+    )
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def notification_list(request):
-    """Список уведомлений пользователя"""
+    """
+    Список уведомлений пользователя.
+    С limit/cursor — постраничная лента {next, read_cursor, limit, results}
+    с краткими заявкой и пользователем; без них — весь список в прежнем формате.
+    """
     notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
     
     # Фильтр по статусу прочтения
@@ -21,8 +37,22 @@ def notification_list(request):
         is_read = is_read.lower() == 'true'
         notifications = notifications.filter(is_read=is_read)
     
-    serializer = NotificationSerializer(notifications, many=True)
-    return Response(serializer.data)
+    paginator = NotificationCursorPagination()
+    if paginator.limit_query_param in request.query_params or paginator.cursor_query_param in request.query_params:
+        try:
+            page = paginator.paginate_queryset(notifications, request)
+        except InvalidCursor:
+            return Response(
+                {'error': 'Неверный курсор'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = NotificationFeedSerializer(page, many=True, **sparse_fieldset(request))
+        return paginator.get_paginated_response(serializer.data)
+    
+    serializer = NotificationSerializer(
+        notifications, many=True, context=normalized_context(request), **sparse_fieldset(request)
+    )
+    return Response(normalized_data(serializer))
 
 
 @api_view(['POST'])
@@ -44,14 +74,43 @@ def notification_read(request, pk):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def notification_read_all(request):
-    """Пометить все уведомления как прочитанные"""
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-    return Response({'message': 'Все уведомления помечены как прочитанные'})
+    """
+    Пометить уведомления как прочитанные одним UPDATE:
+    ids — только перечисленные (список или строка через запятую),
+    cursor — read_cursor ленты, все уже загруженные клиентом,
+    без параметров — все.
+    """
+    notifications = Notification.objects.filter(user=request.user, is_read=False)
+    
+    ids = request.data.get('ids')
+    cursor = request.data.get('cursor')
+    if ids is not None:
+        if isinstance(ids, list):
+            ids = ','.join(str(pk) for pk in ids)
+        try:
+            notifications = notifications.filter(id__in=parse_ids(str(ids)))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    elif cursor is not None:
+        try:
+            notifications = notifications.filter(loaded_range(str(cursor)))
+        except InvalidCursor:
+            return Response(
+                {'error': 'Неверный курсор'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    updated = notifications.update(is_read=True)
+    if updated:
+        invalidate_tags(user_tag(request.user.pk))
+    
+    if ids is None and cursor is None:
+        return Response({'message': 'Все уведомления помечены как прочитанные', 'updated': updated})
+    return Response({'message': 'Уведомления помечены как прочитанные', 'updated': updated})
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def unread_count(request):
     """Количество непрочитанных уведомлений"""
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
-    return Response({'count': count})
+    return Response({'count': unread_notifications_count(request.user.pk)})
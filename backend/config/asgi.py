@@ -24,3 +24,7 @@ application = ProtocolTypeRouter({
         )
     ),
 })
+
+# Индекс автодополнения строится при старте, а не на первом запросе
+from apps.activities.search import suggest  # noqa: E402
+suggest.warm_up()
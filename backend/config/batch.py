@@ -0,0 +1,33 @@
+"""
+Параметр ids для batch-endpoint'ов (несколько объектов за один запрос)
+"""
+
+# Максимум объектов в одном batch-запросе
+MAX_BATCH_SIZE = 50
+
+
+def parse_ids(value, max_size=MAX_BATCH_SIZE):
+    """
+    '3,1,3,2' -> [3, 1, 2]: порядок сохраняется, повторы убираются.
+    ValueError с текстом ошибки для ответа 400.
+    """
+    if not value:
+        raise ValueError('Укажите ids через запятую')
+    ids = []
+    seen = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            pk = int(part)
+        except ValueError:
+            raise ValueError(f'Неверный id: {part}')
+        if pk not in seen:
+            seen.add(pk)
+            ids.append(pk)
+    if not ids:
+        raise ValueError('Укажите ids через запятую')
+    if len(ids) > max_size:
+        raise ValueError(f'Не больше {max_size} id за запрос')
+    return ids
@@ -0,0 +1,79 @@
+"""
+Общий кэш с инвалидацией по тегам
+
+Кэш Django общий для всех процессов (Redis или таблица в БД, см. CACHES
+в settings), поэтому сохранённое одним воркером видят остальные.
+
+Теги — версии в кэше: ключ записи включает текущие версии её тегов,
+а invalidate_tags() удаляет версии (при следующем чтении тег получает
+новую случайную), после чего все записи с этими тегами перестают
+находиться и вытесняются по таймауту. Удалять их по одной и хранить
+списки ключей тега не нужно. Удаление, а не запись новой версии, — потому
+что FileBasedCache на каждую запись обходит весь каталог кэша, и сброс
+тысяч тегов при массовой рассылке уведомлений занимал бы минуты.
+
+    get_or_set_tagged('notifications:unread:5', [user_tag(5)], compute, 60)
+    invalidate_tags(user_tag(5))          # сбросит всё, что помечено user:5
+
+Теги, которые поддерживают сигналы приложений:
+    user:<id> — данные пользователя, его участия, избранное,
+                уведомления и сообщения в его чатах
+"""
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+
+TAG_PREFIX = 'tag:'
+
+# Таймаут записей по умолчанию, секунды
+DEFAULT_TIMEOUT = 300
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+def _tag_versions(tags):
+    """Текущие версии тегов; недостающие создаются"""
+    keys = [f'{TAG_PREFIX}{tag}' for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add, чтобы параллельные процессы сошлись на одной версии
+            cache.add(key, uuid.uuid4().hex[:12], None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def tagged_key(key, tags):
+    tags = sorted(tags)
+    return f'{key}:{":".join(_tag_versions(tags))}' if tags else key
+
+
+def get_tagged(key, tags, default=None):
+    return cache.get(tagged_key(key, tags), default)
+
+
+def set_tagged(key, value, tags, timeout=DEFAULT_TIMEOUT):
+    cache.set(tagged_key(key, tags), value, timeout)
+
+
+def get_or_set_tagged(key, tags, compute, timeout=DEFAULT_TIMEOUT):
+    """Значение из кэша или compute(), сохранённое с тегами"""
+    full_key = tagged_key(key, tags)
+    value = cache.get(full_key)
+    if value is None:
+        value = compute()
+        cache.set(full_key, value, timeout)
+    return value
+
+
+def invalidate_tags(*tags):
+    """Сбрасывает все записи с этими тегами (после коммита текущей транзакции)"""
+    if not tags:
+        return
+
+    def drop():
+        cache.delete_many([f'{TAG_PREFIX}{tag}' for tag in tags])
+
+    transaction.on_commit(drop)
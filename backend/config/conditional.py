@@ -0,0 +1,66 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) для страниц отдельных объектов
+
+Декоратор conditional(validators) ставится под @api_view: DRF к этому моменту
+уже аутентифицировал пользователя и выбрал рендерер. validators(request, ...)
+одним лёгким запросом достаёт только то, от чего зависит ответ (метки времени,
+счётчики, флаги текущего пользователя), и возвращает (parts, last_modified)
+или None, если объекта нет — тогда view отрабатывает как обычно (404).
+
+ETag — хэш parts вместе с пользователем, форматом ответа и параметрами
+запроса (fields=, expand=, ...). If-None-Match / If-Modified-Since
+проверяются до загрузки объекта и сериализации; при совпадении — 304.
+
+ETag — основной валидатор. Last-Modified строится по меткам времени объекта;
+изменения без меток (данные аккаунта автора, удаление из избранного)
+учитываются только в ETag. При обоих заголовках в запросе
+If-Modified-Since игнорируется (RFC 7232), поэтому клиентам лучше
+присылать If-None-Match.
+"""
+import hashlib
+from functools import wraps
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, parts):
+    """Сильный ETag ответа для текущего пользователя, формата и параметров запроса"""
+    renderer = getattr(request, 'accepted_renderer', None)
+    user_id = request.user.pk if request.user.is_authenticated else None
+    key = repr((
+        parts,
+        user_id,
+        getattr(renderer, 'format', None),
+        sorted(request.GET.lists()),
+    ))
+    return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+
+def conditional(validators):
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            found = validators(request, *args, **kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            parts, last_modified = found
+            etag = make_etag(request, parts)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # Ответ зависит от пользователя: только кэш клиента и только с перепроверкой
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Accept',))
+            return response
+        return wrapped
+    return decorator
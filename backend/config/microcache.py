@@ -0,0 +1,99 @@
+"""
+Микрокэш ответов для анонимных пользователей
+
+Для неавторизованных лента и поиск зависят только от параметров запроса,
+поэтому готовые байты ответа на несколько секунд (MICROCACHE_TTL) кладутся
+в общий кэш Django по ключу из пути, формата ответа и нормализованной
+строки запроса (параметры отсортированы).
+
+Защита от «набега» при истечении ключа:
+  - запись живёт в кэше дольше своей свежести (ещё MICROCACHE_STALE секунд);
+  - пересчитывает ответ только тот, кто взял блокировку (cache.add);
+  - остальные получают устаревший ответ (stale-while-revalidate), а если
+    его нет — ждут до MICROCACHE_WAIT секунд, пока ответ появится,
+    и только потом считают сами.
+
+Заголовок X-Cache: HIT, STALE или MISS.
+"""
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+# Форматы, которые кэшируются (HTML браузируемого API — нет)
+CACHED_FORMATS = ('json', 'msgpack')
+
+# Шаг ожидания ответа, который считает другой процесс
+POLL_INTERVAL = 0.05
+
+
+def cache_key(request):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.sha1(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'micro:{request.accepted_renderer.format}:{digest}'
+
+
+def _from_entry(entry, state):
+    _, content_type, body = entry
+    response = HttpResponse(body, content_type=content_type)
+    response['X-Cache'] = state
+    return response
+
+
+def _wait_for(key, deadline):
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def anonymous_cache(view):
+    """Ставится под @api_view: DRF уже определил пользователя и рендерер"""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        renderer = getattr(request, 'accepted_renderer', None)
+        if (request.method != 'GET' or request.user.is_authenticated
+                or getattr(renderer, 'format', None) not in CACHED_FORMATS):
+            return view(request, *args, **kwargs)
+
+        key = cache_key(request)
+        lock_key = f'{key}:lock'
+        entry = cache.get(key)
+        if entry is not None and entry[0] > time.time():
+            return _from_entry(entry, 'HIT')
+
+        if not cache.add(lock_key, 1, settings.MICROCACHE_LOCK_TIMEOUT):
+            # Ответ уже пересчитывает другой запрос
+            if entry is not None:
+                return _from_entry(entry, 'STALE')
+            entry = _wait_for(key, time.monotonic() + settings.MICROCACHE_WAIT)
+            if entry is not None:
+                return _from_entry(entry, 'HIT')
+            return view(request, *args, **kwargs)
+
+        try:
+            response = view(request, *args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response
+            # Рендерим здесь, чтобы в кэш попали готовые байты
+            response.accepted_renderer = renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = {'request': request, 'response': response, 'args': args, 'kwargs': kwargs}
+            response.render()
+            ttl = settings.MICROCACHE_TTL
+            cache.set(
+                key,
+                (time.time() + ttl, response['Content-Type'], response.content),
+                ttl + settings.MICROCACHE_STALE,
+            )
+            response['X-Cache'] = 'MISS'
+            return response
+        finally:
+            cache.delete(lock_key)
+    return wrapped
@@ -1,7 +1,15 @@
 """
-Middleware для отключения CSRF проверки для API endpoints
+Middleware проекта: отключение CSRF для API и сжатие ответов
 """
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
 
 
 class DisableCSRFForAPI(MiddlewareMixin):
@@ -13,3 +21,87 @@ class DisableCSRFForAPI(MiddlewareMixin):
         if request.path.startswith('/api/'):
             setattr(request, '_dont_enforce_csrf_checks', True)
         return None
+
+
+def accepted_encodings(header):
+    """{'gzip': 1.0, 'br': 0.5, ...} из заголовка Accept-Encoding"""
+    encodings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def preferred_encoding(accepted):
+    """
+    Поддерживаемое кодирование с наибольшим q (RFC 9110, 12.5.3): явный q
+    кодирования, иначе q из "*"; при равных q — brotli. None — сжимать нельзя
+    """
+    default = accepted.get('*', 0.0)
+    encoding, best = None, 0.0
+    for name in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        quality = accepted.get(name, default)
+        if quality > best:
+            encoding, best = name, quality
+    return encoding
+
+
+def identity_acceptable(accepted):
+    """Ответ без сжатия допустим, если клиент не прислал identity;q=0 (или *;q=0 без identity)"""
+    if 'identity' in accepted:
+        return accepted['identity'] > 0
+    return accepted.get('*', 1.0) > 0
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжимает ответы больше COMPRESSION_MIN_SIZE байт кодированием с наибольшим
+    q из Accept-Encoding: brotli (если модуль установлен) или gzip (как
+    GZipMiddleware Django, со случайными байтами против BREACH); при равных
+    q — brotli. Потоковые ответы не сжимаются.
+    """
+
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        # Клиент запретил identity — сжимаем даже маленький ответ
+        required = not identity_acceptable(accepted)
+        if not required and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = preferred_encoding(accepted)
+        if encoding == 'br':
+            compressed = brotli.compress(
+                response.content,
+                quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+            )
+        elif encoding == 'gzip':
+            compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+        else:
+            # Подходящего кодирования нет — отдаём как есть (RFC 9110, 12.5.3)
+            return response
+
+        if not required and len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # Сжатое тело побайтно отличается — сильный ETag становится слабым
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,117 @@
+"""
+Рендереры и парсеры DRF: быстрый JSON на orjson и MessagePack
+
+orjson сериализует dict/list (в том числе ReturnDict/ReturnList),
+datetime, date, time и UUID нативно; Decimal (координаты) отдаётся числом,
+как и в стандартном JSONRenderer. Если orjson не установлен, используются
+стандартные классы DRF.
+
+MessagePack (application/msgpack) — та же схема, что у JSON, в бинарном виде;
+включается в settings, только если установлен модуль msgpack.
+"""
+import decimal
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def _default(obj):
+    """
+    Типы, которые orjson не знает. Произвольные итерируемые (генераторы,
+    queryset) не разворачиваются: их нужно привести к списку явно
+    """
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, memoryview)):
+        # Как JSONEncoder DRF: байты — строка UTF-8, а не список чисел
+        # (BinaryField отдаёт bytes или memoryview в зависимости от СУБД)
+        return bytes(obj).decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(data, indent=False):
+    """JSON в байтах (для уже отрендеренных ответов, например справочника)"""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    option = orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=_default, option=option)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return dumps(data, indent=bool(indent))
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на orjson"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+def _msgpack_default(obj):
+    """Типы, которые msgpack не знает; даты приводятся к строкам, как в JSON"""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return _default(obj)
+
+
+def packb(data):
+    return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Ответ в MessagePack (Accept: application/msgpack)"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return packb(data)
+
+
+class MessagePackParser(BaseParser):
+    """Тело запроса в MessagePack (Content-Type: application/msgpack)"""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except ValueError as exc:
+            # Ошибки msgpack (FormatError, ExtraData, ...) — подклассы ValueError
+            raise ParseError(f'MessagePack parse error - {str(exc) or type(exc).__name__}')
@@ -0,0 +1,210 @@
+"""
+Выборочные поля (sparse fieldsets) и нормализованный формат ответов API
+
+    ?fields=id,title,creator.username — оставить только перечисленные поля,
+                                        через точку — поля вложенных объектов
+    ?expand=creator,activity          — развернуть связи из expandable_fields
+                                        сериализатора в полное представление
+
+Невыбранные поля не вычисляются вовсе, поэтому вместе с байтами ответа
+экономятся и запросы SerializerMethodField.
+
+    ?normalized=1                     — вложенные объекты заменяются на <поле>_id,
+                                        сами объекты один раз отдаются в included
+"""
+from rest_framework import serializers
+
+
+def parse_paths(value):
+    """'id,creator.username,creator.id' -> {'id': None, 'creator': {'username', 'id'}}"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    tree = {}
+    for path in value:
+        path = path.strip()
+        if not path:
+            continue
+        head, _, rest = path.partition('.')
+        if rest:
+            nested = tree.get(head)
+            if nested is None and head in tree:
+                # Поле уже выбрано целиком
+                continue
+            tree.setdefault(head, set()).add(rest)
+        else:
+            tree[head] = None
+    return tree
+
+
+def sparse_fieldset(request):
+    """kwargs fields/expand для сериализатора из параметров запроса"""
+    kwargs = {}
+    params = getattr(request, 'query_params', request.GET)
+    if params.get('fields'):
+        kwargs['fields'] = params['fields']
+    if params.get('expand'):
+        kwargs['expand'] = params['expand']
+    return kwargs
+
+
+class SparseFieldsetMixin:
+    """
+    Миксин для ModelSerializer: принимает fields= и expand=
+    (строка через запятую или список путей).
+
+    expandable_fields — {'поле': функция без аргументов, возвращающая
+    сериализатор полного представления}; без expand поле остаётся таким,
+    как объявлено в классе.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        self._sparse_fields = parse_paths(kwargs.pop('fields', None))
+        self._expand = parse_paths(kwargs.pop('expand', None)) or {}
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        for name, nested_expand in self._expand.items():
+            factory = self.expandable_fields.get(name)
+            if factory is not None:
+                fields[name] = factory()
+            if nested_expand and name in fields:
+                target = getattr(fields[name], 'child', fields[name])
+                if isinstance(target, SparseFieldsetMixin):
+                    target._expand = parse_paths(nested_expand)
+
+        if self._sparse_fields is not None:
+            for name in list(fields):
+                if name not in self._sparse_fields:
+                    fields.pop(name)
+            for name, nested_fields in self._sparse_fields.items():
+                if nested_fields and name in fields:
+                    target = getattr(fields[name], 'child', fields[name])
+                    if isinstance(target, SparseFieldsetMixin):
+                        target._sparse_fields = parse_paths(nested_fields)
+        return fields
+
+
+def wants_normalized(request):
+    return getattr(request, 'query_params', request.GET).get('normalized') in ('1', 'true')
+
+
+class Included:
+    """Собирает связанные объекты по коллекциям (users, activities, ...) без повторов"""
+
+    def __init__(self):
+        self._pending = {}
+        self._serializers = {}
+        self._rendered = {}
+
+    def add(self, collection, obj, make_serializer):
+        """make_serializer(objects, context) — сериализатор списка объектов коллекции"""
+        rendered = self._rendered.setdefault(collection, {})
+        if obj.pk in rendered:
+            return
+        self._serializers.setdefault(collection, make_serializer)
+        self._pending.setdefault(collection, {})[obj.pk] = obj
+
+    def render(self, context):
+        """
+        Сериализует собранные объекты пачками (по одной на коллекцию).
+        Объекты из included сами могут ссылаться на другие (заявка -> автор),
+        поэтому проходы повторяются, пока есть новые.
+        """
+        while self._pending:
+            collection, objects = self._pending.popitem()
+            rendered = self._rendered[collection]
+            objects = [obj for pk, obj in objects.items() if pk not in rendered]
+            if not objects:
+                continue
+            data = self._serializers[collection](objects, context).data
+            for obj, item in zip(objects, data):
+                rendered[obj.pk] = item
+        return {collection: list(items.values()) for collection, items in self._rendered.items()}
+
+
+def normalized_context(request, **context):
+    """Контекст сериализатора; с ?normalized=1 в нём собирается included"""
+    context['request'] = request
+    if wants_normalized(request):
+        context['included'] = Included()
+    return context
+
+
+def add_included(payload, serializer):
+    """Добавляет блок included в уже собранный ответ-объект (пагинация, поиск)"""
+    included = serializer.context.get('included')
+    if included is not None:
+        payload['included'] = included.render(serializer.context)
+    return payload
+
+
+def normalized_data(serializer):
+    """data сериализатора; в нормализованном режиме — {'results': ..., 'included': ...}"""
+    data = serializer.data
+    if serializer.context.get('included') is None:
+        return data
+    return add_included({'results': data}, serializer)
+
+
+class SideloadedField(serializers.Field):
+    """
+    Поле <связь>_id: отдаёт pk и кладёт объект в included. Объекты included
+    сериализуются копией исходного вложенного сериализатора — с теми же
+    аргументами конструктора и выбранными через fields=/expand= полями.
+    """
+
+    # Аргументы, которые задаёт сам included, а не объявление поля
+    OWN_KWARGS = ('instance', 'data', 'many', 'context', 'source', 'partial')
+
+    def __init__(self, collection, serializer, **kwargs):
+        self.collection = collection
+        self.serializer = getattr(serializer, 'child', serializer)
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def make_serializer(self, objects, context):
+        kwargs = {
+            key: value for key, value in self.serializer._kwargs.items()
+            if key not in self.OWN_KWARGS
+        }
+        serializer = type(self.serializer)(objects, many=True, context=context, **kwargs)
+        if isinstance(self.serializer, SparseFieldsetMixin):
+            # fields=/expand= родителя выставляются уже после конструктора
+            serializer.child._sparse_fields = self.serializer._sparse_fields
+            serializer.child._expand = self.serializer._expand
+        return serializer
+
+    def to_representation(self, value):
+        self.context['included'].add(self.collection, value, self.make_serializer)
+        return value.pk
+
+
+class SideloadMixin:
+    """
+    sideload_fields = {'поле': 'коллекция'} — в нормализованном режиме вложенный
+    сериализатор поля заменяется на 'поле_id', а объект попадает в included
+    и сериализуется тем же сериализатором, что был объявлен (или выбран через
+    expand), вместе с его fields=/expand=.
+    Ставится в MRO перед SparseFieldsetMixin, чтобы fields= указывал исходные имена.
+    """
+    sideload_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('included') is None:
+            return fields
+        # Пересобираем словарь, чтобы поле_id стояло на месте исходного поля
+        result = {}
+        for name, field in fields.items():
+            collection = self.sideload_fields.get(name)
+            if collection is None:
+                if name not in result:
+                    result[name] = field
+                continue
+            result[f'{name}_id'] = SideloadedField(collection, field, source=name)
+        return result
@@ -3,6 +3,7 @@ Django settings for config project.
 """
 
 from pathlib import Path
+import importlib.util
 import os
 from dotenv import load_dotenv
 
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',  # gzip/brotli для ответов больше COMPRESSION_MIN_SIZE
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +97,43 @@ DATABASES = {
     }
 }
 
+# Общий для всех процессов кэш (веб-воркеры, бот, фоновые команды): коды
+# Telegram-авторизации, версии тегов и справочника, микрокэш, тайлы карты.
+# При нескольких процессах в продакшене нужен Redis (REDIS_URL): на атомарном
+# cache.add держатся блокировка микрокэша и создание версий тегов и справочника.
+# Без Redis — таблица в БД cache_table (создаётся миграцией accounts 0007):
+# общая для процессов, add атомарен за счёт первичного ключа, но каждое
+# обращение — запрос к БД. На ней же идут тесты (в тестовой БД).
+# Файловый кэш — только по явному CACHE_DIR: в нём add не атомарен (has_key + set),
+# а запись при переполнении обходит весь каталог.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_DIR = os.environ.get('CACHE_DIR', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'curs',
+        }
+    }
+elif CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+            'KEY_PREFIX': 'curs',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_table',
+            'KEY_PREFIX': 'curs',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -173,8 +212,48 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson вместо стандартного json (config/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# MessagePack для мобильных клиентов и бота (Accept/Content-Type: application/msgpack)
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'config.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'config.renderers.MessagePackParser')
+
+# Сжатие ответов (config.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Микрокэш ответов для анонимных пользователей (config.microcache), секунды
+MICROCACHE_TTL = 5
+MICROCACHE_STALE = 30
+MICROCACHE_LOCK_TIMEOUT = 10
+MICROCACHE_WAIT = 2
+
+# Потоки для параллельных разделов /api/home/ (config.views.home); 1 — последовательно
+HOME_WORKERS = 4
+
+# Дельта-синхронизация ленты (apps/activities/changes.py):
+# срок хранения tombstone удалённых заявок
+CHANGES_RETENTION_DAYS = 30
+
+# Уведомления о новой заявке по интересам (apps/activities/matching.py):
+# фоновые потоки подбора (0 — синхронно после коммита), получателей в пачке,
+# время захвата рассылки (после него её подберёт process_interest_matches) и попытки
+INTEREST_MATCH_WORKERS = 2
+INTEREST_MATCH_CHUNK = 1000
+INTEREST_MATCH_LEASE = 300
+INTEREST_MATCH_MAX_ATTEMPTS = 5
+
 # Channels settings
 CHANNEL_LAYERS = {
     'default': {
@@ -184,6 +263,20 @@ CHANNEL_LAYERS = {
 
 # Telegram Bot settings
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
+# Адрес Bot API; для локальной проверки — fake_telegram_api (http://127.0.0.1:8081)
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org')
+
+# Воркер доставки в Telegram (apps/notifications/delivery.py): сообщений в секунду
+# на бота, интервал между сообщениями в один чат, повторы с экспоненциальной задержкой
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_CHAT_INTERVAL = 1.0
+TELEGRAM_MAX_ATTEMPTS = 5
+TELEGRAM_RETRY_BASE = 2
+TELEGRAM_RETRY_MAX = 300
+# Outbox: на сколько секунд воркер захватывает пачку (после падения её возьмёт другой)
+# и сколько дней хранить отправленные сообщения (telegram_outbox --purge)
+TELEGRAM_CLAIM_LEASE = 60
+TELEGRAM_OUTBOX_RETENTION_DAYS = 7
 
 # Yandex Maps API
 YANDEX_MAPS_API_KEY = os.environ.get('YANDEX_MAPS_API_KEY', 'bd6512ff-886c-45e7-a82a-e966725f431b')
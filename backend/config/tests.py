@@ -0,0 +1,65 @@
+"""
+Тесты общих модулей проекта (config)
+"""
+from unittest import skipIf
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from .middleware import CompressionMiddleware, brotli
+from .renderers import dumps, orjson
+
+BODY = b'{"results": []}' * 200
+requires_brotli = skipIf(brotli is None, 'модуль brotli не установлен')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def encoding(self, accept_encoding, body=BODY):
+        request = RequestFactory().get('/api/requests/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = CompressionMiddleware(lambda request: HttpResponse(body))(request)
+        return response.get('Content-Encoding')
+
+    @requires_brotli
+    def test_highest_quality_wins(self):
+        self.assertEqual(self.encoding('br;q=0.1, gzip;q=0.9'), 'gzip')
+        self.assertEqual(self.encoding('gzip;q=0.5, br;q=0.8'), 'br')
+
+    @requires_brotli
+    def test_brotli_preferred_on_tie(self):
+        self.assertEqual(self.encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(self.encoding('gzip;q=0.5, br;q=0.5'), 'br')
+
+    @requires_brotli
+    def test_wildcard(self):
+        self.assertEqual(self.encoding('*'), 'br')
+        self.assertEqual(self.encoding('br;q=0, *;q=0.5'), 'gzip')
+        self.assertIsNone(self.encoding('gzip;q=0, *;q=0'))
+
+    def test_no_acceptable_encoding(self):
+        self.assertIsNone(self.encoding(''))
+        self.assertIsNone(self.encoding('deflate'))
+        self.assertIsNone(self.encoding('br;q=0, gzip;q=0'))
+
+    def test_identity_forbidden_compresses_small_response(self):
+        self.assertIsNone(self.encoding('gzip', body=b'{}'))
+        self.assertEqual(self.encoding('gzip, identity;q=0', body=b'{}'), 'gzip')
+        self.assertEqual(self.encoding('gzip, *;q=0', body=b'{}'), 'gzip')
+
+
+@skipIf(orjson is None, 'модуль orjson не установлен')
+class FastJSONTests(SimpleTestCase):
+    def test_bytes_are_utf8_strings(self):
+        for value in ['ключ'.encode(), memoryview('ключ'.encode())]:
+            self.assertEqual(dumps({'value': value}), '{"value":"ключ"}'.encode())
+
+    def test_arbitrary_iterables_are_rejected(self):
+        for value in [(item for item in [1, 2]), iter([1, 2]), {'a': 1}.keys(), range(3)]:
+            with self.subTest(value=type(value).__name__):
+                with self.assertRaises(TypeError):
+                    dumps({'value': value})
+
+    def test_native_and_known_types(self):
+        from decimal import Decimal
+        self.assertEqual(
+            dumps({'set': {1}, 'decimal': Decimal('55.75'), 'tuple': (1, 2)}),
+            b'{"set":[1],"decimal":55.75,"tuple":[1,2]}'
+        )
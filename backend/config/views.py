@@ -0,0 +1,165 @@
+"""
+Составной endpoint первого экрана приложения
+
+GET /api/home/ собирает в одном запросе то, за чем клиент при старте ходил
+шестью запросами: категории, активности, первую страницу ленты, профиль,
+счётчик непрочитанных уведомлений и список чатов.
+
+- Справочник берётся из памяти процесса (apps/activities/catalog.py).
+- Профиль и счётчик уведомлений — из общего кэша с тегом user:<id>.
+- Для анонимных весь ответ общий и идёт через микрокэш.
+- Независимые разделы с запросами к БД выполняются параллельно в пуле
+  потоков (HOME_WORKERS); у каждого потока своё соединение с БД, которое
+  живёт по правилам CONN_MAX_AGE, как у обычного запроса.
+
+Время каждого раздела — в поле timings (мс) и в заголовке Server-Timing.
+Ошибка одного раздела не роняет ответ: раздел будет null, имя — в errors.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from apps.accounts.models import Profile
+from apps.accounts.serializers import UserSerializer, ProfileSerializer
+from apps.activities.catalog import get_payload
+from apps.activities.pagination import FeedCursorPagination
+from apps.activities.serializers import request_list_serializer
+from apps.activities.views import feed_queryset
+from apps.chat.models import ChatRoom
+from apps.chat.serializers import ChatRoomSerializer
+from apps.notifications.views import unread_notifications_count
+from config.cache import get_or_set_tagged, user_tag
+from config.microcache import anonymous_cache
+from config.serializers import add_included
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.HOME_WORKERS, thread_name_prefix='home')
+    return _executor
+
+
+def categories_section(request):
+    return get_payload('categories')
+
+
+def activities_section(request):
+    return get_payload('activities')
+
+
+def feed_section(request):
+    """Первая страница ленты; дальше клиент листает /api/requests/?cursor=next"""
+    paginator = FeedCursorPagination()
+    page = paginator.paginate_queryset(feed_queryset(request), request)
+    serializer = request_list_serializer(request, page)
+    return add_included({
+        'next': paginator.next_cursor,
+        'limit': paginator.limit,
+        'results': serializer.data,
+    }, serializer)
+
+
+def profile_section(request):
+    user = request.user
+
+    def build():
+        profile = Profile.objects.filter(user=user).first()
+        if profile is None:
+            profile = Profile.objects.create(user=user, rating=Decimal('0.00'))
+        return {
+            'user': UserSerializer(user).data,
+            'profile': ProfileSerializer(profile, context={'request': request}).data,
+        }
+
+    # Абсолютный URL фото зависит от хоста запроса
+    return get_or_set_tagged(f'home:profile:{user.pk}:{request.get_host()}', [user_tag(user.pk)], build)
+
+
+def chats_section(request):
+    rooms = ChatRoom.objects.filter(participants=request.user).order_by('-updated_at')
+    return ChatRoomSerializer(rooms, many=True, context={'request': request}).data
+
+
+def notifications_section(request):
+    return unread_notifications_count(request.user.pk)
+
+
+def _timed(func, request, in_thread):
+    if in_thread:
+        close_old_connections()
+    start = time.perf_counter()
+    try:
+        return func(request), None, (time.perf_counter() - start) * 1000
+    except Exception as e:
+        logger.exception('Ошибка раздела /api/home/ %s', func.__name__)
+        return None, e, (time.perf_counter() - start) * 1000
+    finally:
+        if in_thread:
+            close_old_connections()
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@anonymous_cache
+def home(request):
+    """
+    Данные первого экрана одним запросом
+    GET /api/home/?limit=20 (limit — размер первой страницы ленты;
+    view=card и normalized=1 применяются к ленте)
+    """
+    sections = {'feed': feed_section}
+    if request.user.is_authenticated:
+        sections.update({
+            'profile': profile_section,
+            'unread_notifications': notifications_section,
+            'chats': chats_section,
+        })
+
+    # Справочник из памяти процесса считается в потоке запроса, пока пул ходит в БД
+    inline = {'categories': categories_section, 'activities': activities_section}
+    futures = {}
+    if settings.HOME_WORKERS > 1 and len(sections) > 1:
+        executor = get_executor()
+        futures = {
+            name: executor.submit(_timed, func, request, True)
+            for name, func in sections.items()
+        }
+    else:
+        inline.update(sections)
+
+    results = {name: _timed(func, request, False) for name, func in inline.items()}
+    for name, future in futures.items():
+        results[name] = future.result()
+
+    data = {'authenticated': request.user.is_authenticated}
+    timings = {}
+    errors = []
+    for name in ('categories', 'activities', 'feed', 'profile', 'unread_notifications', 'chats'):
+        if name not in results:
+            data[name] = None
+            continue
+        value, error, elapsed = results[name]
+        data[name] = value
+        timings[name] = round(elapsed, 2)
+        if error is not None:
+            errors.append(name)
+    data['timings'] = timings
+    if errors:
+        data['errors'] = errors
+
+    response = Response(data)
+    response['Server-Timing'] = ', '.join(f'{name};dur={elapsed}' for name, elapsed in timings.items())
+    return response
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Индекс автодополнения строится при старте, а не на первом запросе
+from apps.activities.search import suggest  # noqa: E402
+suggest.warm_up()
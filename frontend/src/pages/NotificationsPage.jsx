@@ -2,9 +2,13 @@ import { useState, useEffect } from 'react'
 import api from '../services/api'
 import './NotificationsPage.css'
 
+const PAGE_SIZE = 30
+
 function NotificationsPage() {
   const [notifications, setNotifications] = useState([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [unreadCount, setUnreadCount] = useState(0)
 
   useEffect(() => {
@@ -14,8 +18,9 @@ function NotificationsPage() {
 
   const loadNotifications = async () => {
     try {
-      const response = await api.get('/notifications/')
-      setNotifications(response.data)
+      const response = await api.get('/notifications/', { params: { limit: PAGE_SIZE } })
+      setNotifications(response.data.results)
+      setNextCursor(response.data.next)
     } catch (error) {
       console.error('Ошибка загрузки уведомлений:', error)
     } finally {
@@ -23,6 +28,19 @@ function NotificationsPage() {
     }
   }
 
+  const loadMore = async () => {
+    setLoadingMore(true)
+    try {
+      const response = await api.get('/notifications/', { params: { limit: PAGE_SIZE, cursor: nextCursor } })
+      setNotifications([...notifications, ...response.data.results])
+      setNextCursor(response.data.next)
+    } catch (error) {
+      console.error('Ошибка загрузки уведомлений:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const loadUnreadCount = async () => {
     try {
       const response = await api.get('/notifications/unread-count/')
@@ -88,6 +106,12 @@ function NotificationsPage() {
         ))}
       </div>
 
+      {nextCursor && (
+        <button onClick={loadMore} className="load-more" disabled={loadingMore}>
+          {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+        </button>
+      )}
+
       {notifications.length === 0 && (
         <div className="no-notifications">
           <p>У вас пока нет уведомлений</p>